@@ -0,0 +1,95 @@
+"""
+Encode time and output size for every format / encoder profile pair.
+
+By default runs on two synthetic samples (a photo-like image and a
+screenshot-like image with flat areas and text-ish edges); pass your own
+files with --images to benchmark real data.
+
+Usage:
+    python benchmarks/bench_encoders.py [--size 4000x3000] [--images a.png b.jpg]
+"""
+import io
+import os
+import sys
+import time
+import argparse
+
+import numpy as np
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from quick_image_edits import encoders  # noqa: E402
+
+
+def photo_like(width, height, seed=0):
+    """Smooth gradients with sensor-like noise."""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    arr = np.stack([
+        127 + 100 * np.sin(x / 150.0) * np.cos(y / 110.0),
+        255 * x / width,
+        255 * y / height,
+    ], axis=-1)
+    arr += rng.normal(0, 4, arr.shape)
+    return Image.fromarray(np.clip(arr, 0, 255).astype(np.uint8), mode="RGB")
+
+
+def screenshot_like(width, height, seed=0):
+    """Flat panels, thin lines and small high-contrast glyph-like boxes."""
+    rng = np.random.default_rng(seed)
+    image = Image.new("RGB", (width, height), (245, 245, 245))
+    draw = ImageDraw.Draw(image)
+    for _ in range(60):
+        x0, y0 = int(rng.integers(0, width)), int(rng.integers(0, height))
+        color = tuple(int(c) for c in rng.integers(0, 255, 3))
+        draw.rectangle([x0, y0, x0 + int(rng.integers(50, 600)), y0 + int(rng.integers(20, 300))],
+                       fill=color)
+    for y in range(0, height, 18):
+        for x in range(0, width, 9):
+            if rng.random() < 0.3:
+                draw.rectangle([x, y, x + 5, y + 10], fill=(20, 20, 20))
+    return image
+
+
+def encode(image, fmt, profile):
+    buffer = io.BytesIO()
+    pil_format, options = encoders.save_options(fmt, profile)
+    if fmt == "JPEG" and image.mode != "RGB":
+        image = image.convert("RGB")
+    start = time.perf_counter()
+    image.save(buffer, pil_format, **options)
+    return time.perf_counter() - start, buffer.tell()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Encoder profile size/speed benchmark")
+    parser.add_argument("--size", default="3000x2000", help="Synthetic sample size WxH")
+    parser.add_argument("--images", nargs="*", help="Benchmark these files instead")
+    parser.add_argument("--formats", nargs="*", default=encoders.FORMATS,
+                        choices=encoders.FORMATS)
+    args = parser.parse_args()
+
+    if args.images:
+        samples = []
+        for path in args.images:
+            with Image.open(path) as im:
+                samples.append((os.path.basename(path), im.convert("RGB")))
+    else:
+        width, height = (int(v) for v in args.size.lower().split("x"))
+        samples = [("photo", photo_like(width, height)),
+                   ("screenshot", screenshot_like(width, height))]
+
+    for name, image in samples:
+        raw = image.width * image.height * 3
+        print(f"\n{name}: {image.width}x{image.height} ({raw / 1e6:.1f} MB raw)")
+        print(f"{'format':>14} {'profile':>9} {'time':>9} {'MP/s':>7} {'bytes':>12} {'ratio':>6}")
+        for fmt in args.formats:
+            for profile in encoders.PROFILE_NAMES:
+                seconds, size = encode(image, fmt, profile)
+                mp_per_s = image.width * image.height / 1e6 / seconds
+                print(f"{fmt:>14} {profile:>9} {seconds * 1000:>7.0f}ms {mp_per_s:>7.1f} "
+                      f"{size:>12,} {raw / size:>5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
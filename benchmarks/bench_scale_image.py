@@ -0,0 +1,110 @@
+"""
+Benchmark for scale_image / open_scaled (quick_image_edits/resample.py).
+
+Compares the old single-step full-resolution LANCZOS resize against the
+multi-step path (JPEG draft decode -> Image.reduce() -> LANCZOS) over a
+range of downscale ratios, and checks that the quality difference stays
+within a tolerance. Exits with status 1 if any ratio exceeds it.
+
+Usage:
+    python benchmarks/bench_scale_image.py [--size 6000x4000] [--repeat 3]
+"""
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from quick_image_edits.resample import scale_image, open_scaled  # noqa: E402
+
+RATIOS = [1.5, 2, 3, 4, 8, 16]
+
+# Mean / max absolute difference (0-255) allowed against the reference resize
+MEAN_TOLERANCE = 2.0
+MAX_TOLERANCE = 24
+
+
+def make_test_image(width, height, seed=0):
+    """Smooth gradients plus mild noise and some hard edges, like a photo."""
+    rng = np.random.default_rng(seed)
+    y, x = np.mgrid[0:height, 0:width].astype(np.float32)
+    r = 127 + 100 * np.sin(x / 97.0) * np.cos(y / 131.0)
+    g = 255 * x / width
+    b = 255 * y / height
+    arr = np.stack([r, g, b], axis=-1)
+    arr += rng.normal(0, 6, arr.shape)
+    # Hard-edged checker blocks to stress ringing/aliasing
+    arr[(x // 256 + y // 256) % 7 == 0] = 255
+    return Image.fromarray(np.clip(arr, 0, 255).astype(np.uint8), mode="RGB")
+
+
+def best_time(func, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def diff_stats(a, b):
+    d = np.abs(np.asarray(a, dtype=np.int16) - np.asarray(b, dtype=np.int16))
+    return float(d.mean()), int(d.max())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", default="6000x4000", help="Source size WxH")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    width, height = (int(v) for v in args.size.lower().split("x"))
+
+    image = make_test_image(width, height)
+    tmp_dir = tempfile.mkdtemp(prefix="bench_scale_")
+    jpeg_path = os.path.join(tmp_dir, "source.jpg")
+    image.save(jpeg_path, "JPEG", quality=95)
+
+    print(f"Source: {width}x{height}, best of {args.repeat}")
+    print(f"{'ratio':>6} {'target':>11} {'lanczos':>9} {'reduce':>9} {'speedup':>8} "
+          f"{'jpeg':>9} {'draft':>9} {'speedup':>8} {'mean':>6} {'max':>4}")
+
+    failed = False
+    for ratio in RATIOS:
+        target_h = int(height / ratio)
+        target_w = int(width * target_h / height)
+
+        t_ref, ref = best_time(
+            lambda: image.resize((target_w, target_h), Image.Resampling.LANCZOS), args.repeat)
+        t_fast, fast = best_time(lambda: scale_image(image, target_height=target_h), args.repeat)
+
+        def full_jpeg():
+            with Image.open(jpeg_path) as im:
+                return im.convert("RGB").resize((target_w, target_h), Image.Resampling.LANCZOS)
+
+        t_jpeg, jpeg_ref = best_time(full_jpeg, args.repeat)
+        t_draft, draft = best_time(lambda: open_scaled(jpeg_path, target_height=target_h),
+                                   args.repeat)
+
+        mean_fast, max_fast = diff_stats(ref, fast)
+        mean_draft, max_draft = diff_stats(jpeg_ref, draft)
+        mean_diff = max(mean_fast, mean_draft)
+        max_diff = max(max_fast, max_draft)
+        ok = mean_diff <= MEAN_TOLERANCE and max_diff <= MAX_TOLERANCE
+        failed |= not ok
+
+        print(f"{ratio:>6} {f'{target_w}x{target_h}':>11} "
+              f"{t_ref * 1000:>7.1f}ms {t_fast * 1000:>7.1f}ms {t_ref / t_fast:>7.1f}x "
+              f"{t_jpeg * 1000:>7.1f}ms {t_draft * 1000:>7.1f}ms {t_jpeg / t_draft:>7.1f}x "
+              f"{mean_diff:>6.2f} {max_diff:>4}{'' if ok else '  <-- over tolerance'}")
+
+    print(f"Tolerance: mean <= {MEAN_TOLERANCE}, max <= {MAX_TOLERANCE}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
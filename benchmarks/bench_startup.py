@@ -0,0 +1,191 @@
+"""
+Cold-start benchmark for every script.
+
+Each case starts a fresh interpreter, so the numbers include Python
+startup and all module imports:
+  help     - `script --help` for the command-line tools (time to exit)
+  window   - time until each GUI's first window is drawn (needs a display;
+             skipped without one). Tk's mainloop is replaced by a probe that
+             draws the window once and closes it.
+  headless - a real batch run of image_pipeline.py, image_cropper_batch.py
+             --auto-trim and image_collager_two_imgs.py --folders on a few
+             synthetic images (not timed against a budget)
+
+Besides the time budgets, the suite checks which heavy libraries got
+imported: --help must not load tkinter, OpenCV, NumPy or Pillow, a GUI
+must not load OpenCV / NumPy / Pillow before its window is up, and the
+headless runs must never import tkinter.
+
+Usage:
+    python benchmarks/bench_startup.py [--repeat 5] [--help-budget 0.25] [--window-budget 0.5]
+
+Exits with status 1 if any case is over budget or loads a library it
+should not.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY = ("tkinter", "cv2", "numpy", "PIL.Image")
+
+HELP_SCRIPTS = [
+    "image_pipeline.py", "image_watcher.py", "image_job_server.py", "image_job_client.py",
+    "image_cropper_batch.py", "image_collager_two_imgs.py",
+]
+WINDOW_SCRIPTS = [
+    "image_light_n_color_adjuster.py", "image_masker.py", "image_collager_batch.py",
+    "image_collager_two_imgs.py",
+]
+
+# Runs a script as __main__ and reports the heavy modules it imported. In
+# "window" mode Tk's mainloop is replaced so the first window is drawn
+# once, reported and closed.
+PROBE = r"""
+import sys, json, runpy
+script, mode = sys.argv[1], sys.argv[2]
+sys.argv = [script] + sys.argv[3:]
+HEAVY = %r
+
+def loaded():
+    return [name for name in HEAVY if name in sys.modules]
+
+if mode == "window":
+    import tkinter
+
+    def first_window(self, n=0):
+        heavy = loaded()
+        self.update()
+        print("WINDOW " + json.dumps(heavy), flush=True)
+        self.destroy()
+    tkinter.Misc.mainloop = first_window
+
+try:
+    runpy.run_path(script, run_name="__main__")
+except SystemExit:
+    pass
+print("MODULES " + json.dumps(loaded()), flush=True)
+""" % (HEAVY,)
+
+
+def probe(script, mode, args=()):
+    """
+    Run 'script' in a fresh interpreter. Returns (seconds, heavy modules):
+    the time to the first window in "window" mode, else to exit.
+    """
+    command = [sys.executable, "-c", PROBE, script, mode, *args]
+    start = time.perf_counter()
+    proc = subprocess.Popen(command, cwd=ROOT, stdout=subprocess.PIPE,
+                            stderr=subprocess.PIPE, text=True)
+    elapsed, heavy = None, None
+    for line in proc.stdout:
+        if line.startswith("WINDOW "):
+            elapsed = time.perf_counter() - start
+            heavy = json.loads(line[7:])
+        elif line.startswith("MODULES ") and heavy is None:
+            heavy = json.loads(line[8:])
+    proc.wait()
+    if elapsed is None:
+        elapsed = time.perf_counter() - start
+    if proc.returncode != 0 or heavy is None:
+        raise RuntimeError(f"{script} {' '.join(args)} failed:\n{proc.stderr.read()}")
+    return elapsed, heavy
+
+
+def have_display():
+    try:
+        subprocess.run([sys.executable, "-c", "import tkinter; tkinter.Tk().destroy()"],
+                       check=True, capture_output=True, timeout=30)
+    except (subprocess.SubprocessError, OSError):
+        return False
+    return True
+
+
+def synthetic_folder(folder, count=3):
+    """A few small images with a white border, for the headless runs."""
+    import numpy as np
+    from PIL import Image
+
+    os.makedirs(folder, exist_ok=True)
+    for i in range(count):
+        arr = np.full((240, 320, 3), 255, dtype=np.uint8)
+        arr[40:200, 60:260] = (40 * i, 120, 200)
+        Image.fromarray(arr).save(os.path.join(folder, f"img{i}.png"))
+
+
+def headless_cases(tmp):
+    """Yield (name, script, args) for the real batch runs."""
+    images = os.path.join(tmp, "images")
+    synthetic_folder(images)
+    job_path = os.path.join(tmp, "job.json")
+    with open(job_path, "w") as f:
+        json.dump({"input": "images", "steps": [
+            {"crop": [10, 10, 300, 220]},
+            {"save": {"folder": "processed", "format": "PNG", "profile": "fast"}},
+        ]}, f)
+    yield "image_pipeline", "image_pipeline.py", [job_path]
+    yield "image_cropper_batch --auto-trim", "image_cropper_batch.py", [
+        "--auto-trim", images, "--profile", "fast"]
+    yield "image_collager_two_imgs --folders", "image_collager_two_imgs.py", [
+        "--folders", images, images, "--output", os.path.join(tmp, "pairs"),
+        "--workers", "1", "--profile", "fast"]
+
+
+def check(name, elapsed, budget, heavy, forbidden):
+    """Print one result line; returns the number of failures (0 or 1)."""
+    bad = [module for module in heavy if module in forbidden]
+    over = budget is not None and elapsed > budget
+    flags = []
+    if over:
+        flags.append(f"over {budget * 1000:.0f}ms budget")
+    if bad:
+        flags.append(f"imported {', '.join(bad)}")
+    budget_text = f"{budget * 1000:>8.0f}ms" if budget is not None else f"{'-':>10}"
+    print(f"{name:<44} {elapsed * 1000:>8.1f}ms {budget_text}"
+          + ("  <-- " + "; ".join(flags) if flags else ""))
+    return int(over or bool(bad))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="Runs per case; the best time is reported")
+    parser.add_argument("--help-budget", type=float, default=0.25,
+                        help="Seconds allowed for `script --help`")
+    parser.add_argument("--window-budget", type=float, default=0.5,
+                        help="Seconds allowed until a GUI's first window")
+    args = parser.parse_args()
+
+    failures = 0
+    print(f"{'case':<44} {'best':>10} {'budget':>10}")
+
+    for script in HELP_SCRIPTS:
+        runs = [probe(script, "help", ["--help"]) for _ in range(args.repeat)]
+        elapsed = min(t for t, _ in runs)
+        failures += check(f"{script} --help", elapsed, args.help_budget, runs[-1][1], HEAVY)
+
+    if have_display():
+        for script in WINDOW_SCRIPTS:
+            runs = [probe(script, "window") for _ in range(args.repeat)]
+            elapsed = min(t for t, _ in runs)
+            failures += check(f"{script} first window", elapsed, args.window_budget,
+                              runs[-1][1], ("cv2", "numpy", "PIL.Image"))
+    else:
+        print("No display: skipping the first-window cases")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, script, script_args in headless_cases(tmp):
+            elapsed, heavy = probe(script, "headless", script_args)
+            failures += check(name, elapsed, None, heavy, ("tkinter",))
+
+    print(f"{failures} failure(s)")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
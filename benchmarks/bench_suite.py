@@ -0,0 +1,282 @@
+"""
+Benchmark suite for the hot paths of every tool, on synthetic images.
+
+Images are generated at runtime (nothing is stored in the repo):
+  decode   - RGB / RGBA / P / 16-bit sources saved as JPEG / PNG / TIFF,
+             timed as open + convert("RGB") like the tools do
+  adjust   - PhotoEditor.update_preview (the whole slider chain) and each
+             apply_* helper, plus the fit-to-canvas resize
+  mask     - ColorMaskGUI.update_image (HSV mask, white background,
+             BGR -> RGB for display)
+  collage  - CollageApp horizontal / vertical / grid and justified layouts
+  crop     - CropTool cropping of a decoded image
+  scale    - scale_image to a quarter of the size
+  homography - findHomography + warpPerspective (image_matcher)
+
+The GUI methods need a display, so the suite times the functions they
+call (quick_image_edits.adjust / masking / layouts / resample / homography).
+
+Usage:
+    python benchmarks/bench_suite.py run [--sizes 1 4 16] [--repeat 3] [--only mask] [--output results.json]
+    python benchmarks/bench_suite.py compare baseline.json results.json [--threshold 0.15]
+
+'compare' exits with status 1 if any case got slower than the threshold.
+"""
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import datetime
+import statistics
+
+import numpy as np
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from quick_image_edits import adjust, layouts  # noqa: E402
+from quick_image_edits.resample import scale_image  # noqa: E402
+
+DEFAULT_SIZES = [1, 4, 16]          # Megapixels; --sizes 1 10 25 50 100 for the full range
+MODES = ["RGB", "RGBA", "P", "I;16"]
+FORMATS = ["JPEG", "PNG", "TIFF"]
+GROUPS = ["decode", "adjust", "mask", "collage", "crop", "scale", "homography"]
+
+# Slider values that make every stage of update_preview do work
+ADJUSTMENTS = {
+    "brightness": 1.1, "exposure": 0.8, "contrast": 1.2, "highlights": 1.2, "shadows": 1.2,
+    "saturation": 1.3, "warmth": 0.4, "tint": -0.3, "sharpness": 1.5,
+}
+
+# Relative slowdowns below this many seconds are treated as noise by 'compare'
+MIN_DELTA = 0.002
+
+
+# ========== Synthetic images ==========
+
+def dimensions(megapixels, aspect=1.5):
+    height = int(round((megapixels * 1e6 / aspect) ** 0.5))
+    return int(round(height * aspect)), height
+
+
+def synthetic_rgb(width, height, seed=0):
+    """Smooth gradients, noise and hard-edged blocks (photo + screenshot features)."""
+    rng = np.random.default_rng(seed)
+    x = np.linspace(0, 1, width, dtype=np.float32)[None, :]
+    y = np.linspace(0, 1, height, dtype=np.float32)[:, None]
+    arr = np.empty((height, width, 3), dtype=np.float32)
+    arr[..., 0] = 127 + 100 * np.sin(x * 40) * np.cos(y * 30)
+    arr[..., 1] = 255 * x
+    arr[..., 2] = 255 * y
+    arr += rng.normal(0, 4, (height, 1, 1)).astype(np.float32)
+    arr[(height // 3):(height // 2), (width // 4):(width // 3)] = (30, 200, 60)
+    return Image.fromarray(np.clip(arr, 0, 255).astype(np.uint8), mode="RGB")
+
+
+def in_mode(image, mode):
+    """The RGB sample converted to one of MODES."""
+    if mode == "RGB":
+        return image
+    if mode == "RGBA":
+        rgba = image.convert("RGBA")
+        rgba.putalpha(image.convert("L"))
+        return rgba
+    if mode == "P":
+        return image.quantize(256)
+    # 16-bit grayscale, using the full 0-65535 range
+    arr = np.asarray(image.convert("L"), dtype=np.uint16) * 257
+    return Image.fromarray(arr)  # uint16 -> "I;16"
+
+
+def encodable(mode, fmt):
+    return fmt != "JPEG" or mode == "RGB"
+
+
+# ========== Timing ==========
+
+def measure(func, repeat):
+    """(best, median) wall time of func() over 'repeat' runs, in seconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times), statistics.median(times)
+
+
+def cases_for(megapixels, groups):
+    """Yield (name, func) benchmark cases for one image size."""
+    width, height = dimensions(megapixels)
+    rgb = synthetic_rgb(width, height)
+    tag = f"{megapixels}MP"
+
+    if "decode" in groups:
+        for mode in MODES:
+            sample = in_mode(rgb, mode)
+            for fmt in FORMATS:
+                if not encodable(mode, fmt):
+                    continue
+                buffer = io.BytesIO()
+                sample.save(buffer, fmt, **({"quality": 92} if fmt == "JPEG" else {}))
+                data = buffer.getvalue()
+
+                def decode(data=data):
+                    with Image.open(io.BytesIO(data)) as im:
+                        im.convert("RGB")
+                yield f"decode.{fmt}.{mode}/{tag}", decode
+
+    if "adjust" in groups:
+        yield f"adjust.update_preview/{tag}", lambda: adjust.apply_adjustments(rgb, ADJUSTMENTS)
+        yield f"adjust.apply_gamma/{tag}", lambda: adjust.apply_gamma(rgb, ADJUSTMENTS["exposure"])
+        yield (f"adjust.apply_highlights/{tag}",
+               lambda: adjust.apply_highlights(rgb, ADJUSTMENTS["highlights"]))
+        yield f"adjust.apply_shadows/{tag}", lambda: adjust.apply_shadows(rgb, ADJUSTMENTS["shadows"])
+        yield f"adjust.apply_warmth/{tag}", lambda: adjust.apply_warmth(rgb, ADJUSTMENTS["warmth"])
+        yield f"adjust.apply_tint/{tag}", lambda: adjust.apply_tint(rgb, ADJUSTMENTS["tint"])
+        # PhotoEditor.display_image: fit into a 900x600 canvas
+        scale = min(900 / width, 600 / height, 1.0)
+        yield (f"adjust.display_resize/{tag}",
+               lambda: rgb.resize((int(width * scale), int(height * scale)), Image.LANCZOS))
+
+    if "mask" in groups or "homography" in groups:
+        try:
+            import cv2
+        except ImportError:
+            print("OpenCV not installed: skipping mask and homography cases")
+            groups = [g for g in groups if g not in ("mask", "homography")]
+        else:
+            bgr = cv2.cvtColor(np.asarray(rgb), cv2.COLOR_RGB2BGR)
+
+    if "mask" in groups:
+        from quick_image_edits import masking
+        removed = np.zeros(bgr.shape[:2], dtype=bool)
+        removed[:height // 10, :width // 10] = True
+
+        def update_image():
+            mask = masking.hsv_mask(bgr, (30, 40, 40), (90, 255, 255), removed=removed)
+            final = masking.white_background(bgr, mask)
+            cv2.cvtColor(final, cv2.COLOR_BGR2RGB)
+        yield f"mask.update_image/{tag}", update_image
+
+    if "collage" in groups:
+        # Six tiles adding up to the benchmark size
+        tile = rgb.resize(dimensions(megapixels / 6.0))
+        tiles = [tile] * 6
+        for layout in ("horizontal", "vertical", "grid"):
+            yield (f"collage.{layout}/{tag}",
+                   lambda layout=layout: layouts.simple_collage(tiles, layout, 10, 3))
+        yield (f"collage.justified/{tag}",
+               lambda: layouts.justified_collage(tiles, 3000, 400, 10))
+
+    if "crop" in groups:
+        box = (width // 10, height // 10, width * 9 // 10, height * 9 // 10)
+        yield f"crop.confirm_selection/{tag}", lambda: rgb.crop(box).load()
+
+    if "scale" in groups:
+        yield f"scale.scale_image/{tag}", lambda: scale_image(rgb, target_height=height // 4)
+
+    if "homography" in groups:
+        from quick_image_edits.homography import find_homography, warp_onto
+        rng = np.random.default_rng(1)
+        src = rng.uniform(0, 1, (20, 2)) * (width, height)
+        H_true = np.array([[1.02, 0.03, 5.0], [-0.02, 0.98, 8.0], [1e-6, 2e-6, 1.0]])
+        dst = cv2.perspectiveTransform(src.reshape(-1, 1, 2), H_true).reshape(-1, 2)
+        H = find_homography(src.tolist(), dst.tolist())
+        yield (f"homography.findHomography/{tag}",
+               lambda: find_homography(src.tolist(), dst.tolist()))
+        yield f"homography.warpPerspective/{tag}", lambda: warp_onto(bgr, bgr, H)
+
+
+def library_versions():
+    versions = {"python": platform.python_version(), "numpy": np.__version__}
+    import PIL
+    versions["pillow"] = PIL.__version__
+    try:
+        import cv2
+        versions["opencv"] = cv2.__version__
+    except ImportError:
+        pass
+    return versions
+
+
+def run(args):
+    groups = args.only or GROUPS
+    results = {}
+    print(f"{'case':<40} {'best':>10} {'median':>10} {'MP/s':>8}")
+    for megapixels in args.sizes:
+        for name, func in cases_for(megapixels, groups):
+            best, median = measure(func, args.repeat)
+            results[name] = {"best": best, "median": median, "megapixels": megapixels}
+            print(f"{name:<40} {best * 1000:>8.1f}ms {median * 1000:>8.1f}ms "
+                  f"{megapixels / best:>8.1f}")
+
+    report = {
+        "meta": {
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "machine": platform.machine(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "repeat": args.repeat,
+            "versions": library_versions(),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {args.output}")
+
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)["results"]
+    with open(args.current) as f:
+        current = json.load(f)["results"]
+
+    regressions = 0
+    print(f"{'case':<40} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name in sorted(set(baseline) & set(current)):
+        before = baseline[name]["best"]
+        after = current[name]["best"]
+        change = after / before - 1.0
+        slower = change > args.threshold and after - before > MIN_DELTA
+        faster = change < -args.threshold and before - after > MIN_DELTA
+        regressions += slower
+        flag = "  <-- REGRESSION" if slower else ("  (faster)" if faster else "")
+        print(f"{name:<40} {before * 1000:>8.1f}ms {after * 1000:>8.1f}ms {change:>+7.0%}{flag}")
+
+    for name in sorted(set(baseline) - set(current)):
+        print(f"{name:<40} missing from current results")
+    print(f"{regressions} regression(s) over {args.threshold:.0%}")
+    sys.exit(1 if regressions else 0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="Run the benchmarks")
+    run_parser.add_argument("--sizes", type=float, nargs="*", default=DEFAULT_SIZES,
+                            help="Image sizes in megapixels (1-100)")
+    run_parser.add_argument("--repeat", type=int, default=3)
+    run_parser.add_argument("--only", nargs="*", choices=GROUPS, help="Run only these groups")
+    run_parser.add_argument("--output", help="Write results to this JSON file")
+
+    compare_parser = sub.add_parser("compare", help="Flag regressions against a baseline")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.15,
+                                help="Relative slowdown counted as a regression")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        args.sizes = [int(s) if float(s).is_integer() else s for s in args.sizes]
+        run(args)
+    else:
+        compare(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,27 +2,135 @@ import os
 import math
 import tkinter as tk
 from tkinter import filedialog, messagebox
-from PIL import Image
+from concurrent.futures import ProcessPoolExecutor
+
+from quick_image_edits import encoders, instrument
+from quick_image_edits.batch_runner import ProgressPanel
+from quick_image_edits.collage_cache import CACHE_DIR
+from quick_image_edits.frames import expand_frames
+from quick_image_edits.lazy import preload
+from quick_image_edits.sources import iter_images, open_image
+
+# Pillow (and the layout / resampling helpers built on it) is imported where
+# a collage is built, so the window appears before it is loaded
+
+OUTPUT_NAME = "collage_output"   # Saved as <folder>/collage_output<ext>
+
+# ========== Contact Sheet ==========
+
+def load_thumbnail(path, cell_size):
+    """
+    Decode 'path' straight to a thumbnail that fits in a cell_size square.
+    JPEGs use draft mode so only ~cell_size pixels are ever decoded.
+    Runs inside a worker process; returns None if the file can't be read.
+    """
+    from PIL import Image
+
+    try:
+        with open_image(path) as im:
+            im.draft("RGB", (cell_size, cell_size))
+            im.thumbnail((cell_size, cell_size), Image.Resampling.LANCZOS, reducing_gap=2.0)
+            return im.convert("RGB")
+    except Exception as e:
+        print(f"Skipping file '{path}' due to error: {e}")
+        return None
+
+def contact_sheet(paths, columns, cell_size, spacing=0, workers=None, task=None, cache=None):
+    """
+    Uniform grid of thumbnails, each centered in a cell_size x cell_size cell.
+    Thumbnails are produced on a process pool and pasted in order as they
+    arrive, so memory stays proportional to the sheet itself.
+    'task' (a BatchTask) is optional and receives progress / cancel checks.
+    'cache' (a CollageCache) is optional: thumbnails of unchanged files are
+    copied from the previous build instead of being decoded.
+    """
+    from PIL import Image
+
+    rows = math.ceil(len(paths) / columns)
+    sheet_w = columns * cell_size + spacing * (columns - 1)
+    sheet_h = rows * cell_size + spacing * (rows - 1)
+    sheet = Image.new("RGB", (sheet_w, sheet_h), color=(255, 255, 255))
+
+    step = cell_size + spacing
+    kind = f"thumb{cell_size}"
+
+    def place(idx, thumb):
+        if task is not None:
+            task.check_cancelled()
+            task.advance()
+        if thumb is None:
+            return
+        r, c = divmod(idx, columns)
+        # Center the thumbnail inside its cell
+        x = c * step + (cell_size - thumb.width) // 2
+        y = r * step + (cell_size - thumb.height) // 2
+        sheet.paste(thumb, (x, y))
+        if cache is not None:
+            cache.add(paths[idx], kind, (x, y, thumb.width, thumb.height))
+
+    # Thumbnails the previous build already made
+    todo = []
+    for idx, path in enumerate(paths):
+        thumb = cache.tile(path, kind) if cache is not None else None
+        if thumb is None:
+            todo.append(idx)
+        else:
+            place(idx, thumb)
+
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        todo_paths = [paths[idx] for idx in todo]
+        thumbs = pool.map(load_thumbnail, todo_paths, [cell_size] * len(todo), chunksize=16)
+        for idx, thumb in zip(todo, thumbs):
+            place(idx, thumb)
+    finally:
+        # On cancel, drop the thumbnails that haven't started yet
+        pool.shutdown(wait=True, cancel_futures=True)
+    return sheet
 
 class CollageApp(tk.Tk):
     def __init__(self):
         super().__init__()
         self.title("Collage Maker")
-        self.geometry("350x300")
+        self.geometry("350x790")
         
         # Variables
-        self.folder_path = None
-        # layout_var can be: "horizontal", "vertical", or "grid"
+        self.folder_path = None                      # Folder or zip/tar archive
+        self.recursive_var = tk.BooleanVar(value=False)  # Include subfolders
+        self.frames_var = tk.BooleanVar(value=True)      # Every GIF/TIFF frame is a tile
+        self.incremental_var = tk.BooleanVar(value=True) # Reuse tiles of the previous build
+        # layout_var can be: "horizontal", "vertical", "grid", "justified" or "contact"
         self.layout_var = tk.StringVar(value="horizontal")
         self.spacing_var = tk.IntVar(value=0)        # Default spacing is 0 px
-        self.format_var = tk.StringVar(value="PNG")  # "PNG" or "JPEG", default PNG
+        self.format_var = tk.StringVar(value="PNG")  # "PNG", "JPEG", "WEBP" or "WEBP_LOSSLESS"
+        self.profile_var = tk.StringVar(value=encoders.DEFAULT_PROFILE)  # Encoder profile
         
         # Number of columns for the grid layout
         self.columns_var = tk.IntVar(value=2)        # Default 2 columns if grid mode
 
-        # 1. Button to select folder
-        self.select_folder_btn = tk.Button(self, text="Select Folder", command=self.select_folder)
-        self.select_folder_btn.pack(pady=(10, 5))
+        # Collage width and preferred row height for the justified layout
+        self.target_width_var = tk.IntVar(value=3000)
+        self.row_height_var = tk.IntVar(value=400)
+
+        # Cell size (px) for the contact sheet layout
+        self.cell_size_var = tk.IntVar(value=256)
+
+        # 1. Buttons to select a folder or an archive
+        source_frame = tk.Frame(self)
+        source_frame.pack(pady=(10, 0))
+        self.select_folder_btn = tk.Button(source_frame, text="Select Folder", command=self.select_folder)
+        self.select_folder_btn.pack(side=tk.LEFT, padx=2)
+        self.select_archive_btn = tk.Button(source_frame, text="Select Archive",
+                                            command=self.select_archive)
+        self.select_archive_btn.pack(side=tk.LEFT, padx=2)
+        options_frame = tk.Frame(self)
+        options_frame.pack(pady=(0, 5))
+        tk.Checkbutton(options_frame, text="Include Subfolders",
+                       variable=self.recursive_var).pack(side=tk.LEFT)
+        tk.Checkbutton(options_frame, text="All GIF/TIFF Frames",
+                       variable=self.frames_var).pack(side=tk.LEFT)
+        tk.Checkbutton(self, text="Incremental Rebuild (reuse unchanged tiles)",
+                       variable=self.incremental_var).pack(pady=(0, 5))
         
         # 2. Radio buttons for layout
         layout_frame = tk.LabelFrame(self, text="Layout")
@@ -34,10 +142,16 @@ class CollageApp(tk.Tk):
                                           variable=self.layout_var, value="vertical")
         self.grid_rb = tk.Radiobutton(layout_frame, text="Grid",
                                       variable=self.layout_var, value="grid")
+        self.justified_rb = tk.Radiobutton(layout_frame, text="Justified Rows",
+                                           variable=self.layout_var, value="justified")
+        self.contact_rb = tk.Radiobutton(layout_frame, text="Contact Sheet (Thumbnails)",
+                                         variable=self.layout_var, value="contact")
 
         self.horizontal_rb.pack(anchor="w")
         self.vertical_rb.pack(anchor="w")
         self.grid_rb.pack(anchor="w")
+        self.justified_rb.pack(anchor="w")
+        self.contact_rb.pack(anchor="w")
         
         # 3. Entry (Spinbox) for spacing
         spacing_frame = tk.LabelFrame(self, text="Spacing (px)")
@@ -54,19 +168,48 @@ class CollageApp(tk.Tk):
                                      variable=self.format_var, value="PNG")
         self.jpg_rb = tk.Radiobutton(format_frame, text="JPG",
                                      variable=self.format_var, value="JPEG")
+        self.webp_rb = tk.Radiobutton(format_frame, text="WebP",
+                                      variable=self.format_var, value="WEBP")
+        self.webp_lossless_rb = tk.Radiobutton(format_frame, text="WebP (lossless)",
+                                               variable=self.format_var, value="WEBP_LOSSLESS")
         self.png_rb.pack(anchor="w")
         self.jpg_rb.pack(anchor="w")
+        self.webp_rb.pack(anchor="w")
+        self.webp_lossless_rb.pack(anchor="w")
+        tk.Label(format_frame, text="Encoder profile:").pack(side=tk.LEFT, padx=(5, 0))
+        tk.OptionMenu(format_frame, self.profile_var, *encoders.PROFILE_NAMES).pack(side=tk.LEFT)
 
         # 5. Spinbox for number of columns (used only if layout=grid)
-        columns_frame = tk.LabelFrame(self, text="Number of Columns (Grid Mode)")
+        columns_frame = tk.LabelFrame(self, text="Number of Columns (Grid / Contact Sheet)")
         columns_frame.pack(pady=5, fill="x", padx=20)
         self.columns_entry = tk.Spinbox(columns_frame, from_=1, to=100,
                                         textvariable=self.columns_var, width=5)
         self.columns_entry.pack(pady=5)
 
-        # 6. Button to create collage
+        # 6. Target width / row height (used only if layout=justified)
+        justified_frame = tk.LabelFrame(self, text="Width / Row Height (Justified Mode)")
+        justified_frame.pack(pady=5, fill="x", padx=20)
+        self.target_width_entry = tk.Spinbox(justified_frame, from_=100, to=100000,
+                                             textvariable=self.target_width_var, width=7)
+        self.target_width_entry.pack(side=tk.LEFT, padx=5, pady=5)
+        self.row_height_entry = tk.Spinbox(justified_frame, from_=10, to=10000,
+                                           textvariable=self.row_height_var, width=7)
+        self.row_height_entry.pack(side=tk.LEFT, padx=5, pady=5)
+
+        # 7. Cell size (used only if layout=contact)
+        cell_frame = tk.LabelFrame(self, text="Cell Size in px (Contact Sheet)")
+        cell_frame.pack(pady=5, fill="x", padx=20)
+        self.cell_size_entry = tk.Spinbox(cell_frame, from_=16, to=4096,
+                                          textvariable=self.cell_size_var, width=5)
+        self.cell_size_entry.pack(pady=5)
+
+        # 8. Button to create collage
         self.create_collage_btn = tk.Button(self, text="Create Collage", command=self.create_collage)
-        self.create_collage_btn.pack(pady=(5, 10))
+        self.create_collage_btn.pack(pady=(5, 5))
+
+        # 9. Progress bar / ETA / Cancel for the (background) collage build
+        self.progress = ProgressPanel(self)
+        self.progress.pack(fill="x", padx=20, pady=(0, 10))
 
     def select_folder(self):
         """Prompt the user to select a folder containing images."""
@@ -75,125 +218,223 @@ class CollageApp(tk.Tk):
             self.folder_path = folder_selected
             messagebox.showinfo("Folder Selected", f"Images will be loaded from:\n{folder_selected}")
 
+    def select_archive(self):
+        """Prompt the user to select a zip/tar archive; images are read without extracting."""
+        archive_selected = filedialog.askopenfilename(
+            title="Select Archive Containing Images",
+            filetypes=[("Archives", "*.zip;*.tar;*.tar.gz;*.tgz;*.tar.bz2;*.tar.xz")]
+        )
+        if archive_selected:
+            self.folder_path = archive_selected
+            messagebox.showinfo("Archive Selected", f"Images will be loaded from:\n{archive_selected}")
+
     def create_collage(self):
         """Create and save the collage based on user selections."""
+        if self.progress.busy:
+            return
         if not self.folder_path:
             messagebox.showwarning("No Folder Selected", "Please select a folder first.")
             return
 
-        # Gather all images in the folder
-        image_files = [
-            f for f in os.listdir(self.folder_path)
-            if f.lower().endswith((".png", ".jpg", ".jpeg", ".tiff", ".bmp", ".gif"))
-        ]
-        if not image_files:
+        # Gather all images in the folder / archive (natural sort order)
+        entries = iter_images(self.folder_path, recursive=self.recursive_var.get(),
+                              skip_dirs=(CACHE_DIR,))
+        # Never collage the previous output: it would change (and be decoded
+        # again) on every build
+        entries = (entry for entry in entries if not self.is_output(entry))
+        if self.frames_var.get():
+            # One tile per frame of animated GIFs / multipage TIFFs (headers only)
+            entries = expand_frames(entries)
+        paths = list(entries)
+        if not paths:
             messagebox.showwarning("No Images Found", "No valid images in the selected folder.")
             return
-        
-        # Open all images with Pillow
-        images = []
-        for img_file in image_files:
-            img_path = os.path.join(self.folder_path, img_file)
-            try:
-                with Image.open(img_path) as im:
-                    # Convert to RGB (avoid issues with RGBA, P mode, etc.)
-                    images.append(im.convert("RGB"))
-            except Exception as e:
-                print(f"Skipping file '{img_file}' due to error: {e}")
 
-        if not images:
-            messagebox.showwarning("No Valid Images", "Could not open any images from this folder.")
+        # Read every Tk variable here: the build itself runs on a worker thread
+        settings = {
+            "layout": self.layout_var.get(),   # "horizontal", "vertical", "grid", "justified", "contact"
+            "spacing": self.spacing_var.get(),
+            "save_format": self.format_var.get(),  # "PNG", "JPEG", "WEBP" or "WEBP_LOSSLESS"
+            "profile": self.profile_var.get(),
+            "columns": self.columns_var.get(),
+            "target_width": self.target_width_var.get(),
+            "row_height": self.row_height_var.get(),
+            "cell_size": self.cell_size_var.get(),
+            "incremental": self.incremental_var.get(),
+        }
+        layout = settings["layout"]
+        if layout in ("grid", "contact") and settings["columns"] < 1:
+            messagebox.showwarning("Invalid Columns", "Number of columns must be >= 1.")
             return
-        
-        layout = self.layout_var.get()         # "horizontal", "vertical", or "grid"
-        spacing = self.spacing_var.get()
-        save_format = self.format_var.get()    # "PNG" or "JPEG"
-
-        if layout == "horizontal":
-            # SIDE-BY-SIDE
-            total_width = sum(img.width for img in images) + spacing * (len(images) - 1)
-            max_height = max(img.height for img in images)
-            
-            collage = Image.new("RGB", (total_width, max_height), color=(255, 255, 255))
-            
-            x_offset = 0
-            for img in images:
-                collage.paste(img, (x_offset, 0))
-                x_offset += img.width + spacing
-
-        elif layout == "vertical":
-            # TOP-TO-BOTTOM
-            total_height = sum(img.height for img in images) + spacing * (len(images) - 1)
-            max_width = max(img.width for img in images)
-            
-            collage = Image.new("RGB", (max_width, total_height), color=(255, 255, 255))
-            
-            y_offset = 0
-            for img in images:
-                collage.paste(img, (0, y_offset))
-                y_offset += img.height + spacing
+        if layout == "justified" and (settings["target_width"] < 1 or settings["row_height"] < 1):
+            messagebox.showwarning("Invalid Size", "Width and row height must be >= 1.")
+            return
+        if layout == "contact" and settings["cell_size"] < 1:
+            messagebox.showwarning("Invalid Size", "Cell size must be >= 1.")
+            return
+
+        self.create_collage_btn.config(state=tk.DISABLED)
+        self.progress.run(lambda task: self.build_and_save(paths, settings, task),
+                          total=len(paths), on_done=self.on_collage_done)
+
+    def build_and_save(self, paths, settings, task):
+        """Worker thread: build the collage and save it. Returns the output path."""
+        from quick_image_edits.collage_cache import CollageCache
+
+        layout = settings["layout"]
+        spacing = settings["spacing"]
+        # Tiles of the previous build of this folder (see quick_image_edits.collage_cache)
+        cache = CollageCache(self.output_dir()) if settings["incremental"] else None
 
+        if layout == "justified":
+            collage = self.create_justified_collage(
+                paths, settings["target_width"], settings["row_height"], spacing, task, cache)
+        elif layout == "contact":
+            collage = contact_sheet(paths, settings["columns"], settings["cell_size"],
+                                    spacing, task=task, cache=cache)
         else:
-            # GRID LAYOUT
-            columns = self.columns_var.get()
-            if columns < 1:
-                messagebox.showwarning("Invalid Columns", "Number of columns must be >= 1.")
-                return
-
-            # Calculate how many rows we need
-            total_images = len(images)
-            rows = math.ceil(total_images / columns)
-
-            # We need to find:
-            #  - max width of each column
-            #  - max height of each row
-            # so we can position images in a table-like layout.
-            col_widths = [0] * columns
-            row_heights = [0] * rows
-
-            # Assign each image to a row, col in row-major order
-            for idx, img in enumerate(images):
-                r = idx // columns
-                c = idx % columns
-                # Update max col width
-                if img.width > col_widths[c]:
-                    col_widths[c] = img.width
-                # Update max row height
-                if img.height > row_heights[r]:
-                    row_heights[r] = img.height
-
-            # Compute total collage size
-            total_width = sum(col_widths) + spacing * (columns - 1)
-            total_height = sum(row_heights) + spacing * (rows - 1)
-
-            collage = Image.new("RGB", (total_width, total_height), color=(255, 255, 255))
-
-            # Now paste images row by row
-            y_offset = 0
-            for r in range(rows):
-                x_offset = 0
-                for c in range(columns):
-                    idx = r * columns + c
-                    if idx < total_images:
-                        img = images[idx]
-                        # Paste image at (x_offset, y_offset)
-                        collage.paste(img, (x_offset, y_offset))
-                    x_offset += col_widths[c] + spacing
-                y_offset += row_heights[r] + spacing
+            collage = self.create_simple_collage(paths, layout, spacing, settings["columns"],
+                                                 task, cache)
+
+        if collage is None:
+            return None
+        task.advance(0, "Saving...")
+        output_path = self.save_collage(collage, settings["save_format"], settings["profile"])
+        if cache is not None:
+            cache.save(collage)
+            print(f"Reused {cache.reused} of {len(paths)} tile(s) from the previous build")
+        return output_path
+
+    def on_collage_done(self, status, result):
+        """Tk thread: report the outcome of build_and_save."""
+        self.create_collage_btn.config(state=tk.NORMAL)
+        if status == "done" and result is None:
+            messagebox.showwarning("No Valid Images", "Could not open any images from this folder.")
+        elif status == "done":
+            messagebox.showinfo("Collage Created", f"Collage saved as:\n{result}")
+        elif status == "error":
+            messagebox.showerror("Collage Error", f"Failed to create collage:\n{result}")
+
+    def read_sizes(self, paths, cache=None):
+        """
+        (paths that could be opened, their (w, h)) from the image headers,
+        or from the build cache for unchanged files (no pixel decoding).
+        """
+        valid_paths, sizes = [], []
+        for img_path in paths:
+            size = cache.source_size(img_path) if cache is not None else None
+            if size is None:
+                try:
+                    with open_image(img_path) as im:
+                        size = im.size
+                except Exception as e:
+                    print(f"Skipping file '{img_path}' due to error: {e}")
+                    continue
+            valid_paths.append(img_path)
+            sizes.append(size)
+        return valid_paths, sizes
+
+    def create_simple_collage(self, paths, layout, spacing, columns, task, cache=None):
+        """
+        Side by side, top to bottom or grid layout of the full-size images:
+        lay out from image headers, then decode (or take from the build
+        cache) and paste each image, one at a time.
+        """
+        from PIL import Image
+        from quick_image_edits.layouts import simple_layout
+
+        valid_paths, sizes = self.read_sizes(paths, cache)
+        if not valid_paths:
+            return None
+        task.set_total(len(valid_paths))
+
+        placements, collage_size = simple_layout(sizes, layout, spacing, columns)
+        collage = Image.new("RGB", collage_size, color=(255, 255, 255))
+
+        for img_path, size, box in zip(valid_paths, sizes, placements):
+            task.check_cancelled()
+            x, y, w, h = box
+            try:
+                tile = cache.tile(img_path, "full", (w, h)) if cache is not None else None
+                if tile is None:
+                    with instrument.stage("decode"), open_image(img_path) as im:
+                        # Convert to RGB (avoid issues with RGBA, P mode, etc.)
+                        tile = im.convert("RGB")
+                with instrument.stage("paste"):
+                    collage.paste(tile, (x, y))
+                if cache is not None:
+                    cache.add(img_path, "full", box, size)
+            except Exception as e:
+                print(f"Skipping file '{img_path}' due to error: {e}")
+            task.advance()
+        return collage
+
+    def create_justified_collage(self, paths, target_width, row_height, spacing, task, cache=None):
+        """
+        Justified rows: lay out from image headers only, then decode each
+        image directly at its tile size (or take it from the build cache)
+        and paste it, one at a time.
+        """
+        from PIL import Image
+        from quick_image_edits.layouts import justified_layout
+        from quick_image_edits.resample import open_scaled
+
+        # Read sizes from headers (no pixel decoding yet)
+        valid_paths, sizes = self.read_sizes(paths, cache)
+        if not valid_paths:
+            return None
+        task.set_total(len(valid_paths))
+
+        placements, collage_size = justified_layout(sizes, target_width, row_height, spacing)
+        collage = Image.new("RGB", collage_size, color=(255, 255, 255))
+
+        # Stream: decode straight to tile size, paste, and drop it
+        for img_path, size, box in zip(valid_paths, sizes, placements):
+            task.check_cancelled()
+            x, y, w, h = box
+            try:
+                tile = cache.tile(img_path, "scaled", (w, h)) if cache is not None else None
+                if tile is None:
+                    with instrument.stage("decode"):
+                        tile = open_scaled(img_path, target_width=w, target_height=h)
+                with instrument.stage("paste"):
+                    collage.paste(tile, (x, y))
+                if cache is not None:
+                    cache.add(img_path, "scaled", box, size)
+            except Exception as e:
+                print(f"Skipping file '{img_path}' due to error: {e}")
+            task.advance()
+        return collage
+
+    def output_dir(self):
+        """The selected folder (for an archive source, the folder it is in)."""
+        if os.path.isfile(self.folder_path):
+            return os.path.dirname(self.folder_path)
+        return self.folder_path
+
+    def is_output(self, entry):
+        """True if 'entry' is a collage this app saved (see save_collage)."""
+        if entry.member is not None:
+            return False
+        folder, name = os.path.split(os.path.abspath(entry.path))
+        return (os.path.splitext(name)[0] == OUTPUT_NAME
+                and folder == os.path.abspath(self.output_dir()))
 
+    def save_collage(self, collage, save_format, profile=encoders.DEFAULT_PROFILE):
+        """Save the collage into the selected folder and return its path."""
         # Determine file extension from format
-        extension = ".png" if save_format == "PNG" else ".jpg"
-        output_path = os.path.join(self.folder_path, f"collage_output{extension}")
+        extension = encoders.extension_for(save_format)
+        output_path = os.path.join(self.output_dir(), f"{OUTPUT_NAME}{extension}")
 
-        # Save the collage
-        try:
-            collage.save(output_path, save_format)
-            messagebox.showinfo("Collage Created", f"Collage saved as:\n{output_path}")
-        except Exception as e:
-            messagebox.showerror("Save Error", f"Failed to save collage:\n{e}")
+        # Save the collage (errors are reported by on_collage_done)
+        with instrument.stage("encode"):
+            encoders.save_image(collage, output_path, save_format, profile)
+        return output_path
 
 def main():
     app = CollageApp()
+    # Load Pillow in the background once the window is up
+    app.after_idle(preload, "quick_image_edits.layouts", "quick_image_edits.resample")
     app.mainloop()
 
 if __name__ == "__main__":
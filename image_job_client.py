@@ -0,0 +1,77 @@
+import os
+import sys
+import json
+import argparse
+
+from quick_image_edits.jobserver import DEFAULT_PORT, JobClient
+from quick_image_edits.streaming import load_job
+
+def parse_points(text):
+    """"x,y x,y ..." -> [(x, y), ...]"""
+    return [tuple(float(v) for v in pair.split(",")) for pair in text.split()]
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Submit jobs to image_job_server.py and check on them.")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--socket", help="Server Unix socket (instead of TCP)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    submit = sub.add_parser("submit", help="Submit a pipeline job file (see image_pipeline.py)")
+    submit.add_argument("job", help="JSON job file")
+    submit.add_argument("--priority", type=int, default=0, help="Higher runs first")
+    submit.add_argument("--wait", action="store_true", help="Wait for the job and print its result")
+
+    homography = sub.add_parser("homography", help="Submit a homography job")
+    homography.add_argument("--points1", required=True, help='Points on image 1: "x,y x,y ..."')
+    homography.add_argument("--points2", required=True, help="Matching points on image 2")
+    homography.add_argument("--image1", help="Image to warp")
+    homography.add_argument("--image2", help="Reference image (output size)")
+    homography.add_argument("--output", help="Write image1 warped onto image2 here")
+    homography.add_argument("--method", default="ransac", choices=["least_squares", "ransac", "lmeds"])
+    homography.add_argument("--priority", type=int, default=0)
+    homography.add_argument("--wait", action="store_true")
+
+    status = sub.add_parser("status", help="Status of one job (or all)")
+    status.add_argument("id", nargs="?")
+    cancel = sub.add_parser("cancel", help="Cancel the queued tasks of a job")
+    cancel.add_argument("id")
+    sub.add_parser("stats", help="Workers, queue length and throughput")
+    return parser.parse_args(argv)
+
+def print_progress(status):
+    print(f"\r[{status['state']}] {status['done'] + status['failed']}/{status['tasks']} tasks, "
+          f"{status['images']} images", end="", flush=True)
+
+def main(argv=None):
+    args = parse_args(argv)
+    client = JobClient(port=args.port, unix_socket=args.socket)
+    try:
+        if args.command in ("submit", "homography"):
+            if args.command == "submit":
+                job_id = client.submit("pipeline", load_job(args.job), args.priority)
+            else:
+                spec = {"points1": parse_points(args.points1), "points2": parse_points(args.points2),
+                        "method": args.method}
+                for key in ("image1", "image2", "output"):
+                    if getattr(args, key):
+                        spec[key] = os.path.abspath(getattr(args, key))
+                job_id = client.submit("homography", spec, args.priority)
+            print(f"Submitted job {job_id}")
+            if args.wait:
+                status = client.wait(job_id, on_progress=print_progress)
+                print()
+                print(json.dumps(status, indent=2))
+                if status["state"] != "done":
+                    sys.exit(1)
+        elif args.command == "status":
+            print(json.dumps(client.status(args.id), indent=2))
+        elif args.command == "cancel":
+            print(json.dumps(client.cancel(args.id), indent=2))
+        else:
+            print(json.dumps(client.stats(), indent=2))
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
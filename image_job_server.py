@@ -0,0 +1,32 @@
+import argparse
+
+from quick_image_edits.jobserver import (DEFAULT_HOST, DEFAULT_PORT, Scheduler,
+                                         default_workers, make_server)
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Shared job server: runs crop / adjust / mask / collage and homography jobs "
+                    "from image_job_client.py on one core-capped worker pool."
+    )
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="TCP port on localhost")
+    parser.add_argument("--socket", help="Listen on this Unix socket instead of TCP")
+    parser.add_argument("--workers", type=int, default=default_workers(),
+                        help="Worker processes shared by all jobs (default: cores - 1)")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    scheduler = Scheduler(args.workers)
+    server = make_server(scheduler, DEFAULT_HOST, args.port, args.socket)
+    where = args.socket or f"http://{DEFAULT_HOST}:{args.port}"
+    print(f"Job server on {where} with {scheduler.workers} workers (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("Stopping...")
+    finally:
+        server.server_close()
+        scheduler.shutdown()
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,20 @@
 import os
 import tkinter as tk
 from tkinter import filedialog, messagebox
-from PIL import Image, ImageTk, ImageEnhance
-import math
+
+from quick_image_edits import encoders, instrument, stage_overlay
+from quick_image_edits.history import EditHistory, FrameCache
+from quick_image_edits.lazy import preload
+
+# Pillow and NumPy (via quick_image_edits.adjust) are imported where they
+# are first used, so the window shows up before they are loaded
 
 class PhotoEditor(tk.Tk):
+    PROXY_SIZE = 2048         # Long side of the image the sliders preview on
+    SNAPSHOT_DELAY_MS = 400   # A slider pause this long becomes one undo step
+    HISTOGRAM_HEIGHT = 80     # Pixels; the histogram is 256 wide (one column per value)
+    CLIP_WARNING = 0.005      # Share of pixels at 0 / 255 that turns the clipping labels red
+
     def __init__(self):
         super().__init__()
         self.title("Simple Photo Editor")
@@ -13,11 +23,14 @@ class PhotoEditor(tk.Tk):
         # ===================== State Variables =====================
         self.img_path = None
         self.original_image = None  # Will hold the original PIL.Image
-        self.preview_image = None   # Will hold the processed PIL.Image for preview
+        self.proxy_image = None     # original_image downscaled to PROXY_SIZE for previews
+        self.preview_image = None   # Will hold the processed proxy for preview
         self.tk_preview = None      # The ImageTk version to display
+        self.stats = None           # adjust.PreviewStats of proxy_image (mean, histograms)
         
-        # Output format (PNG or JPEG)
+        # Output format (PNG, JPEG, WEBP or WEBP_LOSSLESS) and encoder profile
         self.format_var = tk.StringVar(value="PNG")  # default PNG
+        self.profile_var = tk.StringVar(value=encoders.DEFAULT_PROFILE)
         
         # Sliders values: we store them as tkinter DoubleVars
         # Ranges are chosen somewhat arbitrarily for demonstration
@@ -31,7 +44,15 @@ class PhotoEditor(tk.Tk):
         self.tint_var       = tk.DoubleVar(value=0.0)   # -1.0 to 1.0
         self.sharpness_var  = tk.DoubleVar(value=1.0)   # 0.0 to 3.0 (for demonstration)
 
+        # Undo / redo: slider snapshots only, plus a few rendered proxy frames
+        self.history = EditHistory(self.adjustment_values())
+        self.frames = FrameCache()
+        self._snapshot_job = None
+
         # ===================== Layout Frames =====================
+        # Per-stage timings along the bottom (only with QUICK_IMAGE_EDITS_TRACE set)
+        self.stage_overlay = stage_overlay.attach(self)
+
         # Left pane: controls
         control_frame = tk.Frame(self)
         control_frame.pack(side=tk.LEFT, fill=tk.Y, padx=5, pady=5)
@@ -48,6 +69,29 @@ class PhotoEditor(tk.Tk):
         open_btn = tk.Button(control_frame, text="Open Image", command=self.open_image)
         open_btn.pack(pady=3, fill=tk.X)
 
+        undo_frame = tk.Frame(control_frame)
+        undo_frame.pack(pady=3, fill=tk.X)
+        self.undo_btn = tk.Button(undo_frame, text="Undo", command=self.undo, state=tk.DISABLED)
+        self.undo_btn.pack(side=tk.LEFT, expand=True, fill=tk.X)
+        self.redo_btn = tk.Button(undo_frame, text="Redo", command=self.redo, state=tk.DISABLED)
+        self.redo_btn.pack(side=tk.LEFT, expand=True, fill=tk.X)
+        self.bind("<Control-z>", lambda e: self.undo())
+        self.bind("<Control-y>", lambda e: self.redo())
+        self.bind("<Control-Z>", lambda e: self.redo())   # Ctrl+Shift+Z
+
+        # Live RGB + luminance histogram of the preview, with clipping indicators
+        hist_frame = tk.LabelFrame(control_frame, text="Histogram")
+        hist_frame.pack(pady=3, fill=tk.X)
+        self.hist_canvas = tk.Canvas(hist_frame, width=256, height=self.HISTOGRAM_HEIGHT,
+                                     bg="black", highlightthickness=0)
+        self.hist_canvas.pack()
+        clip_frame = tk.Frame(hist_frame)
+        clip_frame.pack(fill=tk.X)
+        self.shadow_clip_label = tk.Label(clip_frame, text="Shadows: -")
+        self.shadow_clip_label.pack(side=tk.LEFT)
+        self.highlight_clip_label = tk.Label(clip_frame, text="Highlights: -")
+        self.highlight_clip_label.pack(side=tk.RIGHT)
+
         # 2) Sliders for various adjustments
         # We'll create a helper function for each labeled Scale
         self.make_slider(control_frame, "Brightness", self.brightness_var,
@@ -74,8 +118,14 @@ class PhotoEditor(tk.Tk):
         format_frame.pack(pady=5, fill=tk.X)
         rb_png = tk.Radiobutton(format_frame, text="PNG", variable=self.format_var, value="PNG")
         rb_jpg = tk.Radiobutton(format_frame, text="JPG", variable=self.format_var, value="JPEG")
+        rb_webp = tk.Radiobutton(format_frame, text="WebP", variable=self.format_var, value="WEBP")
+        rb_webp_lossless = tk.Radiobutton(format_frame, text="WebP (lossless)",
+                                          variable=self.format_var, value="WEBP_LOSSLESS")
         rb_png.pack(anchor="w")
         rb_jpg.pack(anchor="w")
+        rb_webp.pack(anchor="w")
+        rb_webp_lossless.pack(anchor="w")
+        tk.OptionMenu(format_frame, self.profile_var, *encoders.PROFILE_NAMES).pack(anchor="w")
         
         # 3) Button to save
         save_btn = tk.Button(control_frame, text="Save Image", command=self.save_image)
@@ -103,78 +153,156 @@ class PhotoEditor(tk.Tk):
             filetypes=[("Image Files", "*.png;*.jpg;*.jpeg;*.tiff;*.bmp;*.gif")]
         )
         if path:
+            from quick_image_edits import pixelcache
+
             self.img_path = path
             try:
-                self.original_image = Image.open(path).convert("RGB")
+                # Served from the decoded-pixel store when QUICK_IMAGE_EDITS_PIXEL_CACHE is set
+                with instrument.stage("decode"):
+                    self.original_image = pixelcache.open_rgb(path)
             except Exception as e:
                 messagebox.showerror("Error", f"Could not open image:\n{e}")
                 return
+            from quick_image_edits import adjust
+
+            self.proxy_image = self.make_proxy(self.original_image)
+            self.stats = adjust.PreviewStats(self.proxy_image)
+            # History and cached frames belong to the previous image
+            self.history.reset(self.adjustment_values())
+            self.frames.clear()
+            self.update_history_buttons()
             self.update_preview()
 
+    def make_proxy(self, image):
+        """'image' scaled down to PROXY_SIZE on its long side (the sliders preview on this)."""
+        from quick_image_edits.resample import fast_resize
+
+        w, h = image.size
+        scale = self.PROXY_SIZE / max(w, h)
+        if scale >= 1.0:
+            return image
+        with instrument.stage("proxy"):
+            return fast_resize(image, (max(1, round(w * scale)), max(1, round(h * scale))))
+
+    def adjustment_values(self):
+        """Current slider values, keyed like adjust.DEFAULTS."""
+        return {
+            "brightness": self.brightness_var.get(),
+            "exposure": self.exposure_var.get(),
+            "contrast": self.contrast_var.get(),
+            "highlights": self.highlights_var.get(),
+            "shadows": self.shadows_var.get(),
+            "saturation": self.saturation_var.get(),
+            "warmth": self.warmth_var.get(),
+            "tint": self.tint_var.get(),
+            "sharpness": self.sharpness_var.get(),
+        }
+
     def update_preview(self):
-        """Apply all adjustments to the original image and show the result on the canvas."""
+        """Apply all adjustments to the proxy image and show the result on the canvas."""
         if not self.original_image:
             return
-        
-        # Start with the original
-        edited = self.original_image.copy()
-        
-        # 1) Brightness
-        brightness_factor = self.brightness_var.get()
-        if brightness_factor != 1.0:
-            enhancer = ImageEnhance.Brightness(edited)
-            edited = enhancer.enhance(brightness_factor)
-        
-        # 2) Exposure (Gamma Correction)
-        # gamma < 1 => lighten midtones, gamma > 1 => darken midtones
-        gamma = self.exposure_var.get()
-        if abs(gamma - 1.0) > 0.001:
-            edited = self.apply_gamma(edited, gamma)
-
-        # 3) Contrast
-        contrast_factor = self.contrast_var.get()
-        if contrast_factor != 1.0:
-            enhancer = ImageEnhance.Contrast(edited)
-            edited = enhancer.enhance(contrast_factor)
-
-        # 4) Highlights
-        highlights_factor = self.highlights_var.get()
-        if abs(highlights_factor - 1.0) > 0.001:
-            edited = self.apply_highlights(edited, highlights_factor)
-
-        # 5) Shadows
-        shadows_factor = self.shadows_var.get()
-        if abs(shadows_factor - 1.0) > 0.001:
-            edited = self.apply_shadows(edited, shadows_factor)
-
-        # 6) Saturation
-        sat_factor = self.saturation_var.get()
-        if sat_factor != 1.0:
-            enhancer = ImageEnhance.Color(edited)
-            edited = enhancer.enhance(sat_factor)
-
-        # 7) Warmth
-        warmth_factor = self.warmth_var.get()
-        if abs(warmth_factor) > 0.001:
-            edited = self.apply_warmth(edited, warmth_factor)
-
-        # 8) Tint
-        tint_factor = self.tint_var.get()
-        if abs(tint_factor) > 0.001:
-            edited = self.apply_tint(edited, tint_factor)
-
-        # 9) Sharpness
-        sharp_factor = self.sharpness_var.get()
-        if sharp_factor != 1.0:
-            enhancer = ImageEnhance.Sharpness(edited)
-            edited = enhancer.enhance(sharp_factor)
-        
-        # Convert to ImageTk to display
-        self.preview_image = edited
-        self.display_image(self.preview_image)
+        self.render(self.adjustment_values())
+        # One undo step per pause in slider movement, not per drag event
+        if self._snapshot_job is not None:
+            self.after_cancel(self._snapshot_job)
+        self._snapshot_job = self.after(self.SNAPSHOT_DELAY_MS, self.take_snapshot)
+
+    def render(self, params):
+        """Show the proxy rendered with 'params' (from the frame cache if possible)."""
+        from quick_image_edits import adjust
+
+        with instrument.stage("update_preview"):
+            edited = self.frames.get(params)
+            if edited is None:
+                # Same chain the pipeline runner uses (quick_image_edits.adjust)
+                edited = adjust.apply_adjustments(self.proxy_image, params, self.stats)
+
+            # Convert to ImageTk to display
+            self.preview_image = edited
+            self.display_image(self.preview_image)
+            self.update_histogram(params, edited)
+        if self.stage_overlay is not None:
+            self.stage_overlay.refresh()
+
+    def update_histogram(self, params, edited):
+        """
+        Redraw the histogram of the preview. Tone sliders only change lookup
+        tables, so it is derived from cached histograms in O(256); after
+        saturation / sharpness changes it is counted on the rendered proxy.
+        """
+        from quick_image_edits import adjust
+
+        with instrument.stage("histogram"):
+            histograms = self.stats.histogram(params)
+            if histograms is None:
+                histograms = adjust.push_histogram(edited.histogram(),
+                                                   edited.convert("L").histogram(), None)
+        rgb, lum = histograms
+
+        height = self.HISTOGRAM_HEIGHT
+        # Scale to the tallest inner bin, so a clipped spike doesn't flatten the rest
+        peak = max(max(hist[1:255].max() for hist in rgb), lum[1:255].max(), 1.0)
+
+        def points(hist):
+            coords = []
+            for x, count in enumerate(hist):
+                coords += [x, height - min(count / peak, 1.0) * (height - 1)]
+            return coords
+
+        self.hist_canvas.delete("all")
+        self.hist_canvas.create_polygon([0, height] + points(lum) + [255, height],
+                                        fill="gray50", outline="")
+        for hist, color in zip(rgb, ("red", "green", "blue")):
+            self.hist_canvas.create_line(points(hist), fill=color)
+
+        shadows, highlights = adjust.clipping(rgb)
+        self.shadow_clip_label.config(text=f"Shadows: {shadows:.1%}",
+                                      fg="red" if shadows > self.CLIP_WARNING else "black")
+        self.highlight_clip_label.config(text=f"Highlights: {highlights:.1%}",
+                                         fg="red" if highlights > self.CLIP_WARNING else "black")
+
+    # =============== Undo / Redo ===============
+
+    def take_snapshot(self):
+        """Record the current slider values as an undo step (if they changed)."""
+        self._snapshot_job = None
+        params = self.adjustment_values()
+        if self.history.push(params):
+            self.frames.put(params, self.preview_image)
+        self.update_history_buttons()
+
+    def undo(self):
+        self.restore(self.history.undo)
+
+    def redo(self):
+        self.restore(self.history.redo)
+
+    def restore(self, step):
+        """Apply history.undo / history.redo: set the sliders and re-render."""
+        if self.original_image is None:
+            return
+        if self._snapshot_job is not None:
+            # Commit a pending slider change first, so it can be undone too
+            self.after_cancel(self._snapshot_job)
+            self.take_snapshot()
+        params = step()
+        if params is None:
+            return
+        for name, value in params.items():
+            getattr(self, f"{name}_var").set(value)
+        self.render(params)
+        self.frames.put(params, self.preview_image)
+        self.update_history_buttons()
+
+    def update_history_buttons(self):
+        self.undo_btn.config(state=tk.NORMAL if self.history.can_undo else tk.DISABLED)
+        self.redo_btn.config(state=tk.NORMAL if self.history.can_redo else tk.DISABLED)
 
     def display_image(self, pil_image):
         """Display the given PIL image on the canvas (resizing if needed)."""
+        from PIL import Image, ImageTk
+
         # Fit to the canvas size if needed
         canvas_w = self.canvas.winfo_width()
         canvas_h = self.canvas.winfo_height()
@@ -188,154 +316,31 @@ class PhotoEditor(tk.Tk):
         if scale < 1.0:
             new_w = int(img_w * scale)
             new_h = int(img_h * scale)
-            display_img = pil_image.resize((new_w, new_h), Image.LANCZOS)
+            with instrument.stage("resize"):
+                display_img = pil_image.resize((new_w, new_h), Image.LANCZOS)
         else:
             display_img = pil_image
         
-        self.tk_preview = ImageTk.PhotoImage(display_img)
+        with instrument.stage("PhotoImage"):
+            self.tk_preview = ImageTk.PhotoImage(display_img)
         self.canvas.delete("all")
         # Center the image on the canvas
         cx = canvas_w // 2
         cy = canvas_h // 2
         self.canvas.create_image(cx, cy, image=self.tk_preview, anchor="center")
 
-    # =============== Custom Adjustment Helpers ===============
-
-    @staticmethod
-    def apply_gamma(image, gamma):
-        """Apply gamma correction to a PIL image. gamma < 1 => lighten, gamma > 1 => darken."""
-        # Build a lookup table
-        lut = []
-        for i in range(256):
-            # normalized value = i/255
-            # gamma correction => out = (normalized**(1/gamma))*255
-            v = int((i / 255.0) ** (1.0 / gamma) * 255.0)
-            lut.append(v)
-        return image.point(lut*3)  # for R, G, B
-
-    @staticmethod
-    def apply_highlights(image, factor):
-        """
-        Simplistic highlight compression/expansion:
-        For bright pixels, push them toward or away from white.
-        
-        factor > 1 => we are brightening highlights
-        factor < 1 => we are darkening highlights
-        This is a naive approach using a 'curve'.
-        """
-        # Let "threshold" define what we consider "highlights." 
-        # For a 0-255 range, let's say above ~180 is highlight.
-        threshold = 180
-        
-        lut = []
-        for i in range(256):
-            if i < threshold:
-                # below threshold, leave as is
-                lut.append(i)
-            else:
-                # above threshold, move i toward white or toward threshold
-                # new_i = threshold + (i - threshold)*factor
-                # But let's clamp to 255
-                new_i = threshold + (i - threshold) * factor
-                new_i = max(0, min(255, new_i))
-                lut.append(int(new_i))
-        
-        return image.point(lut*3)
-
-    @staticmethod
-    def apply_shadows(image, factor):
-        """
-        Simplistic shadow lift/crush:
-        For dark pixels, push them up or down.
-        
-        factor > 1 => lighten shadows
-        factor < 1 => darken shadows
-        """
-        # Let's define shadow range below 75
-        threshold = 75
-        
-        lut = []
-        for i in range(256):
-            if i > threshold:
-                # above threshold, leave as is
-                lut.append(i)
-            else:
-                # below threshold, move i toward 0 or up
-                # new_i = i * factor if factor < 1 => crush
-                # or i + (threshold - i)*(factor-1) if factor>1 => lift
-                # For simplicity:
-                new_i = i * factor
-                new_i = max(0, min(255, new_i))
-                lut.append(int(new_i))
-        
-        return image.point(lut*3)
-
-    @staticmethod
-    def apply_warmth(image, factor):
-        """
-        Shift color balance to add more red/yellow or reduce them. 
-        factor > 0 => warmer (slightly raise R, lower B)
-        factor < 0 => cooler (lower R, raise B)
-        This is an approximation.
-        """
-        # We'll do a direct pixel iteration. For speed, we could do .point,
-        # but let's illustrate a simple approach. This can be slow for large images.
-        # A factor ~ +1 means strong warmth, -1 means strong cool.
-        # We'll clamp factor to about ±1 for demonstration.
-
-        import numpy as np
-        
-        arr = np.array(image, dtype=np.float32)
-        # arr.shape => (h, w, 3)
-        
-        # We'll do a simple approach:
-        # R' = R + factor*X
-        # B' = B - factor*X
-        # where X is some portion of the original channel or a constant
-        # Let's base it on the original average intensity:
-        # Something small so as not to blow out the image.
-        X = 30.0  # tweak as you like
-        # If factor = 1 => add 30 to R channel, subtract 30 from B channel
-        # If factor = -1 => subtract 30 from R channel, add 30 to B channel
-        
-        arr[..., 0] += factor * X    # R channel
-        arr[..., 2] -= factor * X    # B channel
-        
-        # clamp
-        arr = np.clip(arr, 0, 255)
-        return Image.fromarray(arr.astype(np.uint8), mode="RGB")
-
-    @staticmethod
-    def apply_tint(image, factor):
-        """
-        Shift color balance to add green/magenta.
-        factor > 0 => more green
-        factor < 0 => more magenta
-        Another naive approach.
-        """
-        import numpy as np
-        
-        arr = np.array(image, dtype=np.float32)
-        
-        X = 30.0
-        # G' = G + factor*X
-        # R'/B' = R/B - factor*(X/2) maybe, to shift color distinctly
-        arr[..., 1] += factor * X   # G channel
-        arr[..., 0] -= factor * (X/2)  # R
-        arr[..., 2] -= factor * (X/2)  # B
-        
-        arr = np.clip(arr, 0, 255)
-        return Image.fromarray(arr.astype(np.uint8), mode="RGB")
-
     def save_image(self):
-        """Save the edited image to disk in the selected format (PNG or JPEG)."""
+        """Save the edited image to disk in the selected format and encoder profile."""
         if not self.preview_image:
             messagebox.showwarning("No Image", "Please open and adjust an image first.")
             return
         
         # Ask the user for a save location
-        extension = ".png" if self.format_var.get() == "PNG" else ".jpg"
-        filetypes = [("PNG File", "*.png")] if extension == ".png" else [("JPEG File", "*.jpg")]
+        save_format = self.format_var.get()
+        extension = encoders.extension_for(save_format)
+        filetypes = {".png": [("PNG File", "*.png")],
+                     ".jpg": [("JPEG File", "*.jpg")],
+                     ".webp": [("WebP File", "*.webp")]}[extension]
         save_path = filedialog.asksaveasfilename(
             defaultextension=extension,
             filetypes=filetypes,
@@ -344,15 +349,22 @@ class PhotoEditor(tk.Tk):
         if not save_path:
             return  # user canceled
         
+        from quick_image_edits import adjust
+
         try:
-            # PIL wants "PNG" or "JPEG" as format
-            self.preview_image.save(save_path, self.format_var.get())
+            # The preview is the proxy; the saved file is rendered at full resolution
+            with instrument.stage("render"):
+                edited = adjust.apply_adjustments(self.original_image, self.adjustment_values())
+            with instrument.stage("encode"):
+                encoders.save_image(edited, save_path, save_format, self.profile_var.get())
             messagebox.showinfo("Success", f"Image saved as:\n{save_path}")
         except Exception as e:
             messagebox.showerror("Error", f"Could not save image:\n{e}")
 
 def main():
     app = PhotoEditor()
+    # Load Pillow / NumPy in the background once the window is up
+    app.after_idle(preload, "PIL.ImageTk", "quick_image_edits.adjust")
     app.mainloop()
 
 if __name__ == "__main__":
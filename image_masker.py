@@ -1,10 +1,18 @@
+import math
 import tkinter as tk
 from tkinter import filedialog
-from PIL import Image, ImageTk
-import cv2
-import numpy as np
+
+from quick_image_edits import encoders, instrument, stage_overlay
+from quick_image_edits.history import Stroke, StrokeHistory
+from quick_image_edits.lazy import preload
+
+# OpenCV, NumPy and Pillow are imported inside the methods that use them,
+# so the window appears before they are loaded (see main())
 
 class ColorMaskGUI:
+    UPDATE_DELAY_MS = 60   # Slider pause before the full-resolution re-mask
+    TILE_SIZE = 256        # The display is drawn as tiles this big, so a brush redraws few
+
     def __init__(self, master):
         self.master = master
         self.master.title("HSV Color Masking")
@@ -20,8 +28,28 @@ class ColorMaskGUI:
         # True means "remove" => turned white in final.
         self.user_removed_mask = None
 
+        # Range mask before the user's erasing (uint8, 255 = keep), so a brush
+        # stroke only has to recomposite the rectangle it touched
+        self.color_mask = None
+
+        # Brush strokes on user_removed_mask, undone as sparse deltas
+        self.strokes = StrokeHistory()
+        self._stroke = None        # Stroke being painted
+        self._last_point = None    # Image coordinates of the previous drag event
+
+        # original_img converted to HSV once (every re-mask works on it)
+        self.hsv_img = None
+
+        # HSV histogram index of original_img (coverage counts, threshold suggestions)
+        self.hsv_index = None
+
+        # Stored (lower, upper, include) ranges, masked together with the slider box
+        self.ranges = []
+        self._update_job = None
+
         # For displaying (zooming on the canvas)
-        self.tk_img = None            # The Tkinter image (scaled) for display
+        self.display_rgb = None       # final_masked_img scaled for display (RGB)
+        self.tiles = {}               # (x, y) of a tile -> [PhotoImage, canvas item]
         self.scale_factor = 1.0       # How much we are zooming on the canvas
 
         # HSV threshold trackbar variables
@@ -31,6 +59,11 @@ class ColorMaskGUI:
         self.h_max = tk.IntVar(value=179)
         self.s_max = tk.IntVar(value=255)
         self.v_max = tk.IntVar(value=255)
+        self.exclude_var = tk.BooleanVar(value=False)   # Slider box removes instead of keeps
+
+        # Right-drag brush: radius in screen pixels, and whether it erases or restores
+        self.brush_radius = tk.IntVar(value=5)
+        self.brush_mode = tk.StringVar(value="erase")
 
         # GUI Layout ------------------------------------------------------------
         # Frame for buttons
@@ -44,6 +77,19 @@ class ColorMaskGUI:
                                   command=self.save_image, state=tk.DISABLED)
         self.save_btn.grid(row=0, column=1, padx=5)
 
+        # Encoder profile used when saving
+        self.profile_var = tk.StringVar(value=encoders.DEFAULT_PROFILE)
+        tk.OptionMenu(btn_frame, self.profile_var, *encoders.PROFILE_NAMES).grid(row=0, column=2, padx=5)
+
+        self.undo_btn = tk.Button(btn_frame, text="Undo Stroke", command=self.undo_stroke,
+                                  state=tk.DISABLED)
+        self.undo_btn.grid(row=0, column=3, padx=5)
+        self.redo_btn = tk.Button(btn_frame, text="Redo Stroke", command=self.redo_stroke,
+                                  state=tk.DISABLED)
+        self.redo_btn.grid(row=0, column=4, padx=5)
+        self.master.bind("<Control-z>", lambda e: self.undo_stroke())
+        self.master.bind("<Control-y>", lambda e: self.redo_stroke())
+
         # Frame for sliders
         sliders_frame = tk.LabelFrame(self.master, text="HSV Thresholds")
         sliders_frame.pack(padx=5, pady=5, fill="x")
@@ -51,40 +97,73 @@ class ColorMaskGUI:
         # Row 0: HMin and HMax
         tk.Label(sliders_frame, text="HMin").grid(row=0, column=0, padx=5, pady=2)
         tk.Scale(sliders_frame, from_=0, to=179, orient=tk.HORIZONTAL, variable=self.h_min,
-                 command=lambda x: self.update_image()).grid(row=0, column=1, sticky="we")
+                 command=lambda x: self.on_threshold_change()).grid(row=0, column=1, sticky="we")
 
         tk.Label(sliders_frame, text="HMax").grid(row=0, column=2, padx=5, pady=2)
         tk.Scale(sliders_frame, from_=0, to=179, orient=tk.HORIZONTAL, variable=self.h_max,
-                 command=lambda x: self.update_image()).grid(row=0, column=3, sticky="we")
+                 command=lambda x: self.on_threshold_change()).grid(row=0, column=3, sticky="we")
 
         # Row 1: SMin and SMax
         tk.Label(sliders_frame, text="SMin").grid(row=1, column=0, padx=5, pady=2)
         tk.Scale(sliders_frame, from_=0, to=255, orient=tk.HORIZONTAL, variable=self.s_min,
-                 command=lambda x: self.update_image()).grid(row=1, column=1, sticky="we")
+                 command=lambda x: self.on_threshold_change()).grid(row=1, column=1, sticky="we")
 
         tk.Label(sliders_frame, text="SMax").grid(row=1, column=2, padx=5, pady=2)
         tk.Scale(sliders_frame, from_=0, to=255, orient=tk.HORIZONTAL, variable=self.s_max,
-                 command=lambda x: self.update_image()).grid(row=1, column=3, sticky="we")
+                 command=lambda x: self.on_threshold_change()).grid(row=1, column=3, sticky="we")
 
         # Row 2: VMin and VMax
         tk.Label(sliders_frame, text="VMin").grid(row=2, column=0, padx=5, pady=2)
         tk.Scale(sliders_frame, from_=0, to=255, orient=tk.HORIZONTAL, variable=self.v_min,
-                 command=lambda x: self.update_image()).grid(row=2, column=1, sticky="we")
+                 command=lambda x: self.on_threshold_change()).grid(row=2, column=1, sticky="we")
 
         tk.Label(sliders_frame, text="VMax").grid(row=2, column=2, padx=5, pady=2)
         tk.Scale(sliders_frame, from_=0, to=255, orient=tk.HORIZONTAL, variable=self.v_max,
-                 command=lambda x: self.update_image()).grid(row=2, column=3, sticky="we")
+                 command=lambda x: self.on_threshold_change()).grid(row=2, column=3, sticky="we")
+
+        # Row 3: share of the image inside the box (from the histogram index)
+        self.coverage_label = tk.Label(sliders_frame, text="Coverage: -")
+        self.coverage_label.grid(row=3, column=0, columnspan=4, sticky="w", padx=5)
 
         for i in range(4):
             sliders_frame.columnconfigure(i, weight=1)
 
+        # Several ranges at once: the slider box plus the stored ones
+        # (HMin > HMax wraps around, e.g. 170-10 for reds)
+        ranges_frame = tk.LabelFrame(self.master, text="Ranges (HMin > HMax wraps through red)")
+        ranges_frame.pack(padx=5, pady=5, fill="x")
+        tk.Checkbutton(ranges_frame, text="Exclude", variable=self.exclude_var,
+                       command=self.on_threshold_change).grid(row=0, column=0, padx=5, sticky="w")
+        tk.Button(ranges_frame, text="Add Range", command=self.add_range).grid(row=1, column=0, padx=5, sticky="we")
+        tk.Button(ranges_frame, text="Remove", command=self.remove_range).grid(row=2, column=0, padx=5, sticky="we")
+        tk.Button(ranges_frame, text="Clear", command=self.clear_ranges).grid(row=3, column=0, padx=5, sticky="we")
+        self.ranges_list = tk.Listbox(ranges_frame, height=4)
+        self.ranges_list.grid(row=0, column=1, rowspan=4, padx=5, pady=2, sticky="nswe")
+        ranges_frame.columnconfigure(1, weight=1)
+
+        # Brush for right-drag: erase pixels, or restore erased ones
+        brush_frame = tk.LabelFrame(self.master, text="Brush (right-drag)")
+        brush_frame.pack(padx=5, pady=5, fill="x")
+        tk.Radiobutton(brush_frame, text="Erase", variable=self.brush_mode,
+                       value="erase").pack(side=tk.LEFT, padx=5)
+        tk.Radiobutton(brush_frame, text="Restore", variable=self.brush_mode,
+                       value="restore").pack(side=tk.LEFT, padx=5)
+        tk.Label(brush_frame, text="Radius").pack(side=tk.LEFT, padx=5)
+        tk.Scale(brush_frame, from_=1, to=100, orient=tk.HORIZONTAL,
+                 variable=self.brush_radius).pack(side=tk.LEFT, fill="x", expand=True)
+
         # Canvas to display the image
         self.canvas = tk.Canvas(self.master, bg="gray", width=640, height=480)
         self.canvas.pack(padx=5, pady=5)
 
+        # Per-stage timings (only with QUICK_IMAGE_EDITS_TRACE set)
+        self.stage_overlay = stage_overlay.attach(self.master, fill="x")
+
         # Mouse bindings
         self.canvas.bind("<Button-1>", self.on_left_click)      # Pick HSV
-        self.canvas.bind("<Button-3>", self.on_right_click)     # Erase undesired pixel area
+        self.canvas.bind("<Button-3>", self.on_brush_press)     # Erase / restore a stroke
+        self.canvas.bind("<B3-Motion>", self.on_brush_drag)
+        self.canvas.bind("<ButtonRelease-3>", self.on_brush_release)
         self.canvas.bind("<MouseWheel>", self.on_mouse_wheel)   # Zoom with CTRL + wheel
 
     def open_image(self):
@@ -95,13 +174,27 @@ class ColorMaskGUI:
                       ("All Files", "*.*")]
         filename = filedialog.askopenfilename(title="Select an image", filetypes=file_types)
         if filename:
-            self.original_img = cv2.imread(filename)  # BGR, full resolution
+            import numpy as np
+            from quick_image_edits import masking, pixelcache
+            from quick_image_edits.hsvindex import HSVIndex
+
+            # BGR, full resolution (cv2.imread, or memory-mapped from the
+            # decoded-pixel store when QUICK_IMAGE_EDITS_PIXEL_CACHE is set)
+            with instrument.stage("decode"):
+                self.original_img = pixelcache.imread(filename)
             if self.original_img is None:
                 return
 
             # Initialize the user_removed_mask to same shape (single channel)
             h, w = self.original_img.shape[:2]
             self.user_removed_mask = np.zeros((h, w), dtype=bool)
+            self.strokes.reset()
+            self.update_stroke_buttons()
+
+            # Convert once; slider changes only re-run the range lookups
+            self.hsv_img = masking.to_hsv(self.original_img)
+            # One pass now makes every later coverage query O(1)
+            self.hsv_index = HSVIndex.from_hsv(self.hsv_img)
 
             # Reset zoom
             self.scale_factor = 1.0
@@ -120,21 +213,95 @@ class ColorMaskGUI:
 
         save_path = filedialog.asksaveasfilename(
             defaultextension=".png",
-            filetypes=[("PNG files", "*.png"), ("JPEG files", "*.jpg"), ("All files", "*.*")]
+            filetypes=[("PNG files", "*.png"), ("JPEG files", "*.jpg"), ("WebP files", "*.webp"),
+                       ("All files", "*.*")]
         )
         if save_path:
-            cv2.imwrite(save_path, self.final_masked_img)
+            import cv2
+
+            # Encoder settings follow the chosen profile (format comes from the extension)
+            save_format = encoders.format_for_path(save_path)
+            params = encoders.cv2_imwrite_params(save_format, self.profile_var.get()) if save_format else []
+            with instrument.stage("encode"):
+                cv2.imwrite(save_path, self.final_masked_img, params)
             print(f"Saved masked image to: {save_path}")
 
+    def thresholds(self):
+        """Current ((hMin, sMin, vMin), (hMax, sMax, vMax)) slider values."""
+        return ((self.h_min.get(), self.s_min.get(), self.v_min.get()),
+                (self.h_max.get(), self.s_max.get(), self.v_max.get()))
+
+    def on_threshold_change(self):
+        """
+        Slider moved: show the coverage right away (histogram index, O(1)),
+        and re-mask the full-resolution image once the slider pauses.
+        """
+        if self.original_img is None:
+            return
+        self.update_coverage()
+        if self._update_job is not None:
+            self.master.after_cancel(self._update_job)
+        self._update_job = self.master.after(self.UPDATE_DELAY_MS, self.update_image)
+
+    def mask_ranges(self):
+        """Stored ranges plus the slider box, as masking.range_mask() takes them."""
+        lower, upper = self.thresholds()
+        return self.ranges + [(lower, upper, not self.exclude_var.get())]
+
+    def add_range(self):
+        """Store the slider box (keep or exclude) so the sliders can pick another one."""
+        from quick_image_edits.masking import MAX_RANGES
+
+        if len(self.ranges) + 1 >= MAX_RANGES:
+            print(f"At most {MAX_RANGES} ranges (including the slider box)")
+            return
+        lower, upper = self.thresholds()
+        include = not self.exclude_var.get()
+        self.ranges.append((lower, upper, include))
+        self.ranges_list.insert(tk.END, f"{'+' if include else '-'} H {lower[0]}-{upper[0]}  "
+                                        f"S {lower[1]}-{upper[1]}  V {lower[2]}-{upper[2]}")
+        self.update_image()
+
+    def remove_range(self):
+        for index in reversed(self.ranges_list.curselection()):
+            self.ranges_list.delete(index)
+            del self.ranges[index]
+        self.update_image()
+
+    def clear_ranges(self):
+        self.ranges_list.delete(0, tk.END)
+        self.ranges.clear()
+        self.update_image()
+
+    def update_coverage(self, selected=None):
+        """
+        Share of the image in the slider box (histogram index, O(1)) and,
+        after a full re-mask, of the pixels actually kept ('selected').
+        """
+        lower, upper = self.thresholds()
+        count = self.hsv_index.count(lower, upper)
+        share = count / self.hsv_index.total if self.hsv_index.total else 0.0
+        text = f"Coverage: box {share:.1%} ({count:,} px)"
+        if selected is not None:
+            text += f", kept {selected:.1%}"
+        self.coverage_label.config(text=text)
+
     def update_image(self):
         """
-        1) Compute the color mask on the *full-resolution* image based on slider HSV.
+        1) Compute the color mask on the *full-resolution* image based on the
+           slider HSV box and the stored ranges (one lookup pass over hsv_img).
         2) Apply user_removed_mask (erase) on top of that mask.
         3) Generate a final masked image with white background.
         4) Update the canvas display with a scaled version.
         """
         if self.original_img is None:
             return
+        if self._update_job is not None:
+            # Rendered now; drop the pending slider re-mask
+            self.master.after_cancel(self._update_job)
+            self._update_job = None
+        import cv2
+        from quick_image_edits import masking
 
         # Current HSV thresholds
         h_min = self.h_min.get()
@@ -144,31 +311,23 @@ class ColorMaskGUI:
         s_max = self.s_max.get()
         v_max = self.v_max.get()
 
-        # Convert to HSV (full resolution)
-        hsv = cv2.cvtColor(self.original_img, cv2.COLOR_BGR2HSV)
-
-        # Create the mask
-        lower = np.array([h_min, s_min, v_min], dtype=np.uint8)
-        upper = np.array([h_max, s_max, v_max], dtype=np.uint8)
-        color_mask = cv2.inRange(hsv, lower, upper)
-
-        # Combine with user_removed_mask (any pixel the user erased is forced to 0)
-        # user_removed_mask is boolean => convert to uint8 for bitwise
-        user_removed_mask_uint8 = self.user_removed_mask.astype(np.uint8)
-        # final_mask = color_mask & ~ (user_removed_mask_uint8)
-        # But we need to invert user_removed_mask_uint8: 1 => remove, 0 => keep
-        inverted_removed = cv2.bitwise_not(user_removed_mask_uint8)  # 1 => keep, 0 => remove
-        final_mask = cv2.bitwise_and(color_mask, inverted_removed)
-
-        # The masked image (BGR)
-        masked_img = cv2.bitwise_and(self.original_img, self.original_img, mask=final_mask)
+        with instrument.stage("update_image"):
+            # Mask on the full-resolution image (shared with the pipeline
+            # runner), kept before erasing so brush strokes can reuse it;
+            # pixels the user erased are always removed
+            self.color_mask = masking.range_mask(self.hsv_img, self.mask_ranges())
+            final_mask = self.color_mask.copy()
+            with instrument.stage("erase"):
+                final_mask[self.user_removed_mask] = 0
 
-        # Convert any pixel not in mask to white
-        white_bg = np.ones_like(self.original_img, dtype=np.uint8) * 255
-        self.final_masked_img = np.where(masked_img == 0, white_bg, masked_img)
+            # Convert any pixel not in mask to white
+            self.final_masked_img = masking.white_background(self.original_img, final_mask)
 
-        # Show scaled version on the canvas
-        self.show_on_canvas()
+            # Show scaled version on the canvas
+            self.show_on_canvas()
+        self.update_coverage(cv2.countNonZero(final_mask) / final_mask.size)
+        if self.stage_overlay is not None:
+            self.stage_overlay.refresh()
 
         # Print HSV range
         print(f"(hMin = {h_min}, sMin = {s_min}, vMin = {v_min}), "
@@ -187,26 +346,92 @@ class ColorMaskGUI:
 
         if new_w < 1 or new_h < 1:
             return  # Avoid degenerate scaling
+        import cv2
 
         # Resize the full-res final_masked_img for display
-        resized_bgr = cv2.resize(self.final_masked_img, (new_w, new_h), interpolation=cv2.INTER_AREA)
+        with instrument.stage("resize"):
+            resized_bgr = cv2.resize(self.final_masked_img, (new_w, new_h),
+                                     interpolation=cv2.INTER_AREA)
 
         # Convert BGR -> RGB for PIL
-        display_rgb = cv2.cvtColor(resized_bgr, cv2.COLOR_BGR2RGB)
-        pil_img = Image.fromarray(display_rgb)
-        self.tk_img = ImageTk.PhotoImage(image=pil_img)
+        with instrument.stage("toRGB"):
+            self.display_rgb = cv2.cvtColor(resized_bgr, cv2.COLOR_BGR2RGB)
 
         # Resize the canvas to match new display size (optional)
         self.canvas.config(width=new_w, height=new_h)
         # Clear old items
         self.canvas.delete("all")
+        self.tiles = {}
         # Draw
-        self.canvas.create_image(0, 0, anchor="nw", image=self.tk_img)
+        with instrument.stage("PhotoImage"):
+            for y in range(0, new_h, self.TILE_SIZE):
+                for x in range(0, new_w, self.TILE_SIZE):
+                    self.draw_tile(x, y)
+
+    def draw_tile(self, x, y):
+        """(Re)draw the display tile whose top-left corner is (x, y)."""
+        from PIL import Image, ImageTk
+
+        pixels = self.display_rgb[y:y + self.TILE_SIZE, x:x + self.TILE_SIZE]
+        photo = ImageTk.PhotoImage(image=Image.fromarray(pixels))
+        tile = self.tiles.get((x, y))
+        if tile is None:
+            item = self.canvas.create_image(x, y, anchor="nw", image=photo)
+            self.tiles[(x, y)] = [photo, item]
+        else:
+            # Keep a reference, or Tk shows an empty tile
+            tile[0] = photo
+            self.canvas.itemconfig(tile[1], image=photo)
+
+    def update_region(self, box):
+        """
+        Recomposite and redraw only the image rectangle 'box' (top, bottom,
+        left, right) after user_removed_mask changed inside it.
+        """
+        import cv2
+        from quick_image_edits import masking
+
+        top, bottom, left, right = box
+        with instrument.stage("erase"):
+            mask = self.color_mask[top:bottom, left:right].copy()
+            mask[self.user_removed_mask[top:bottom, left:right]] = 0
+        self.final_masked_img[top:bottom, left:right] = masking.white_background(
+            self.original_img[top:bottom, left:right], mask)
+        if self.display_rgb is None:
+            return
+
+        # The display pixels covering the box, and the image pixels they come from
+        # (the scale show_on_canvas actually resized with, per axis)
+        disp_h, disp_w = self.display_rgb.shape[:2]
+        img_h, img_w = self.final_masked_img.shape[:2]
+        scale_y, scale_x = disp_h / img_h, disp_w / img_w
+        d_top, d_left = int(top * scale_y), int(left * scale_x)
+        d_bottom = min(disp_h, math.ceil(bottom * scale_y))
+        d_right = min(disp_w, math.ceil(right * scale_x))
+        if d_bottom <= d_top or d_right <= d_left:
+            return
+        s_top, s_left = int(d_top / scale_y), int(d_left / scale_x)
+        s_bottom = min(img_h, max(s_top + 1, math.ceil(d_bottom / scale_y)))
+        s_right = min(img_w, max(s_left + 1, math.ceil(d_right / scale_x)))
+        with instrument.stage("resize"):
+            patch = cv2.resize(self.final_masked_img[s_top:s_bottom, s_left:s_right],
+                               (d_right - d_left, d_bottom - d_top), interpolation=cv2.INTER_AREA)
+        with instrument.stage("toRGB"):
+            self.display_rgb[d_top:d_bottom, d_left:d_right] = cv2.cvtColor(patch, cv2.COLOR_BGR2RGB)
+
+        size = self.TILE_SIZE
+        with instrument.stage("PhotoImage"):
+            for y in range(d_top // size * size, d_bottom, size):
+                for x in range(d_left // size * size, d_right, size):
+                    self.draw_tile(x, y)
+        if self.stage_overlay is not None:
+            self.stage_overlay.refresh()
 
     def on_left_click(self, event):
         """
-        Left-click => pick HSV from the clicked pixel in final_masked_img.
-        We will re-threshold around the pixel's HSV (± some margin).
+        Left-click => pick HSV from the clicked pixel of the original image.
+        We will re-threshold around the pixel's HSV: the box the colour's
+        cluster spans in the histogram index (suggest()).
         """
         if self.final_masked_img is None:
             return
@@ -215,24 +440,20 @@ class ColorMaskGUI:
         x_in_img = int(event.x / self.scale_factor)
         y_in_img = int(event.y / self.scale_factor)
 
-        H, W = self.final_masked_img.shape[:2]
+        H, W = self.original_img.shape[:2]
         if x_in_img < 0 or x_in_img >= W or y_in_img < 0 or y_in_img >= H:
             return  # click out of bounds
 
-        # final_masked_img is BGR. Let's get that pixel
-        b, g, r = self.final_masked_img[y_in_img, x_in_img]
+        import cv2
+        import numpy as np
+
+        # original_img is BGR (final_masked_img has removed pixels painted white)
+        b, g, r = self.original_img[y_in_img, x_in_img]
         pixel_bgr = np.array([[[b, g, r]]], dtype=np.uint8)
         pixel_hsv = cv2.cvtColor(pixel_bgr, cv2.COLOR_BGR2HSV)[0][0]
-        h_val, s_val, v_val = pixel_hsv
 
-        # We pick a small range around that pixel's HSV
-        dh, ds, dv = 10, 25, 25  # margins
-        h_min = max(h_val - dh, 0)
-        h_max = min(h_val + dh, 179)
-        s_min = max(s_val - ds, 0)
-        s_max = min(s_val + ds, 255)
-        v_min = max(v_val - dv, 0)
-        v_max = min(v_val + dv, 255)
+        # Grow the box over the colour's cluster in the histogram
+        (h_min, s_min, v_min), (h_max, s_max, v_max) = self.hsv_index.suggest(pixel_hsv)
 
         # Update the sliders
         self.h_min.set(h_min)
@@ -245,33 +466,93 @@ class ColorMaskGUI:
         # Re-apply masking with new ranges
         self.update_image()
 
-    def on_right_click(self, event):
+    # ---------------------------------------------------------------- Brush
+
+    def on_brush_press(self, event):
         """
-        Right-click => erase (remove) a small region around the clicked pixel
-        in the user_removed_mask. This forces the final image to show white in that region.
+        Right button down => start a stroke that erases (removes) pixels, or
+        restores erased ones, in user_removed_mask while the mouse drags.
         """
         if self.final_masked_img is None:
             return
+        self._stroke = Stroke(self.brush_mode.get() == "erase")
+        self._last_point = self.image_point(event)
+        self.paint(self._last_point, self._last_point)
 
-        # Map canvas coords back to original-image coords
-        x_in_img = int(event.x / self.scale_factor)
-        y_in_img = int(event.y / self.scale_factor)
+    def on_brush_drag(self, event):
+        if self._stroke is None:
+            return
+        point = self.image_point(event)
+        # Paint the segment since the last event, so fast drags leave no gaps
+        self.paint(self._last_point, point)
+        self._last_point = point
+
+    def on_brush_release(self, event):
+        if self._stroke is None:
+            return
+        self.strokes.push(self._stroke)
+        self._stroke = None
+        self.update_stroke_buttons()
+
+    def image_point(self, event):
+        """Canvas event coordinates -> original-image coordinates."""
+        return int(event.x / self.scale_factor), int(event.y / self.scale_factor)
+
+    def paint(self, start, end):
+        """
+        Set user_removed_mask to the stroke's value along the segment
+        start-end (brush radius in screen pixels), then redraw only the
+        touched rectangle. The pixels that flipped are recorded for undo.
+        """
+        import cv2
+        import numpy as np
 
         H, W = self.user_removed_mask.shape
-        if x_in_img < 0 or x_in_img >= W or y_in_img < 0 or y_in_img >= H:
+        radius = max(1, round(self.brush_radius.get() / self.scale_factor))
+        top = max(0, min(start[1], end[1]) - radius)
+        bottom = min(H, max(start[1], end[1]) + radius + 1)
+        left = max(0, min(start[0], end[0]) - radius)
+        right = min(W, max(start[0], end[0]) + radius + 1)
+        if bottom <= top or right <= left:
             return  # Out of bounds
 
-        # Erase a small circle (radius = 5)
-        erase_radius = 5
-        # Draw into user_removed_mask (boolean) => True means "remove"
-        # Using OpenCV circle for convenience
-        # Convert mask to uint8 for cv2.circle, then convert back
-        tmp_mask = (self.user_removed_mask * 255).astype(np.uint8)
-        cv2.circle(tmp_mask, (x_in_img, y_in_img), erase_radius, 255, -1)
-        self.user_removed_mask = (tmp_mask > 0)
+        # Brush footprint within the rectangle (filled circles joined by a thick line)
+        footprint = np.zeros((bottom - top, right - left), dtype=np.uint8)
+        p0 = (start[0] - left, start[1] - top)
+        p1 = (end[0] - left, end[1] - top)
+        cv2.circle(footprint, p0, radius, 1, -1)
+        cv2.circle(footprint, p1, radius, 1, -1)
+        cv2.line(footprint, p0, p1, 1, 2 * radius + 1)
+
+        region = self.user_removed_mask[top:bottom, left:right]
+        value = self._stroke.value
+        changed = footprint.astype(bool) & (region != value)
+        if not changed.any():
+            return
+        region[changed] = value
+        rows, cols = np.nonzero(changed)
+        self._stroke.record((rows + top) * W + (cols + left), (top, bottom, left, right))
+        self.update_region((top, bottom, left, right))
 
-        # Re-apply the mask
-        self.update_image()
+    def undo_stroke(self):
+        if self.user_removed_mask is None:
+            return
+        box = self.strokes.undo(self.user_removed_mask)
+        if box is not None:
+            self.update_region(box)
+        self.update_stroke_buttons()
+
+    def redo_stroke(self):
+        if self.user_removed_mask is None:
+            return
+        box = self.strokes.redo(self.user_removed_mask)
+        if box is not None:
+            self.update_region(box)
+        self.update_stroke_buttons()
+
+    def update_stroke_buttons(self):
+        self.undo_btn.config(state=tk.NORMAL if self.strokes.can_undo else tk.DISABLED)
+        self.redo_btn.config(state=tk.NORMAL if self.strokes.can_redo else tk.DISABLED)
 
     def on_mouse_wheel(self, event):
         """
@@ -294,6 +575,9 @@ class ColorMaskGUI:
 def main():
     root = tk.Tk()
     app = ColorMaskGUI(root)
+    # Load OpenCV / NumPy / Pillow in the background once the window is up
+    root.after_idle(preload, "cv2", "quick_image_edits.masking", "quick_image_edits.hsvindex",
+                    "PIL.ImageTk")
     root.mainloop()
 
 if __name__ == "__main__":
@@ -1,5 +1,7 @@
 import cv2
-import numpy as np
+
+from quick_image_edits import instrument
+from quick_image_edits.homography import find_homography, warp_onto
 
 # Global variables to store selected points
 points_img1 = []
@@ -21,7 +23,8 @@ def get_points_from_image(image_path, window_name):
     Returns a list of (x, y) points.
     """
     # Read the image
-    img = cv2.imread(image_path)
+    with instrument.stage("decode"):
+        img = cv2.imread(image_path)
     if img is None:
         raise ValueError(f"Could not load image: {image_path}")
 
@@ -72,17 +75,9 @@ def main():
     # Step 2: Select points on the second image
     points_img2 = get_points_from_image(image_path_2, "Image 2")
 
-    # Make sure both lists have the same length
-    if len(points_img1) != len(points_img2):
-        raise ValueError("Number of points selected in Image 1 and Image 2 do not match!")
-
-    # Convert to NumPy arrays of shape (N, 1, 2)
-    pts1 = np.array(points_img1, dtype=np.float32).reshape(-1, 1, 2)
-    pts2 = np.array(points_img2, dtype=np.float32).reshape(-1, 1, 2)
-
-    # Compute the Homography matrix
-    # Method could be 0 (least-squares) or cv2.RANSAC or cv2.LMEDS
-    H, mask = cv2.findHomography(pts1, pts2, cv2.RANSAC, 5.0)
+    # Compute the Homography matrix (checks that both lists have the same length)
+    # Method could be "least_squares", "ransac" or "lmeds"
+    H = find_homography(points_img1, points_img2, "ransac", 5.0)
 
     print("\n[RESULT] Homography Matrix (3x3):")
     print(H)
@@ -90,11 +85,11 @@ def main():
     # If you want to see how the first image looks warped onto the second, you can do:
     # (Optional visualization)
     # Load the images again
-    img1 = cv2.imread(image_path_1)
-    img2 = cv2.imread(image_path_2)
+    with instrument.stage("decode"):
+        img1 = cv2.imread(image_path_1)
+        img2 = cv2.imread(image_path_2)
     # Warp the first image to align with the second
-    height, width, _ = img2.shape
-    warped_img1 = cv2.warpPerspective(img1, H, (width, height))
+    warped_img1 = warp_onto(img1, img2, H)
     # Show side by side
     cv2.imshow("Warped Image 1", warped_img1)
     cv2.imshow("Original Image 2", img2)
@@ -0,0 +1,39 @@
+import sys
+import time
+import argparse
+
+from quick_image_edits import instrument
+from quick_image_edits.streaming import load_job, run_job
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run a crop -> adjust -> mask -> save / collage job on a folder, "
+                    "decoding each image once (see quick_image_edits/streaming.py "
+                    "for the job file format)."
+    )
+    parser.add_argument("job", help="JSON job file")
+    parser.add_argument("--trace", metavar="FILE",
+                        help="Record per-stage timings and write a Chrome trace to FILE")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.trace:
+        instrument.enable(args.trace)
+    try:
+        job = load_job(args.job)
+        if "input" not in job:
+            raise ValueError("no 'input' folder or archive")
+    except (OSError, ValueError) as e:
+        print(f"Invalid job file '{args.job}': {e}")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    count, collage_path = run_job(job)
+    elapsed = time.perf_counter() - start
+    print(f"Processed {count} image(s) in {elapsed:.2f}s")
+    if collage_path:
+        print(f"Collage: {collage_path}")
+
+if __name__ == "__main__":
+    main()
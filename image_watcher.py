@@ -0,0 +1,38 @@
+import sys
+import argparse
+
+from quick_image_edits.streaming import load_job
+from quick_image_edits.watcher import DEFAULT_POLL_INTERVAL, DEFAULT_SETTLE, watch
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Watch a folder and apply a saved job preset (crop box, adjustments, "
+                    "HSV mask, save) to every new image. Stop with Ctrl+C."
+    )
+    parser.add_argument("job", help="JSON job file (same format as image_pipeline.py, no collage)")
+    parser.add_argument("--folder", help="Folder to watch (default: the job's 'input')")
+    parser.add_argument("--recursive", action="store_true", help="Include subfolders")
+    parser.add_argument("--workers", type=int, default=2, help="Worker processes")
+    parser.add_argument("--settle", type=float, default=DEFAULT_SETTLE,
+                        help="Seconds a file must stay unchanged before it is processed")
+    parser.add_argument("--state", help="Processed-state index file (default: inside the folder)")
+    parser.add_argument("--poll-interval", type=float, default=DEFAULT_POLL_INTERVAL,
+                        help="Rescan period when inotify is not available")
+    parser.add_argument("--polling", action="store_true", help="Always poll instead of inotify")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        job = load_job(args.job)
+        folder = args.folder or job.get("input")
+        if not folder:
+            raise ValueError("no folder given (use --folder or set 'input')")
+        watch(job, folder, workers=args.workers, settle=args.settle, recursive=args.recursive,
+              state_path=args.state, poll_interval=args.poll_interval, polling=args.polling)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+"""
+Shared helpers used by the Quick Image Edits scripts.
+
+The scripts in the repository root stay runnable on their own
+(`python script_name.py`); this package holds the pieces they share.
+"""
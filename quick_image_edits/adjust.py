@@ -0,0 +1,375 @@
+"""
+The PhotoEditor adjustment chain as plain functions, so it can run
+without a window (see quick_image_edits.streaming).
+
+apply_adjustments() applies the nine slider values in the editor's order:
+brightness, exposure (gamma), contrast, highlights, shadows, saturation,
+warmth, tint, sharpness. Values at their neutral setting are skipped.
+
+All stages but saturation and sharpness map each channel through a
+256-entry lookup table (contrast once the mean luminance it blends toward
+is known), so runs of them are composed into one table and applied in a
+single pass. The same tables give the output histogram from a cached one
+without touching the pixels (PreviewStats). Large images are processed in
+strips on a thread pool (quick_image_edits.strips).
+"""
+import numpy as np
+from PIL import ImageEnhance
+
+from quick_image_edits import strips
+from quick_image_edits.instrument import stage
+
+# Slider name -> neutral value (the PhotoEditor defaults)
+DEFAULTS = {
+    "brightness": 1.0,
+    "exposure": 1.0,
+    "contrast": 1.0,
+    "highlights": 1.0,
+    "shadows": 1.0,
+    "saturation": 1.0,
+    "warmth": 0.0,
+    "tint": 0.0,
+    "sharpness": 1.0,
+}
+
+# Order the stages run in
+ORDER = ("brightness", "exposure", "contrast", "highlights", "shadows", "saturation",
+         "warmth", "tint", "sharpness")
+
+# Stages that map each channel through a fixed lookup table. Contrast is one
+# too once the image's mean luminance is known; saturation and sharpness
+# mix channels / neighbouring pixels and are not.
+TONE_STAGES = ("brightness", "exposure", "highlights", "shadows", "warmth", "tint")
+
+# Values this close to DEFAULTS skip the stage (others must match exactly)
+NEUTRAL_TOLERANCE = {"exposure": 0.001, "highlights": 0.001, "shadows": 0.001,
+                     "warmth": 0.001, "tint": 0.001}
+
+WARMTH_SHIFT = 30.0   # R / B shift at warmth +-1
+TINT_SHIFT = 30.0     # G shift at tint +-1 (R and B move half as much)
+
+
+def _values(params):
+    unknown = set(params) - set(DEFAULTS)
+    if unknown:
+        raise ValueError(f"Unknown adjustment(s): {', '.join(sorted(unknown))}")
+    return dict(DEFAULTS, **params)
+
+
+def is_neutral(name, value):
+    """True if the stage would leave the image unchanged (so it is skipped)."""
+    return abs(value - DEFAULTS[name]) <= NEUTRAL_TOLERANCE.get(name, 0.0)
+
+
+def apply_adjustments(image, params, stats=None):
+    """
+    Apply the adjustment chain to an RGB PIL image. 'params' maps slider
+    names (see DEFAULTS) to values; missing names keep their neutral value.
+
+    Consecutive lookup-table stages are composed and applied in a single
+    Image.point() pass. 'stats' is an optional PreviewStats for this image;
+    it supplies cached statistics (the Contrast mean) and records what
+    PreviewStats.histogram() needs.
+    """
+    values = _values(params)
+    edited = image
+    pending = None   # Composed per-channel LUTs not applied yet
+
+    for name in ORDER:
+        value = values[name]
+        if is_neutral(name, value):
+            continue
+        if name in TONE_STAGES:
+            pending = compose_luts(pending, channel_luts(name, value))
+            continue
+        if name == "contrast":
+            key = prefix_key(values, name)
+            mean = stats.means.get(key) if stats is not None else None
+            if mean is None:
+                edited, pending = apply_luts(edited, pending), None
+                with stage("contrast_mean"):
+                    mean = luminance_mean(edited)
+                if stats is not None:
+                    stats.remember_mean(key, mean)
+            pending = compose_luts(pending, channel_luts(name, value, mean))
+            continue
+
+        # Saturation / sharpness mix channels or neighbours: not a LUT
+        edited, pending = apply_luts(edited, pending), None
+        with stage(name):
+            enhancer = ImageEnhance.Color if name == "saturation" else ImageEnhance.Sharpness
+            # Sharpness blurs with a 3x3 kernel: strips need one row of context
+            halo = 1 if name == "sharpness" else 0
+            edited = strips.map_image(edited, lambda part: enhancer(part).enhance(value), halo)
+        if stats is not None:
+            stats.remember_base(prefix_key(values, name), edited)
+
+    return apply_luts(edited, pending)
+
+
+# ========== Lookup tables ==========
+
+def _blend_lut(base, factor):
+    """Image.blend(constant 'base', image, factor) per value, with Pillow's float32 math."""
+    values = np.float32(base) + np.float32(factor) * (np.arange(256, dtype=np.float32)
+                                                       - np.float32(base))
+    # Pillow clamps, then truncates
+    return np.clip(values, 0, 255).astype(np.uint8)
+
+
+def _shift_lut(offset):
+    """value + offset, clamped and truncated (apply_warmth / apply_tint math)."""
+    values = np.arange(256, dtype=np.float32) + np.float32(offset)
+    return np.clip(values, 0, 255).astype(np.uint8)
+
+
+def channel_luts(name, value, mean=None):
+    """
+    (R, G, B) lookup tables (uint8 arrays of 256) for a lookup-table stage.
+    Contrast needs the image's luminance 'mean' (see luminance_mean).
+    """
+    if name == "brightness":
+        # ImageEnhance.Brightness blends with black
+        lut = _blend_lut(0, value)
+    elif name == "contrast":
+        # ImageEnhance.Contrast blends with a gray image of the mean luminance
+        lut = _blend_lut(mean, value)
+    elif name == "exposure":
+        lut = np.array(gamma_lut(value), dtype=np.uint8)
+    elif name == "highlights":
+        lut = np.array(highlights_lut(value), dtype=np.uint8)
+    elif name == "shadows":
+        lut = np.array(shadows_lut(value), dtype=np.uint8)
+    elif name == "warmth":
+        identity = np.arange(256, dtype=np.uint8)
+        return _shift_lut(value * WARMTH_SHIFT), identity, _shift_lut(-value * WARMTH_SHIFT)
+    elif name == "tint":
+        side = _shift_lut(-value * (TINT_SHIFT / 2))
+        return side, _shift_lut(value * TINT_SHIFT), side
+    else:
+        raise ValueError(f"{name!r} is not a lookup-table stage")
+    return lut, lut, lut
+
+
+def compose_luts(first, then):
+    """LUTs equivalent to applying 'first' (may be None) and then 'then'."""
+    if first is None:
+        return then
+    return tuple(t[f] for f, t in zip(first, then))
+
+
+def apply_luts(image, luts):
+    """image.point() with per-channel LUTs; None means "nothing to apply"."""
+    if luts is None:
+        return image
+    table = np.concatenate(luts).tolist()
+    with stage("tone"):
+        return strips.map_image(image, lambda part: part.point(table))
+
+
+def luminance_mean(image):
+    """Mean of image.convert("L"), rounded like ImageEnhance.Contrast does."""
+    if not strips.parallel(image.height, image.width):
+        histogram = image.convert("L").histogram()
+    else:
+        # Per-strip histograms, so no full-size "L" copy is made
+        histograms = []
+
+        def strip(top, bottom):
+            part = image.crop((0, top, image.width, bottom))
+            histograms.append(np.array(part.convert("L").histogram(), dtype=np.int64))
+
+        image.load()
+        strips.run(strip, image.height, image.width)
+        histogram = np.sum(histograms, axis=0).tolist()
+    total = sum(histogram)
+    return int(sum(i * count for i, count in enumerate(histogram)) / total + 0.5)
+
+
+def prefix_key(values, name):
+    """Values of every stage up to and including 'name' (what its input depends on)."""
+    upto = ORDER[:ORDER.index(name) + 1]
+    return tuple(round(float(values[n]), 4) for n in upto)
+
+
+# ========== Live statistics ==========
+
+class PreviewStats:
+    """
+    Statistics of one image (PhotoEditor keeps one for its proxy) reused
+    across apply_adjustments() calls:
+
+      - the luminance mean Contrast blends toward, keyed by the stages
+        before it, so moving any later slider doesn't recompute it;
+      - the histograms of the source and of the output of the last
+        non-LUT stage (saturation / sharpness) that was rendered.
+
+    histogram() pushes the right base histogram through the composed
+    lookup tables of the stages after it, which costs O(256) instead of
+    a pass over the pixels.
+    """
+
+    MAX_MEANS = 256
+
+    def __init__(self, image):
+        with stage("histogram"):
+            self.source = (image.histogram(), image.convert("L").histogram())
+        self.means = {}
+        self.base = None   # (prefix key, RGB histogram, L histogram)
+
+    def remember_mean(self, key, mean):
+        if len(self.means) >= self.MAX_MEANS:
+            self.means.clear()
+        self.means[key] = mean
+
+    def remember_base(self, key, image):
+        with stage("histogram"):
+            self.base = (key, image.histogram(), image.convert("L").histogram())
+
+    def histogram(self, params):
+        """
+        (RGB histogram as 3 x 256 arrays, approximate luminance histogram)
+        of apply_adjustments(image, params), or None if it needs a pass over
+        the rendered pixels (its base histogram or mean isn't cached).
+        The luminance histogram is exact for gray pixels; for colored ones
+        the channel curves are averaged with the Rec. 601 luma weights.
+        """
+        values = _values(params)
+        active = [name for name in ORDER if not is_neutral(name, values[name])]
+        mixers = [name for name in active if name not in TONE_STAGES and name != "contrast"]
+        if mixers:
+            key = prefix_key(values, mixers[-1])
+            if self.base is None or self.base[0] != key:
+                return None
+            rgb, lum = self.base[1], self.base[2]
+            active = active[active.index(mixers[-1]) + 1:]
+        else:
+            rgb, lum = self.source
+
+        luts = None
+        for name in active:
+            mean = None
+            if name == "contrast":
+                mean = self.means.get(prefix_key(values, name))
+                if mean is None:
+                    return None
+            luts = compose_luts(luts, channel_luts(name, values[name], mean))
+        return push_histogram(rgb, lum, luts)
+
+
+def push_histogram(rgb, lum, luts):
+    """Histograms after mapping every value through 'luts' (None = unchanged)."""
+    rgb = [np.asarray(rgb[i * 256:(i + 1) * 256], dtype=np.float64) for i in range(3)]
+    lum = np.asarray(lum, dtype=np.float64)
+    if luts is None:
+        return rgb, lum
+    channels = [np.bincount(lut, weights=hist, minlength=256) for lut, hist in zip(luts, rgb)]
+    luma_lut = np.rint(0.299 * luts[0] + 0.587 * luts[1] + 0.114 * luts[2]).astype(np.intp)
+    return channels, np.bincount(luma_lut, weights=lum, minlength=256)
+
+
+def clipping(rgb):
+    """(shadow, highlight) clipping: largest share of any channel at 0 / at 255."""
+    total = rgb[0].sum() or 1.0
+    return (max(hist[0] for hist in rgb) / total, max(hist[255] for hist in rgb) / total)
+
+
+# ========== Stages ==========
+
+def gamma_lut(gamma):
+    """Lookup table for gamma correction. gamma < 1 => lighten, gamma > 1 => darken."""
+    lut = []
+    for i in range(256):
+        # normalized value = i/255
+        # gamma correction => out = (normalized**(1/gamma))*255
+        v = int((i / 255.0) ** (1.0 / gamma) * 255.0)
+        lut.append(v)
+    return lut
+
+
+def apply_gamma(image, gamma):
+    """Apply gamma correction to a PIL image. gamma < 1 => lighten, gamma > 1 => darken."""
+    return image.point(gamma_lut(gamma) * 3)  # for R, G, B
+
+
+def highlights_lut(factor):
+    """
+    Simplistic highlight compression/expansion:
+    For bright pixels, push them toward or away from white.
+
+    factor > 1 => we are brightening highlights
+    factor < 1 => we are darkening highlights
+    This is a naive approach using a 'curve'.
+    """
+    # Let "threshold" define what we consider "highlights." 
+    # For a 0-255 range, let's say above ~180 is highlight.
+    threshold = 180
+
+    lut = []
+    for i in range(256):
+        if i < threshold:
+            # below threshold, leave as is
+            lut.append(i)
+        else:
+            # above threshold, move i toward white or toward threshold
+            # new_i = threshold + (i - threshold)*factor
+            # But let's clamp to 255
+            new_i = threshold + (i - threshold) * factor
+            new_i = max(0, min(255, new_i))
+            lut.append(int(new_i))
+    return lut
+
+
+def apply_highlights(image, factor):
+    """Compress (factor < 1) or expand (factor > 1) the highlights; see highlights_lut."""
+    return image.point(highlights_lut(factor) * 3)
+
+
+def shadows_lut(factor):
+    """
+    Simplistic shadow lift/crush:
+    For dark pixels, push them up or down.
+
+    factor > 1 => lighten shadows
+    factor < 1 => darken shadows
+    """
+    # Let's define shadow range below 75
+    threshold = 75
+
+    lut = []
+    for i in range(256):
+        if i > threshold:
+            # above threshold, leave as is
+            lut.append(i)
+        else:
+            # below threshold, move i toward 0 or up
+            # For simplicity:
+            new_i = i * factor
+            new_i = max(0, min(255, new_i))
+            lut.append(int(new_i))
+    return lut
+
+
+def apply_shadows(image, factor):
+    """Lift (factor > 1) or crush (factor < 1) the shadows; see shadows_lut."""
+    return image.point(shadows_lut(factor) * 3)
+
+
+def apply_warmth(image, factor):
+    """
+    Shift color balance to add more red/yellow or reduce them. 
+    factor > 0 => warmer (raise R, lower B by factor * WARMTH_SHIFT)
+    factor < 0 => cooler (lower R, raise B)
+    This is an approximation.
+    """
+    return apply_luts(image, channel_luts("warmth", factor))
+
+
+def apply_tint(image, factor):
+    """
+    Shift color balance to add green/magenta.
+    factor > 0 => more green (G up by factor * TINT_SHIFT, R / B down by half that)
+    factor < 0 => more magenta
+    Another naive approach.
+    """
+    return apply_luts(image, channel_luts("tint", factor))
@@ -0,0 +1,76 @@
+"""
+Automatic border detection ("auto-trim") for uniform or near-uniform
+borders, e.g. screenshots with a solid background or scanned pages.
+
+Every full-resolution pixel is compared with the border colour, so a 1 px
+line or a faint caption near the edge is never averaged away. The
+comparison is one Pillow point() lookup table (255 where a channel is
+further than the tolerance from the border, else 0) and the content box
+is the mask's getbbox(), both in C. It runs strip by strip (see
+quick_image_edits.strips), so memory stays at one strip and large images
+use every core.
+"""
+import numpy as np
+
+from quick_image_edits import strips
+
+DEFAULT_TOLERANCE = 12  # Max per-channel difference still counted as border
+CORNER_SIZE = 8         # Corner blocks averaged for the border color (evens out noise)
+
+
+def _as_rgb(image):
+    if image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+    return image
+
+
+def border_color(image):
+    """Median of the four corner blocks' mean colors: the color the border is made of."""
+    width, height = image.size
+    w, h = min(CORNER_SIZE, width), min(CORNER_SIZE, height)
+    corners = [np.asarray(image.crop((x, y, x + w, y + h))).reshape(w * h, -1).mean(axis=0)
+               for x in (0, width - w) for y in (0, height - h)]
+    return np.median(np.stack(corners), axis=0)
+
+
+def content_lut(background, tolerance):
+    """point() table: 255 where a channel differs from the background by more than 'tolerance'."""
+    lut = []
+    for value in np.atleast_1d(background).astype(int):
+        lut.extend(255 if abs(v - value) > tolerance else 0 for v in range(256))
+    return lut
+
+
+def detect_border_box(image, tolerance=DEFAULT_TOLERANCE, padding=0):
+    """
+    Content bounding box (left, upper, right, lower) of 'image' after
+    trimming uniform borders, or None if the whole image is border.
+    'padding' pixels of border are kept around the content.
+    """
+    image = _as_rgb(image)
+    image.load()   # Decode before the strips crop it
+    width, height = image.size
+    lut = content_lut(border_color(image), tolerance)
+    boxes = []
+
+    def scan(top, bottom):
+        box = image.crop((0, top, width, bottom)).point(lut).getbbox()
+        if box is not None:
+            boxes.append((box[0], box[1] + top, box[2], box[3] + top))
+
+    strips.run(scan, height, width)
+    box = union_box(boxes)
+    if box is None:
+        return None
+    left, upper, right, lower = box
+    return (max(left - padding, 0), max(upper - padding, 0),
+            min(right + padding, width), min(lower + padding, height))
+
+
+def union_box(boxes):
+    """Smallest box containing every box in 'boxes' (None entries are ignored)."""
+    boxes = [b for b in boxes if b is not None]
+    if not boxes:
+        return None
+    return (min(b[0] for b in boxes), min(b[1] for b in boxes),
+            max(b[2] for b in boxes), max(b[3] for b in boxes))
@@ -0,0 +1,161 @@
+"""
+Run long batch loops off the Tk main thread.
+
+The job runs on a background thread and only talks to the GUI through a
+queue; the ProgressPanel drains that queue with after(), so the window
+keeps repainting and the Cancel button stays clickable.
+"""
+import time
+import queue
+import threading
+import datetime
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+
+class Cancelled(Exception):
+    """Raised inside a batch job when the user pressed Cancel."""
+
+
+class BatchTask:
+    """
+    Handle passed to a batch job. The job calls advance() after each file
+    and check_cancelled() between files; both are safe to call from the
+    worker thread (they never touch Tk).
+    """
+
+    def __init__(self, total=0):
+        self.total = total
+        self.done = 0
+        self.events = queue.Queue()
+        self._cancel_event = threading.Event()
+        self._start_time = time.perf_counter()
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        self._cancel_event.set()
+
+    def check_cancelled(self):
+        """Stop the job (between files) if Cancel was pressed."""
+        if self._cancel_event.is_set():
+            raise Cancelled()
+
+    def set_total(self, total):
+        self.total = total
+        self._post_progress("")
+
+    def advance(self, n=1, message=""):
+        self.done += n
+        self._post_progress(message)
+
+    def _post_progress(self, message):
+        elapsed = time.perf_counter() - self._start_time
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        remaining = max(self.total - self.done, 0)
+        eta = remaining / rate if rate > 0 else None
+        self.events.put(("progress", self.done, self.total, rate, eta, message))
+
+
+def format_progress(done, total, rate, eta):
+    """Human readable "12/100  3.4 img/s  ETA 0:00:26"."""
+    text = f"{done}/{total}  {rate:.1f} img/s"
+    if eta is not None:
+        text += f"  ETA {datetime.timedelta(seconds=int(eta))}"
+    return text
+
+
+class ProgressPanel(tk.Frame):
+    """Progress bar + status label + Cancel button driving one BatchTask at a time."""
+
+    POLL_MS = 100  # How often the queue of worker events is drained
+
+    def __init__(self, master, **kwargs):
+        super().__init__(master, **kwargs)
+        self.task = None
+        self.on_done = None
+
+        self.progress_bar = ttk.Progressbar(self, orient=tk.HORIZONTAL, mode="determinate")
+        self.progress_bar.pack(fill="x", padx=5, pady=(5, 2))
+
+        bottom = tk.Frame(self)
+        bottom.pack(fill="x")
+        self.status_var = tk.StringVar(value="Idle")
+        tk.Label(bottom, textvariable=self.status_var, anchor="w").pack(side=tk.LEFT, padx=5)
+        self.cancel_btn = tk.Button(bottom, text="Cancel", command=self.cancel, state=tk.DISABLED)
+        self.cancel_btn.pack(side=tk.RIGHT, padx=5, pady=2)
+
+    @property
+    def busy(self):
+        return self.task is not None
+
+    def run(self, job, total=0, on_done=None):
+        """
+        Start job(task) on a background thread.
+        on_done(status, result) is called on the Tk thread afterwards, with
+        status one of "done", "cancelled" or "error" (result is the exception).
+        """
+        if self.busy:
+            return False
+        self.task = BatchTask(total)
+        self.on_done = on_done
+        self.progress_bar.config(maximum=max(total, 1), value=0)
+        self.status_var.set(f"0/{total}")
+        self.cancel_btn.config(state=tk.NORMAL)
+
+        task = self.task
+
+        def worker():
+            try:
+                task.events.put(("finished", "done", job(task)))
+            except Cancelled:
+                task.events.put(("finished", "cancelled", None))
+            except Exception as e:
+                task.events.put(("finished", "error", e))
+
+        threading.Thread(target=worker, daemon=True).start()
+        self.after(self.POLL_MS, self._poll)
+        return True
+
+    def cancel(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.status_var.set("Cancelling after the current file...")
+            self.cancel_btn.config(state=tk.DISABLED)
+
+    def _poll(self):
+        task = self.task
+        finished = None
+        while True:
+            try:
+                event = task.events.get_nowait()
+            except queue.Empty:
+                break
+            if event[0] == "progress":
+                _, done, total, rate, eta, message = event
+                self.progress_bar.config(maximum=max(total, 1), value=done)
+                if not task.cancelled:
+                    text = format_progress(done, total, rate, eta)
+                    self.status_var.set(f"{text}  {message}" if message else text)
+            else:
+                finished = event
+
+        if finished is None:
+            self.after(self.POLL_MS, self._poll)
+            return
+
+        _, status, result = finished
+        self.task = None
+        self.cancel_btn.config(state=tk.DISABLED)
+        if status == "done":
+            self.status_var.set(f"Done: {task.done}/{task.total}")
+        elif status == "cancelled":
+            self.status_var.set(f"Cancelled after {task.done}/{task.total}")
+        else:
+            self.status_var.set("Failed")
+        if self.on_done is not None:
+            self.on_done(status, result)
+        elif status == "error":
+            messagebox.showerror("Batch Error", f"Batch failed:\n{result}")
@@ -0,0 +1,141 @@
+"""
+Build cache for CollageApp, so rebuilding a collage of a folder that
+changed a little only decodes what changed.
+
+After each build the finished collage is kept as raw pixels (canvas.npy)
+together with a manifest (manifest.json) in a .quick_image_edits_collage
+folder next to the output. The manifest lists every tile:
+
+    key        entry name (archive member / frame included)
+    signature  size and mtime of the source file
+    kind       how the tile was rendered ("full", "scaled", "thumb<cell>")
+    size       the source's pixel size, so the layout needs no header read
+    box        where the tile sits in the canvas (x, y, w, h)
+
+On the next build a tile whose source is unchanged and that is rendered
+the same way at the same size is copied out of the memory-mapped old
+canvas, from wherever it was before, so tiles that only moved are not
+decoded either. New or changed files are decoded as usual.
+"""
+import os
+import json
+
+CACHE_DIR = ".quick_image_edits_collage"
+MANIFEST_FILE = "manifest.json"
+CANVAS_FILE = "canvas.npy"
+VERSION = 1
+
+
+def _source_path(entry):
+    # Archive members are checked against the archive itself
+    return getattr(entry, "path", entry)
+
+
+class CollageCache:
+    """Tiles of the previous build of one output folder (see the module docstring)."""
+
+    def __init__(self, output_dir):
+        self.folder = os.path.join(output_dir, CACHE_DIR)
+        self.manifest_path = os.path.join(self.folder, MANIFEST_FILE)
+        self.canvas_path = os.path.join(self.folder, CANVAS_FILE)
+        self.old = {}         # key -> tile record of the previous build
+        self.canvas = None    # Previous collage, memory-mapped
+        self.tiles = []       # Records of the build in progress
+        self.reused = 0
+        self._signatures = {}
+        self._load()
+
+    def _load(self):
+        import numpy as np
+
+        try:
+            with open(self.manifest_path) as f:
+                manifest = json.load(f)
+            if manifest.get("version") != VERSION:
+                return
+            canvas = np.load(self.canvas_path, mmap_mode="r")
+            if list(canvas.shape[:2]) != manifest["size"][::-1]:
+                return
+            old = {}
+            for record in manifest["tiles"]:
+                # Reject a truncated or hand-edited record here, not mid-build
+                if (len(record["box"]) != 4 or not isinstance(record["kind"], str)
+                        or not isinstance(record["signature"], list)
+                        or not isinstance(record.get("size") or [], list)):
+                    raise ValueError(f"bad tile record {record!r}")
+                record["box"] = [int(value) for value in record["box"]]
+                old[str(record["key"])] = record
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            print(f"Ignoring unreadable collage cache '{self.folder}': {e}")
+            return
+        self.canvas = canvas
+        self.old = old
+
+    def signature(self, entry):
+        """[size, mtime_ns] of the entry's file, or None if it can't be read."""
+        path = _source_path(entry)
+        if path not in self._signatures:
+            try:
+                st = os.stat(path)
+                self._signatures[path] = [st.st_size, st.st_mtime_ns]
+            except OSError:
+                self._signatures[path] = None
+        return self._signatures[path]
+
+    def _match(self, entry):
+        record = self.old.get(str(entry))
+        signature = self.signature(entry)
+        if record is None or signature is None or record["signature"] != signature:
+            return None
+        return record
+
+    def source_size(self, entry):
+        """Pixel size of an unchanged source from the manifest, or None."""
+        record = self._match(entry)
+        if record is None or record.get("size") is None:
+            return None
+        return tuple(record["size"])
+
+    def tile(self, entry, kind, tile_size=None):
+        """
+        The previous rendering of 'entry' as a PIL image, if its source is
+        unchanged and it was rendered as 'kind' at 'tile_size' (any size if
+        None); else None.
+        """
+        record = self._match(entry)
+        if self.canvas is None or record is None or record["kind"] != kind:
+            return None
+        x, y, w, h = record["box"]
+        if tile_size is not None and (w, h) != tuple(tile_size):
+            return None
+        import numpy as np
+        from PIL import Image
+
+        self.reused += 1
+        return Image.fromarray(np.array(self.canvas[y:y + h, x:x + w]))
+
+    def add(self, entry, kind, box, source_size=None):
+        """Record a tile of the build in progress."""
+        self.tiles.append({"key": str(entry), "signature": self.signature(entry), "kind": kind,
+                           "size": list(source_size) if source_size else None, "box": list(box)})
+
+    def save(self, collage):
+        """Keep the finished collage and its tiles for the next build."""
+        import numpy as np
+
+        os.makedirs(self.folder, exist_ok=True)
+        # Release the old map first (Windows can't replace a mapped file)
+        self.canvas = None
+        tmp_path = f"{self.canvas_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, np.asarray(collage.convert("RGB")))
+        os.replace(tmp_path, self.canvas_path)
+
+        manifest = {"version": VERSION, "size": list(collage.size),
+                    "tiles": [tile for tile in self.tiles if tile["signature"] is not None]}
+        tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self.manifest_path)
@@ -0,0 +1,259 @@
+"""
+CropTool: draw a crop box on the first image of a folder and apply it to
+every image (or auto-trim them all). Started by image_cropper_batch.py.
+"""
+import os
+import tkinter as tk
+from PIL import ImageTk
+
+from quick_image_edits import encoders, instrument
+from quick_image_edits.autotrim import DEFAULT_TOLERANCE
+from quick_image_edits.batch_runner import ProgressPanel
+from quick_image_edits.cropping import auto_trim_images, crop_images
+from quick_image_edits.sources import iter_images
+
+
+class CropTool(tk.Tk):
+    SCROLL_MARGIN = 20  # Pixels from edge at which auto-scroll should trigger
+    SCROLL_SPEED = 1    # How many "units" to scroll each step
+
+    def __init__(self, folder_path):
+        super().__init__()
+        self.title("Image Crop Tool")
+
+        self.folder_path = folder_path
+        
+        # Get list of image files from the folder (natural sort order)
+        self.image_files = list(iter_images(folder_path))
+        if not self.image_files:
+            print("No image files found in the specified folder.")
+            self.destroy()
+            return
+
+        # Create a subfolder to save cropped images
+        self.cropped_folder = os.path.join(folder_path, "cropped")
+        os.makedirs(self.cropped_folder, exist_ok=True)
+
+        # We'll display the first image so that user can pick a region
+        self.current_image = self.image_files[0]
+        self.load_image()
+
+        # Variables to store selection box coordinates
+        self.start_x = None
+        self.start_y = None
+        self.rect_id = None  # ID of the rectangle drawn on Canvas
+
+        # ============= BUILD GUI WITH SCROLLBARS =============
+        container = tk.Frame(self)
+        container.pack(fill=tk.BOTH, expand=True)
+
+        # Scrollbars
+        self.v_scroll = tk.Scrollbar(container, orient=tk.VERTICAL)
+        self.h_scroll = tk.Scrollbar(container, orient=tk.HORIZONTAL)
+
+        # Canvas
+        self.canvas = tk.Canvas(
+            container,
+            cursor="cross",
+            xscrollcommand=self.h_scroll.set,
+            yscrollcommand=self.v_scroll.set
+        )
+        self.canvas.grid(row=0, column=0, sticky="nsew")
+        self.v_scroll.grid(row=0, column=1, sticky="ns")
+        self.h_scroll.grid(row=1, column=0, sticky="ew")
+
+        self.v_scroll.config(command=self.canvas.yview)
+        self.h_scroll.config(command=self.canvas.xview)
+
+        # Make the canvas expandable in grid
+        container.rowconfigure(0, weight=1)
+        container.columnconfigure(0, weight=1)
+
+        # Bind mouse events
+        self.canvas.bind("<ButtonPress-1>", self.on_button_press)
+        self.canvas.bind("<B1-Motion>", self.on_move_press)
+        self.canvas.bind("<ButtonRelease-1>", self.on_button_release)
+
+        # Encoder profile for the cropped files (they keep their original format)
+        self.profile_var = tk.StringVar(value=encoders.DEFAULT_PROFILE)
+        profile_frame = tk.Frame(self)
+        profile_frame.pack(pady=(5, 0))
+        tk.Label(profile_frame, text="Encoder profile:").pack(side=tk.LEFT)
+        tk.OptionMenu(profile_frame, self.profile_var, *encoders.PROFILE_NAMES).pack(side=tk.LEFT)
+
+        # Extra output sizes (long side in px), each saved to cropped_<size>/
+        self.sizes_var = tk.StringVar(value="")
+        tk.Label(profile_frame, text="Extra sizes (px):").pack(side=tk.LEFT, padx=(10, 0))
+        tk.Entry(profile_frame, textvariable=self.sizes_var, width=12).pack(side=tk.LEFT)
+
+        # Confirm selection button
+        self.confirm_button = tk.Button(self, text="Confirm Selection", command=self.confirm_selection)
+        self.confirm_button.pack(pady=5)
+
+        # Auto-trim: detect uniform borders per image instead of drawing a box
+        self.tolerance_var = tk.IntVar(value=DEFAULT_TOLERANCE)
+        self.union_var = tk.BooleanVar(value=False)
+        auto_frame = tk.Frame(self)
+        auto_frame.pack(pady=(0, 5))
+        self.auto_trim_button = tk.Button(auto_frame, text="Auto-Trim All", command=self.auto_trim)
+        self.auto_trim_button.pack(side=tk.LEFT, padx=5)
+        tk.Label(auto_frame, text="Tolerance:").pack(side=tk.LEFT)
+        tk.Spinbox(auto_frame, from_=0, to=255, textvariable=self.tolerance_var,
+                   width=4).pack(side=tk.LEFT)
+        tk.Checkbutton(auto_frame, text="Same box for all (union)",
+                       variable=self.union_var).pack(side=tk.LEFT, padx=5)
+
+        # Progress bar / ETA / Cancel for the (background) batch crop
+        self.progress = ProgressPanel(self)
+        self.progress.pack(fill=tk.X, padx=5, pady=(0, 5))
+
+        # Render the image on the canvas
+        self.draw_image_on_canvas()
+
+    def load_image(self):
+        with instrument.stage("decode"):
+            self.original_image = self.current_image.open()
+            self.original_image.load()
+        with instrument.stage("PhotoImage"):
+            self.tk_image = ImageTk.PhotoImage(self.original_image)
+
+    def draw_image_on_canvas(self):
+        """Draws the current image on the canvas and sets the scroll region."""
+        self.canvas_image_id = self.canvas.create_image(0, 0, anchor="nw", image=self.tk_image)
+        # Set scroll region to the size of the image
+        w, h = self.tk_image.width(), self.tk_image.height()
+        self.canvas.config(scrollregion=(0, 0, w, h))
+
+    def on_button_press(self, event):
+        """Record the starting point of the selection rectangle in canvas coordinates."""
+        self.start_x = self.canvas.canvasx(event.x)
+        self.start_y = self.canvas.canvasy(event.y)
+
+        # If there's an old rectangle, remove it
+        if self.rect_id:
+            self.canvas.delete(self.rect_id)
+            self.rect_id = None
+
+    def on_move_press(self, event):
+        """Draw/update the selection rectangle, and auto-scroll if near edges."""
+        # Auto-scroll if near edges
+        self.auto_scroll_if_needed(event)
+
+        # Now get the current mouse position in canvas coords
+        cur_x = self.canvas.canvasx(event.x)
+        cur_y = self.canvas.canvasy(event.y)
+
+        # Remove any existing rectangle
+        if self.rect_id:
+            self.canvas.delete(self.rect_id)
+
+        # Draw a new rectangle
+        self.rect_id = self.canvas.create_rectangle(
+            self.start_x, self.start_y, cur_x, cur_y,
+            outline='red', width=2, dash=(2, 2)
+        )
+
+    def on_button_release(self, event):
+        """Finalize the selection rectangle."""
+        pass
+
+    def auto_scroll_if_needed(self, event):
+        """
+        Auto-scroll the canvas if the mouse is near any edge (while dragging).
+        This allows selecting regions that extend beyond the currently visible area.
+        """
+        # The current mouse position in widget coordinates (not scrolled)
+        widget_x, widget_y = event.x, event.y
+
+        # Canvas visible width/height
+        visible_width = self.canvas.winfo_width()
+        visible_height = self.canvas.winfo_height()
+
+        # Scroll horizontally if near left/right
+        if widget_x < self.SCROLL_MARGIN:
+            # scroll left
+            self.canvas.xview_scroll(-self.SCROLL_SPEED, "units")
+        elif widget_x > (visible_width - self.SCROLL_MARGIN):
+            # scroll right
+            self.canvas.xview_scroll(self.SCROLL_SPEED, "units")
+
+        # Scroll vertically if near top/bottom
+        if widget_y < self.SCROLL_MARGIN:
+            # scroll up
+            self.canvas.yview_scroll(-self.SCROLL_SPEED, "units")
+        elif widget_y > (visible_height - self.SCROLL_MARGIN):
+            # scroll down
+            self.canvas.yview_scroll(self.SCROLL_SPEED, "units")
+
+    def confirm_selection(self):
+        if self.progress.busy:
+            return
+
+        # Make sure we actually have a drawn rectangle
+        if not self.rect_id:
+            print("No selection rectangle found!")
+            return
+        
+        coords = self.canvas.coords(self.rect_id)
+        if len(coords) != 4:
+            print("No valid rectangle drawn. Please click and drag to draw a rectangle.")
+            return
+        
+        x1, y1, x2, y2 = coords
+        
+        # Sort the x and y coordinates to get a proper bounding box
+        left, right = sorted([x1, x2])
+        upper, lower = sorted([y1, y2])
+        bounding_box = (left, upper, right, lower)
+        
+        print(f"Selected region: {bounding_box}")
+
+        # Crop all images on a worker thread so the window stays responsive
+        self.confirm_button.config(state=tk.DISABLED)
+        profile = self.profile_var.get()
+        sizes = self.output_sizes()
+        self.progress.run(lambda task: self.crop_all(bounding_box, task, profile, sizes),
+                          total=len(self.image_files), on_done=self.on_crop_done)
+
+    def crop_all(self, bounding_box, task, profile=encoders.DEFAULT_PROFILE, sizes=()):
+        """Worker thread: crop all images in the folder to bounding_box."""
+        crop_images(self.image_files, self.cropped_folder, lambda im: bounding_box,
+                    task, profile, sizes)
+
+    def output_sizes(self):
+        """Parse the 'Extra sizes' field ("1024, 256") into a tuple of ints."""
+        text = self.sizes_var.get().replace(",", " ")
+        try:
+            return tuple(int(v) for v in text.split() if int(v) > 0)
+        except ValueError:
+            print(f"Ignoring invalid output sizes: {self.sizes_var.get()!r}")
+            return ()
+
+    def auto_trim(self):
+        """Crop every image to its own content box (or the union of all boxes)."""
+        if self.progress.busy:
+            return
+        tolerance = self.tolerance_var.get()
+        union = self.union_var.get()
+        profile = self.profile_var.get()
+        sizes = self.output_sizes()
+        total = len(self.image_files) * (2 if union else 1)
+        self.confirm_button.config(state=tk.DISABLED)
+        self.auto_trim_button.config(state=tk.DISABLED)
+        self.progress.run(
+            lambda task: auto_trim_images(self.image_files, self.cropped_folder, tolerance,
+                                          union, task=task, profile=profile, sizes=sizes),
+            total=total, on_done=self.on_crop_done)
+
+    def on_crop_done(self, status, result):
+        """Tk thread: called once a crop batch finished, failed or was cancelled."""
+        self.confirm_button.config(state=tk.NORMAL)
+        self.auto_trim_button.config(state=tk.NORMAL)
+        if status == "cancelled":
+            print("Cropping cancelled.")
+            return
+        if status == "error":
+            print(f"Cropping failed: {result}")
+            return
+        print("Cropping done for all images!")
+        self.quit()
@@ -0,0 +1,122 @@
+"""
+Batch cropping used by image_cropper_batch.py (CropTool and --auto-trim).
+
+Kept free of tkinter so the headless mode never loads the GUI toolkit.
+"""
+import os
+
+from quick_image_edits import encoders, instrument
+from quick_image_edits.autotrim import DEFAULT_TOLERANCE, detect_border_box, union_box
+from quick_image_edits.frames import is_multi_frame, iter_frames, save_frames
+from quick_image_edits.pipeline import Pipeline
+from quick_image_edits.resample import downscale_levels
+
+
+def size_folder(output_folder, long_side):
+    """Folder for the downscaled copies: cropped -> cropped_1024."""
+    return f"{output_folder}_{long_side}"
+
+
+def crop_images(entries, output_folder, box_for, task=None, profile=encoders.DEFAULT_PROFILE,
+                sizes=()):
+    """
+    Crop every image in 'entries' and save it under output_folder.
+    box_for(image) returns the crop box for an opened image (None keeps the
+    whole image). Decoding, cropping and saving run as overlapping pipeline
+    stages; saving gets two workers since PNG compression is usually the
+    slowest. 'task' is an optional BatchTask for progress and cancel.
+
+    'sizes' lists extra long-side sizes (e.g. (1024, 256)); each is written
+    to its own folder (see size_folder), downscaled from the next larger
+    level of the same decode. Animations are only written at full size.
+    """
+    def decode(img_file):
+        im = img_file.open()
+        # Multi-frame files (GIF / TIFF) are decoded frame by frame in encode()
+        if not is_multi_frame(im):
+            im.load()
+        return img_file, im
+
+    def crop(entry):
+        img_file, im = entry
+        # One box for every frame of a multi-frame file (auto-trim's covers all frames)
+        bounding_box = box_for(im) or (0, 0) + im.size
+        if is_multi_frame(im):
+            return img_file, (im, bounding_box)
+        cropped_im = im.crop(bounding_box)
+        im.close()
+        # Full-size crop plus the requested smaller levels, all from one decode
+        outputs = [(output_folder, cropped_im)]
+        for side, level in downscale_levels(cropped_im, sizes):
+            outputs.append((size_folder(output_folder, side), level))
+        return img_file, outputs
+
+    def encode(entry):
+        img_file, outputs = entry
+        if isinstance(outputs, tuple):
+            # Crop every frame and re-encode as an animation / multipage file,
+            # holding only one frame in memory at a time
+            im, bounding_box = outputs
+            cropped_path = os.path.join(output_folder, img_file.name)
+            os.makedirs(os.path.dirname(cropped_path), exist_ok=True)
+            with im:
+                save_frames(iter_frames(im, lambda frame: frame.crop(bounding_box)),
+                            cropped_path, im)
+            print(f"Cropped and saved: {cropped_path}")
+            return cropped_path
+
+        for folder, cropped_im in outputs:
+            # Save in the cropped folder (and the per-size folders)
+            cropped_path = os.path.join(folder, img_file.name)
+            os.makedirs(os.path.dirname(cropped_path), exist_ok=True)
+            encoders.save_image(cropped_im, cropped_path, profile=profile)
+            print(f"Cropped and saved: {cropped_path}")
+        return img_file
+
+    pipeline = Pipeline([("decode", decode, 1), ("crop", crop, 1), ("encode", encode, 2)],
+                        on_error=lambda img_file, stage, e: print(
+                            f"Failed to process {img_file}: {e}"))
+    result = pipeline.run(entries, task)
+    print(result.report())
+    if task is not None:
+        task.check_cancelled()
+
+
+def auto_trim_images(entries, output_folder, tolerance=None, union=False,
+                     padding=0, task=None, profile=encoders.DEFAULT_PROFILE, sizes=()):
+    """
+    Crop away uniform borders, no interaction needed. Each image gets its
+    own content box, or with union=True every image is cropped to the
+    union of all boxes (one extra detection pass over the batch).
+    'tolerance' defaults to autotrim.DEFAULT_TOLERANCE.
+    """
+    if tolerance is None:
+        tolerance = DEFAULT_TOLERANCE
+
+    def detect(im):
+        if not is_multi_frame(im):
+            return detect_border_box(im, tolerance, padding)
+        # Content may move between frames: keep the union of every frame's box
+        boxes = [detect_border_box(frame, tolerance, padding) for frame, _ in iter_frames(im)]
+        im.seek(0)
+        return union_box(boxes)
+
+    if not union:
+        crop_images(entries, output_folder, detect, task, profile, sizes)
+        return
+
+    boxes = []
+    for entry in entries:
+        if task is not None:
+            task.check_cancelled()
+        try:
+            with instrument.stage("detect"), entry.open() as im:
+                boxes.append(detect(im))
+        except Exception as e:
+            print(f"Failed to process {entry}: {e}")
+        if task is not None:
+            task.advance()
+
+    box = union_box(boxes)
+    print(f"Union box: {box}")
+    crop_images(entries, output_folder, lambda im: box, task, profile, sizes)
@@ -0,0 +1,99 @@
+"""
+Named encoder profiles shared by every save path.
+
+A profile ("fast", "balanced", "smallest") picks the compression effort
+for each output format:
+  PNG           - zlib compress_level and strategy (compress_type), optimize
+  JPEG          - quality, chroma subsampling, optimize, progressive
+  WEBP          - lossy quality and method (encoder effort 0-6)
+  WEBP_LOSSLESS - lossless, quality = effort, method
+"""
+import os
+import zlib
+
+FORMATS = ["PNG", "JPEG", "WEBP", "WEBP_LOSSLESS"]
+PROFILE_NAMES = ["fast", "balanced", "smallest"]
+DEFAULT_PROFILE = "balanced"
+
+PROFILES = {
+    "fast": {
+        "PNG": {"compress_level": 1, "compress_type": zlib.Z_RLE},
+        "JPEG": {"quality": 90, "subsampling": "4:2:0", "optimize": False, "progressive": False},
+        "WEBP": {"quality": 85, "method": 0},
+        "WEBP_LOSSLESS": {"lossless": True, "quality": 0, "method": 0},
+    },
+    "balanced": {
+        "PNG": {"compress_level": 6, "compress_type": zlib.Z_FILTERED},
+        "JPEG": {"quality": 92, "subsampling": "4:2:0", "optimize": True, "progressive": False},
+        "WEBP": {"quality": 90, "method": 4},
+        "WEBP_LOSSLESS": {"lossless": True, "quality": 50, "method": 4},
+    },
+    "smallest": {
+        "PNG": {"compress_level": 9, "optimize": True},
+        "JPEG": {"quality": 85, "subsampling": "4:2:0", "optimize": True, "progressive": True},
+        "WEBP": {"quality": 80, "method": 6},
+        "WEBP_LOSSLESS": {"lossless": True, "quality": 90, "method": 5},
+    },
+}
+
+_EXTENSIONS = {"PNG": ".png", "JPEG": ".jpg", "WEBP": ".webp", "WEBP_LOSSLESS": ".webp"}
+_PIL_FORMATS = {"PNG": "PNG", "JPEG": "JPEG", "WEBP": "WEBP", "WEBP_LOSSLESS": "WEBP"}
+
+
+def extension_for(fmt):
+    """File extension for an output format name."""
+    return _EXTENSIONS[fmt]
+
+
+def format_for_path(path):
+    """Output format implied by a file name, or None for formats without a profile."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".png":
+        return "PNG"
+    if ext in (".jpg", ".jpeg"):
+        return "JPEG"
+    if ext == ".webp":
+        return "WEBP"
+    return None
+
+
+def save_options(fmt, profile=DEFAULT_PROFILE):
+    """(PIL format, save() keyword arguments) for a format / profile pair."""
+    return _PIL_FORMATS[fmt], dict(PROFILES[profile][fmt])
+
+
+def save_image(image, path, fmt=None, profile=DEFAULT_PROFILE):
+    """
+    Save a PIL image with the given profile. 'fmt' defaults to the format
+    implied by 'path'; unknown extensions are saved with Pillow defaults.
+    """
+    fmt = fmt or format_for_path(path)
+    if fmt is None:
+        image.save(path)
+        return
+    pil_format, options = save_options(fmt, profile)
+    if fmt == "JPEG" and image.mode not in ("RGB", "L", "CMYK"):
+        image = image.convert("RGB")
+    image.save(path, pil_format, **options)
+
+
+def cv2_imwrite_params(fmt, profile=DEFAULT_PROFILE):
+    """cv2.imwrite() parameter list matching the profile as closely as OpenCV allows."""
+    import cv2
+
+    options = PROFILES[profile][fmt]
+    if fmt == "PNG":
+        strategy = {
+            zlib.Z_FILTERED: cv2.IMWRITE_PNG_STRATEGY_FILTERED,
+            zlib.Z_RLE: cv2.IMWRITE_PNG_STRATEGY_RLE,
+        }.get(options.get("compress_type"), cv2.IMWRITE_PNG_STRATEGY_DEFAULT)
+        level = 9 if options.get("optimize") else options["compress_level"]
+        return [cv2.IMWRITE_PNG_COMPRESSION, level, cv2.IMWRITE_PNG_STRATEGY, strategy]
+    if fmt == "JPEG":
+        return [cv2.IMWRITE_JPEG_QUALITY, options["quality"],
+                cv2.IMWRITE_JPEG_OPTIMIZE, int(options["optimize"]),
+                cv2.IMWRITE_JPEG_PROGRESSIVE, int(options["progressive"])]
+    if fmt == "WEBP":
+        return [cv2.IMWRITE_WEBP_QUALITY, options["quality"]]
+    # OpenCV switches WebP to lossless for quality > 100
+    return [cv2.IMWRITE_WEBP_QUALITY, 101]
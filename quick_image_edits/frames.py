@@ -0,0 +1,123 @@
+"""
+Multi-frame images (animated GIF / WebP / PNG, multipage TIFF).
+
+Frames are read lazily with ImageSequence, one at a time, and written
+back out as they are produced:
+  GIF  - streamed frame by frame with Pillow's GIF header/frame writers
+  TIFF - streamed page by page with AppendingTiffWriter
+  MPO  - Pillow's MPO writer, so .jpg / .mpo outputs stay JPEG-readable
+  other animated formats go through save_all(), which Pillow buffers.
+
+Pillow is imported by the functions that need it, so expand_frames() and
+the header helpers cost nothing to import.
+"""
+from quick_image_edits.sources import ImageEntry
+
+
+def frame_count(im):
+    return getattr(im, "n_frames", 1)
+
+
+def is_multi_frame(im):
+    return frame_count(im) > 1
+
+
+def iter_frames(im, transform=None):
+    """
+    Yield (frame, info) for every frame of an open image without keeping
+    earlier frames alive. 'transform' (e.g. a crop) is applied to each
+    frame; 'info' holds the per-frame duration.
+    """
+    from PIL import ImageSequence
+
+    for frame in ImageSequence.Iterator(im):
+        info = {"duration": frame.info.get("duration", im.info.get("duration", 0))}
+        yield (transform(frame) if transform else frame.copy()), info
+
+
+def _to_gif_frame(frame):
+    """Palette frame + transparency index for the GIF writer."""
+    if frame.mode == "P":
+        return frame, frame.info.get("transparency")
+    rgba = frame.convert("RGBA")
+    # 255 colors + one reserved transparent index
+    paletted = rgba.convert("RGB").quantize(255)
+    palette = paletted.getpalette()[:255 * 3]
+    paletted.putpalette(palette + [0] * (256 * 3 - len(palette)))
+    transparent = rgba.getchannel("A").point(lambda a: 255 if a < 128 else 0)
+    if transparent.getbbox() is None:
+        return paletted, None
+    paletted.paste(255, mask=transparent)
+    return paletted, 255
+
+
+def save_gif_stream(frames, path, loop=0):
+    """Write (frame, info) pairs to an animated GIF one frame at a time."""
+    from PIL import GifImagePlugin
+
+    with open(path, "wb") as fp:
+        first = True
+        for frame, info in frames:
+            gif_frame, transparency = _to_gif_frame(frame)
+            if first:
+                header, _ = GifImagePlugin.getheader(gif_frame, info={"loop": loop})
+                fp.write(b"".join(header))
+                first = False
+            params = {"include_color_table": True, "duration": info.get("duration", 0),
+                      "disposal": 2 if transparency is not None else 1}
+            if transparency is not None:
+                params["transparency"] = transparency
+            for chunk in GifImagePlugin.getdata(gif_frame, (0, 0), **params):
+                fp.write(chunk)
+        fp.write(b";")  # GIF trailer
+
+
+def save_tiff_stream(frames, path, **options):
+    """Write (frame, info) pairs to a multipage TIFF one page at a time."""
+    from PIL import TiffImagePlugin
+
+    with open(path, "w+b") as fp:
+        with TiffImagePlugin.AppendingTiffWriter(fp) as tf:
+            for frame, _ in frames:
+                frame.save(tf, "TIFF", **options)
+                tf.newFrame()
+
+
+def save_frames(frames, path, source):
+    """
+    Save (frame, info) pairs to 'path' in the format of the 'source' image
+    they came from (loop count and format are taken from it).
+    """
+    fmt = source.format
+    if fmt == "GIF":
+        save_gif_stream(frames, path, loop=source.info.get("loop", 0))
+    elif path.lower().endswith((".tif", ".tiff")):
+        save_tiff_stream(frames, path)
+    elif fmt == "MPO":
+        frames = (frame.convert("RGB") for frame, _ in frames)
+        first = next(frames)
+        first.save(path, "MPO", save_all=True, append_images=frames)
+    else:
+        frames = iter(frames)
+        first, info = next(frames)
+        first.save(path, fmt, save_all=True, append_images=(f for f, _ in frames),
+                   duration=info.get("duration", 0), loop=source.info.get("loop", 0))
+
+
+def expand_frames(entries):
+    """
+    Turn every multi-frame entry into one ImageEntry per frame (frame index
+    set), leaving single-frame entries as they are. Only headers are read.
+    """
+    for entry in entries:
+        try:
+            with entry.open() as im:
+                count = frame_count(im)
+        except Exception as e:
+            print(f"Skipping file '{entry}' due to error: {e}")
+            continue
+        if count == 1:
+            yield entry
+            continue
+        for index in range(count):
+            yield ImageEntry(entry.name, entry.path, entry.member, frame=index)
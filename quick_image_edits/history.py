@@ -0,0 +1,167 @@
+"""
+Edit history: PhotoEditor slider snapshots and ColorMaskGUI brush strokes.
+
+EditHistory keeps snapshots of the slider values (a few floats each), never
+images; undo / redo hand back a snapshot and the caller re-renders it.
+FrameCache holds a handful of rendered preview (proxy) frames keyed by
+their parameters, evicting the least recently used, so stepping back and
+forth through recent states doesn't re-render at all. Both are bounded,
+so memory stays the same however long the session runs.
+
+StrokeHistory undoes brush strokes on a boolean mask. A stroke sets
+pixels to one value, so it is stored as the flat indices of the pixels it
+actually flipped plus that value (a sparse delta), never as a mask copy.
+"""
+import collections
+
+MAX_HISTORY = 500      # Undo steps kept; each one is a dict of slider values
+FRAME_CACHE_SIZE = 8   # Rendered proxy frames kept
+MAX_STROKES = 100      # Brush strokes kept for undo
+
+
+def params_key(params):
+    """Hashable, rounding-tolerant key for a dict of slider values."""
+    return tuple((name, round(float(value), 4)) for name, value in sorted(params.items()))
+
+
+class EditHistory:
+    """Linear undo / redo over parameter snapshots."""
+
+    def __init__(self, initial, limit=MAX_HISTORY):
+        self._undo = collections.deque(maxlen=limit)
+        self._redo = []
+        self.current = dict(initial)
+
+    def reset(self, initial):
+        """Forget all steps (e.g. when a new image is opened)."""
+        self._undo.clear()
+        self._redo.clear()
+        self.current = dict(initial)
+
+    def push(self, params):
+        """Record a new state; returns False if it equals the current one."""
+        if params_key(params) == params_key(self.current):
+            return False
+        self._undo.append(self.current)
+        self.current = dict(params)
+        self._redo.clear()
+        return True
+
+    def undo(self):
+        """Step back; returns the snapshot to restore, or None at the oldest state."""
+        if not self._undo:
+            return None
+        self._redo.append(self.current)
+        self.current = self._undo.pop()
+        return dict(self.current)
+
+    def redo(self):
+        """Step forward again; returns the snapshot to restore, or None."""
+        if not self._redo:
+            return None
+        self._undo.append(self.current)
+        self.current = self._redo.pop()
+        return dict(self.current)
+
+    @property
+    def can_undo(self):
+        return bool(self._undo)
+
+    @property
+    def can_redo(self):
+        return bool(self._redo)
+
+
+class FrameCache:
+    """Least-recently-used cache of rendered frames, keyed by params_key()."""
+
+    def __init__(self, size=FRAME_CACHE_SIZE):
+        self.size = size
+        self._frames = collections.OrderedDict()
+
+    def get(self, params):
+        key = params_key(params)
+        frame = self._frames.get(key)
+        if frame is not None:
+            self._frames.move_to_end(key)
+        return frame
+
+    def put(self, params, frame):
+        key = params_key(params)
+        self._frames[key] = frame
+        self._frames.move_to_end(key)
+        while len(self._frames) > self.size:
+            self._frames.popitem(last=False)
+
+    def clear(self):
+        self._frames.clear()
+
+
+class Stroke:
+    """Pixels one brush stroke set to 'value': flat indices and their bounding box."""
+
+    def __init__(self, value):
+        self.value = value
+        self.chunks = []
+        self.box = None   # (top, bottom, left, right), exclusive ends
+
+    def record(self, indices, box):
+        self.chunks.append(indices)
+        if self.box is None:
+            self.box = box
+        else:
+            self.box = (min(self.box[0], box[0]), max(self.box[1], box[1]),
+                        min(self.box[2], box[2]), max(self.box[3], box[3]))
+
+    def finish(self):
+        import numpy as np
+
+        self.indices = np.concatenate(self.chunks) if self.chunks else np.empty(0, dtype=np.intp)
+        self.chunks = None
+        return self
+
+
+class StrokeHistory:
+    """Linear undo / redo of brush strokes on one boolean mask (sparse deltas)."""
+
+    def __init__(self, limit=MAX_STROKES):
+        self._undo = collections.deque(maxlen=limit)
+        self._redo = []
+
+    def reset(self):
+        self._undo.clear()
+        self._redo.clear()
+
+    def push(self, stroke):
+        """Record a finished stroke; strokes that changed nothing are dropped."""
+        if stroke.box is None:
+            return False
+        self._undo.append(stroke.finish())
+        self._redo.clear()
+        return True
+
+    def undo(self, mask):
+        """Revert the last stroke on 'mask'; returns its box to redraw, or None."""
+        if not self._undo:
+            return None
+        stroke = self._undo.pop()
+        mask.flat[stroke.indices] = not stroke.value
+        self._redo.append(stroke)
+        return stroke.box
+
+    def redo(self, mask):
+        """Apply the last undone stroke again; returns its box, or None."""
+        if not self._redo:
+            return None
+        stroke = self._redo.pop()
+        mask.flat[stroke.indices] = stroke.value
+        self._undo.append(stroke)
+        return stroke.box
+
+    @property
+    def can_undo(self):
+        return bool(self._undo)
+
+    @property
+    def can_redo(self):
+        return bool(self._redo)
@@ -0,0 +1,37 @@
+"""
+Homography between two images from corresponding points, and warping one
+image onto the other (the non-interactive half of image_matcher.py).
+"""
+import cv2
+import numpy as np
+
+from quick_image_edits.instrument import stage
+
+METHODS = {"least_squares": 0, "ransac": cv2.RANSAC, "lmeds": cv2.LMEDS}
+
+
+def find_homography(points1, points2, method="ransac", threshold=5.0):
+    """
+    3x3 homography mapping points1 onto points2 (lists of (x, y), at least
+    4 pairs). 'method' is "least_squares", "ransac" or "lmeds"; 'threshold'
+    is the RANSAC reprojection error in pixels.
+    """
+    if len(points1) != len(points2):
+        raise ValueError("Number of points selected in Image 1 and Image 2 do not match!")
+    if len(points1) < 4:
+        raise ValueError("At least 4 point pairs are needed for a homography")
+    # Convert to NumPy arrays of shape (N, 1, 2)
+    pts1 = np.array(points1, dtype=np.float32).reshape(-1, 1, 2)
+    pts2 = np.array(points2, dtype=np.float32).reshape(-1, 1, 2)
+    with stage("findHomography"):
+        H, _ = cv2.findHomography(pts1, pts2, METHODS[method], threshold)
+    if H is None:
+        raise ValueError("Could not compute a homography from these points")
+    return H
+
+
+def warp_onto(image1, image2, H):
+    """Warp image1 (BGR array) with H into the frame of image2."""
+    height, width = image2.shape[:2]
+    with stage("warpPerspective"):
+        return cv2.warpPerspective(image1, H, (width, height))
@@ -0,0 +1,163 @@
+"""
+HSV histogram index of one image, for ColorMaskGUI.
+
+HSVIndex bins every pixel's OpenCV HSV value into a 3D histogram (hue at
+full resolution, saturation / value in bins of 4) once, then turns it into
+a summed-volume table: entry (i, j, k) holds the number of pixels in all
+bins below (i, j, k). Any H/S/V box then costs 8 lookups, whatever the
+image size:
+
+    count(box) = sum over the 8 box corners of +-table[corner]
+
+so the GUI can show how much a threshold selects while the sliders move,
+without an inRange over the image. Box edges inside a saturation / value
+bin are interpolated linearly (counts are exact on bin edges and for hue).
+
+suggest() proposes a threshold box around a seed colour by region growing
+in histogram space: starting from the densest bin near the seed, it adds
+neighbouring bins that hold at least a fraction of that peak, and returns
+the bounding box of what it reached.
+"""
+import collections
+
+import cv2
+import numpy as np
+
+from quick_image_edits.instrument import stage
+
+BINS = (180, 64, 64)       # Hue (OpenCV 0-179) at full resolution, S / V in bins of 4
+RANGES = (180, 256, 256)   # Value range of each channel
+STRIP_PIXELS = 4_000_000   # Rows histogrammed per calcHist call while building
+GROW_FRACTION = 0.02       # suggest(): bins with at least this share of the peak join
+MAX_REGION_BINS = 20_000   # suggest(): stop growing after this many bins
+
+
+class HSVIndex:
+    """3D HSV histogram with a summed-volume table (see the module docstring)."""
+
+    def __init__(self, histogram):
+        self.histogram = histogram
+        self.widths = tuple(r / n for r, n in zip(RANGES, BINS))
+        self.total = int(histogram.sum())
+        # Zero-padded in front, so table[i, j, k] = pixels in bins [0, i) x [0, j) x [0, k)
+        table = np.zeros(tuple(n + 1 for n in BINS), dtype=np.int64)
+        table[1:, 1:, 1:] = histogram.cumsum(0).cumsum(1).cumsum(2)
+        self.table = table
+
+    @classmethod
+    def from_hsv(cls, hsv):
+        """Index of an HSV image (uint8, H in 0-179)."""
+        histogram = np.zeros(BINS, dtype=np.int64)
+        rows = max(1, STRIP_PIXELS // max(1, hsv.shape[1]))
+        with stage("hsv_index"):
+            # In strips: calcHist returns float32 counts, exact only below 2**24
+            for top in range(0, hsv.shape[0], rows):
+                strip = np.ascontiguousarray(hsv[top:top + rows])
+                histogram += cv2.calcHist([strip], [0, 1, 2], None, list(BINS),
+                                          [0, RANGES[0], 0, RANGES[1], 0, RANGES[2]]).astype(np.int64)
+        return cls(histogram)
+
+    @classmethod
+    def from_bgr(cls, image):
+        with stage("cvtColor"):
+            hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+        return cls.from_hsv(hsv)
+
+    def _cumulative(self, point):
+        """Pixels below 'point' (continuous bin coordinates), interpolating the table."""
+        corners = []
+        for x, n in zip(point, BINS):
+            i = min(int(x), n - 1)
+            corners.append(((i, 1.0 - (x - i)), (i + 1, x - i)))
+        result = 0.0
+        for i, wi in corners[0]:
+            for j, wj in corners[1]:
+                for k, wk in corners[2]:
+                    weight = wi * wj * wk
+                    if weight:
+                        result += weight * self.table[i, j, k]
+        return result
+
+    def count(self, lower, upper):
+        """
+        Pixels with lower <= (H, S, V) <= upper on every channel (inclusive,
+        like inRange). A hue range with lower > upper wraps past 179 to 0.
+        """
+        if lower[0] > upper[0]:
+            return (self.count(lower, (RANGES[0] - 1,) + tuple(upper[1:]))
+                    + self.count((0,) + tuple(lower[1:]), upper))
+        low, high = [], []
+        for lo, hi, width, n in zip(lower, upper, self.widths, BINS):
+            if hi < lo:
+                return 0
+            low.append(min(max(lo, 0) / width, n))
+            high.append(min((hi + 1) / width, n))
+        total = 0.0
+        for corner in range(8):
+            point = [high[axis] if corner >> axis & 1 else low[axis] for axis in range(3)]
+            # Inclusion-exclusion: + for an even number of lower edges
+            sign = -1 if (3 - bin(corner).count("1")) % 2 else 1
+            total += sign * self._cumulative(point)
+        return max(0, int(round(total)))
+
+    def coverage(self, lower, upper):
+        """Share (0-1) of the image inside the box."""
+        return self.count(lower, upper) / self.total if self.total else 0.0
+
+    def bin_of(self, hsv):
+        return tuple(min(int(value // width), n - 1)
+                     for value, width, n in zip(hsv, self.widths, BINS))
+
+    def suggest(self, seed, grow_fraction=GROW_FRACTION, max_bins=MAX_REGION_BINS):
+        """
+        (lower, upper) HSV threshold around the colour 'seed', grown over the
+        histogram: the connected bins (6-neighbourhood) holding at least
+        grow_fraction of the nearby peak. Hue is circular, so the box for
+        reds may wrap (lower hue > upper hue).
+        """
+        hist = self.histogram
+
+        def neighbours(cell):
+            for axis in range(3):
+                for step in (-1, 1):
+                    other = list(cell)
+                    other[axis] += step
+                    if axis == 0:
+                        other[0] %= BINS[0]
+                        yield tuple(other)
+                    elif 0 <= other[axis] < BINS[axis]:
+                        yield tuple(other)
+
+        # Climb to the densest nearby bin, so a seed on the edge of a colour
+        # cluster still grows the whole cluster
+        start = self.bin_of(seed)
+        peak = start
+        for _ in range(32):
+            best = max(neighbours(peak), key=lambda cell: hist[cell])
+            if hist[best] <= hist[peak]:
+                break
+            peak = best
+
+        limit = max(1, hist[peak] * grow_fraction)
+        region = {start, peak}
+        queue = collections.deque(region)
+        while queue and len(region) < max_bins:
+            for other in neighbours(queue.popleft()):
+                if other not in region and hist[other] >= limit:
+                    region.add(other)
+                    queue.append(other)
+
+        cells = np.array(list(region))
+        # Hue: the shortest arc holding every reached bin, i.e. the circle
+        # minus its largest empty gap
+        hues = np.unique(cells[:, 0])
+        gaps = np.diff(np.append(hues, hues[0] + BINS[0]))
+        after_gap = int(np.argmax(gaps))
+        first, last = hues[(after_gap + 1) % len(hues)], hues[after_gap]
+        lower = [int(first * self.widths[0])]
+        upper = [int((last + 1) * self.widths[0]) - 1]
+        for axis in (1, 2):
+            width, top = self.widths[axis], RANGES[axis] - 1
+            lower.append(int(cells[:, axis].min() * width))
+            upper.append(min(int((cells[:, axis].max() + 1) * width) - 1, top))
+        return tuple(lower), tuple(upper)
@@ -0,0 +1,204 @@
+"""
+Opt-in per-stage timing and memory instrumentation.
+
+Set QUICK_IMAGE_EDITS_TRACE=1 to record every stage (decode, cvtColor,
+inRange, compositing, resize, PhotoImage conversion, encode, ...). Set it
+to a file name, e.g. QUICK_IMAGE_EDITS_TRACE=trace.json (or pass --trace
+to the batch scripts), to also write a Chrome trace at exit that can be
+opened in chrome://tracing or https://ui.perfetto.dev. A per-stage table
+is printed at exit, and the GUIs show a live overlay (see stage_overlay).
+
+Memory is the peak of Python-tracked allocations during the stage
+(tracemalloc, which also sees NumPy arrays); Pillow's internal image
+buffers are not tracked. tracemalloc's peak is process-wide, so it is
+only recorded for stages that ran while no other thread was inside a
+stage; stages that overlapped (e.g. pipeline worker threads) report no
+peak and are marked "overlapped" in the Chrome trace. When instrumentation is off, stage() returns a
+shared no-op context manager, so the wrapped code pays almost nothing.
+"""
+import os
+import json
+import time
+import atexit
+import threading
+import contextlib
+import tracemalloc
+
+ENV_VAR = "QUICK_IMAGE_EDITS_TRACE"
+
+_enabled = False
+_trace_path = None
+_lock = threading.Lock()
+_local = threading.local()      # per-thread stack of open stages
+_events = []                    # Chrome trace events
+_recent = []                    # (name, seconds, peak bytes or None) since the last take_recent()
+_totals = {}                    # name -> [count, total seconds, max seconds, max peak bytes or None]
+_busy_threads = 0               # Threads with an open stage
+_overlaps = 0                   # Times a thread opened a stage while another had one open
+_NULL = contextlib.nullcontext()
+
+
+def enabled():
+    return _enabled
+
+
+def enable(trace_path=None):
+    """Turn instrumentation on; with 'trace_path' a Chrome trace is written at exit."""
+    global _enabled, _trace_path
+    if trace_path:
+        _trace_path = trace_path
+    if _enabled:
+        return
+    _enabled = True
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    atexit.register(_at_exit)
+
+
+class _Stage:
+    __slots__ = ("name", "start", "base", "peak", "overlaps")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        global _busy_threads, _overlaps
+        stack = _local.__dict__.setdefault("stack", [])
+        with _lock:
+            if not stack:
+                _busy_threads += 1
+                if _busy_threads > 1:
+                    _overlaps += 1
+            # Any change by the time we exit means another thread's stage overlapped
+            self.overlaps = _overlaps
+            alone = _busy_threads == 1
+        if alone:
+            if stack:
+                # Fold the parent's peak so far in before resetting the counter
+                parent = stack[-1]
+                parent.peak = max(parent.peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.reset_peak()
+        self.base = tracemalloc.get_traced_memory()[0]
+        self.peak = 0
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        global _busy_threads
+        end = time.perf_counter()
+        stack = _local.stack
+        stack.pop()
+        with _lock:
+            overlapped = _overlaps != self.overlaps or _busy_threads > 1
+            if not stack:
+                _busy_threads -= 1
+        if overlapped:
+            peak = None
+        else:
+            peak = max(self.peak, tracemalloc.get_traced_memory()[1])
+            if stack:
+                stack[-1].peak = max(stack[-1].peak, peak)
+            peak = max(peak - self.base, 0)
+        _record(self.name, self.start, end, peak)
+        return False
+
+
+def stage(name):
+    """Context manager timing one stage: `with instrument.stage("decode"): ...`."""
+    return _Stage(name) if _enabled else _NULL
+
+
+def _record(name, start, end, peak):
+    duration = end - start
+    with _lock:
+        _events.append({
+            "name": name, "ph": "X", "pid": os.getpid(), "tid": threading.get_ident(),
+            # perf_counter is system-wide monotonic, so worker processes line up
+            "ts": start * 1e6, "dur": duration * 1e6,
+            "args": {"overlapped": True} if peak is None else {"peak_kb": round(peak / 1024)},
+        })
+        _recent.append((name, duration, peak))
+        del _recent[:-200]
+        _add_total(name, duration, peak)
+
+
+def _add_total(name, duration, peak):
+    totals = _totals.setdefault(name, [0, 0.0, 0.0, None])
+    totals[0] += 1
+    totals[1] += duration
+    totals[2] = max(totals[2], duration)
+    if peak is not None:
+        totals[3] = peak if totals[3] is None else max(totals[3], peak)
+
+
+def take_recent():
+    """(name, seconds, peak bytes or None if overlapped) of the stages finished since the last call."""
+    with _lock:
+        recent = list(_recent)
+        _recent.clear()
+    return recent
+
+
+def summary():
+    """
+    Per-stage table: count, total, mean, max time and max peak memory
+    ("-" if every run of the stage overlapped another thread's).
+    """
+    with _lock:
+        rows = sorted(_totals.items(), key=lambda item: -item[1][1])
+    lines = [f"{'stage':<24} {'count':>6} {'total':>10} {'mean':>10} {'max':>10} {'peak MB':>8}"]
+    for name, (count, total, longest, peak) in rows:
+        peak_text = "-" if peak is None else f"{peak / 1e6:.1f}"
+        lines.append(f"{name:<24} {count:>6} {total * 1000:>8.1f}ms "
+                     f"{total / count * 1000:>8.1f}ms {longest * 1000:>8.1f}ms "
+                     f"{peak_text:>8}")
+    return "\n".join(lines)
+
+
+def call_traced(func, *args, **kwargs):
+    """
+    Run func in a worker process with instrumentation on and return
+    (result, events) so the parent can merge() the worker's stages.
+    """
+    enable()
+    with _lock:
+        start = len(_events)
+    result = func(*args, **kwargs)
+    with _lock:
+        events = _events[start:]
+        del _events[start:]
+    return result, events
+
+
+def merge(events):
+    """Add stage events recorded in another process (see call_traced)."""
+    with _lock:
+        for event in events:
+            _events.append(event)
+            peak_kb = event["args"].get("peak_kb")
+            _add_total(event["name"], event["dur"] / 1e6,
+                       None if peak_kb is None else peak_kb * 1024)
+
+
+def export_trace(path):
+    """Write the recorded stages as Chrome trace JSON."""
+    with _lock:
+        events = list(_events)
+    with open(path, "w") as f:
+        json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, f)
+
+
+def _at_exit():
+    if not _totals:
+        return
+    print(summary())
+    if _trace_path:
+        export_trace(_trace_path)
+        print(f"Stage trace written to {_trace_path}")
+
+
+# Turned on from the environment, so every script supports it without a flag
+_env = os.environ.get(ENV_VAR, "").strip()
+if _env and _env.lower() not in ("0", "false", "no"):
+    enable(None if _env.lower() in ("1", "true", "yes") else _env)
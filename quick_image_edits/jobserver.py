@@ -0,0 +1,478 @@
+"""
+Local job server: one shared, core-capped process pool for everyone's
+crop / adjust / mask / collage and homography jobs on a workstation.
+
+Jobs are posted as JSON over HTTP, either on localhost (TCP) or on a Unix
+socket:
+
+    POST   /jobs        {"kind": "pipeline" | "homography", "priority": 0, "spec": {...}}
+    GET    /jobs        status of every job
+    GET    /jobs/<id>   status of one job
+    DELETE /jobs/<id>   cancel the tasks of a job that have not started
+    GET    /stats       workers, queue length, images/s over the last minute
+
+"pipeline" specs are job files (see quick_image_edits.streaming) with
+absolute paths. Without a collage step a pipeline job is split into one
+task per image, so a big batch doesn't hold a core for its whole run and
+higher-priority work can start between its files. "homography" specs are
+{"points1", "points2", "method", "threshold"} plus optional "image1",
+"image2" and "output" to write image1 warped onto image2.
+
+Tasks wait in a priority queue (higher priority first, then FIFO) and
+are handed to the pool only when a worker is free.
+"""
+import os
+import json
+import time
+import heapq
+import signal
+import socket
+import itertools
+import threading
+import collections
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from http.client import HTTPConnection
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from quick_image_edits.frames import expand_frames
+from quick_image_edits.sources import iter_images
+from quick_image_edits.streaming import prepare_job, run_job, save_dirs
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+THROUGHPUT_WINDOW = 60.0  # Seconds covered by the images/s figure
+MAX_CRASHES = 2           # Broken pools a task may be caught in before it fails
+KINDS = ("pipeline", "homography")
+
+
+def default_workers():
+    """Leave one core for the desktop / GUIs."""
+    return max(1, (os.cpu_count() or 2) - 1)
+
+
+# ========== Worker functions (run in the pool) ==========
+
+def _ignore_sigint():
+    # Ctrl+C in the server terminal is handled by the server, which then
+    # shuts the pool down cleanly
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+def run_pipeline_task(job, entries):
+    """Run the job steps on some entries (None = the job's whole input)."""
+    count, collage_path = run_job(job, entries=entries)
+    return {"images": count, "collage": collage_path}
+
+
+def run_homography_task(spec):
+    import cv2
+    from quick_image_edits.homography import find_homography, warp_onto
+
+    H = find_homography(spec["points1"], spec["points2"], spec.get("method", "ransac"),
+                        spec.get("threshold", 5.0))
+    result = {"images": 0, "homography": H.tolist()}
+    if spec.get("output"):
+        img1 = cv2.imread(spec["image1"])
+        img2 = cv2.imread(spec["image2"])
+        if img1 is None or img2 is None:
+            raise ValueError("Could not load image1 / image2")
+        cv2.imwrite(spec["output"], warp_onto(img1, img2, H))
+        result.update(images=1, output=spec["output"])
+    return result
+
+
+# ========== Scheduler ==========
+
+class Job:
+    """Book-keeping for one submitted job (all fields are read under the scheduler lock)."""
+
+    def __init__(self, job_id, kind, priority, spec, tasks):
+        self.id = job_id
+        self.kind = kind
+        self.priority = priority
+        self.spec = spec
+        self.tasks = tasks          # list of (function, args)
+        self.done = 0
+        self.failed = 0
+        self.running = 0
+        self.cancelled = False
+        self.images = 0
+        self.results = []
+        self.errors = []
+        self.submitted = time.time()
+        self.started = None
+        self.finished = None
+
+    @property
+    def state(self):
+        if self.finished is not None:
+            if self.cancelled:
+                return "cancelled"
+            return "failed" if self.failed else "done"
+        if self.cancelled:
+            return "cancelling"
+        return "running" if self.started is not None else "queued"
+
+    def status(self):
+        return {
+            "id": self.id, "kind": self.kind, "priority": self.priority, "state": self.state,
+            "tasks": len(self.tasks), "done": self.done, "failed": self.failed,
+            "running": self.running, "images": self.images,
+            "submitted": self.submitted, "started": self.started, "finished": self.finished,
+            "results": self.results[-20:], "errors": self.errors[-20:],
+        }
+
+
+class Scheduler:
+    """Priority queue of tasks in front of a fixed-size process pool."""
+
+    def __init__(self, workers=None):
+        self.workers = workers or default_workers()
+        self.pool = self._new_pool()
+        self.lock = threading.RLock()
+        self._wakeup = threading.Condition(self.lock)
+        self._stopping = False
+        self.jobs = {}
+        self._queue = []                 # heap of (-priority, seq, job_id, task index)
+        self._seq = itertools.count()
+        self._ids = itertools.count(1)
+        self._running = 0
+        self._crashes = {}               # (job_id, task index) -> broken pools it was in
+        self._suspects = 0               # Running tasks that were in a broken pool before
+        self._completed = collections.deque()  # (finish time, images) for throughput
+        self._started = time.time()
+        # Tasks are handed to the pool from one thread, never from the
+        # pool's own callbacks
+        self._dispatcher = threading.Thread(target=self._dispatch_loop, daemon=True)
+        self._dispatcher.start()
+
+    def _new_pool(self):
+        return ProcessPoolExecutor(max_workers=self.workers, initializer=_ignore_sigint)
+
+    def _restart_pool(self, error):
+        """Replace a broken pool (a worker died, e.g. OOM-killed) (lock held)."""
+        print(f"Worker pool broke ({error}); starting a new one")
+        broken, self.pool = self.pool, self._new_pool()
+        # Its remaining futures have already failed; don't wait on it
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    # ---- submission ----
+    def submit(self, kind, spec, priority=0):
+        """Validate and queue a job; returns its id. Raises ValueError on bad specs."""
+        if kind not in KINDS:
+            raise ValueError(f"Unknown job kind {kind!r} (expected one of {', '.join(KINDS)})")
+        if kind == "pipeline":
+            job_spec = prepare_job(spec, os.getcwd())
+            tasks = self._pipeline_tasks(job_spec)
+        else:
+            for key in ("points1", "points2"):
+                if key not in spec:
+                    raise ValueError(f"Homography job needs {key!r}")
+            tasks = [(run_homography_task, (spec,))]
+
+        with self.lock:
+            job = Job(str(next(self._ids)), kind, int(priority), spec, tasks)
+            self.jobs[job.id] = job
+            for index in range(len(tasks)):
+                self._push(job, index)
+            if not tasks:
+                job.finished = time.time()
+            self._wakeup.notify()
+        return job.id
+
+    @staticmethod
+    def _pipeline_tasks(job):
+        if any("collage" in step for step in job["steps"]):
+            # A collage needs the whole stream in one process
+            return [(run_pipeline_task, (job, None))]
+        if "input" not in job:
+            raise ValueError("Pipeline job needs an 'input' folder or archive")
+        entries = iter_images(job["input"], recursive=job.get("recursive", False),
+                              skip_dirs=save_dirs(job))
+        if job.get("frames"):
+            entries = expand_frames(entries)
+        return [(run_pipeline_task, (job, [entry])) for entry in entries]
+
+    def cancel(self, job_id):
+        with self.lock:
+            job = self.jobs[job_id]
+            if job.finished is None:
+                job.cancelled = True
+                if job.running == 0:
+                    job.finished = time.time()
+            return job.status()
+
+    # ---- dispatch ----
+    def _dispatch_loop(self):
+        with self.lock:
+            while not self._stopping:
+                self._dispatch()
+                self._wakeup.wait()
+
+    def _dispatch(self):
+        """Start queued tasks while workers are free (lock held)."""
+        # A task that was in a broken pool runs alone, so if it kills its
+        # worker again it takes no other task with it
+        deferred = []
+        while self._running < self.workers and self._queue and not self._suspects:
+            entry = heapq.heappop(self._queue)
+            _, _, job_id, index = entry
+            job = self.jobs[job_id]
+            if job.cancelled:
+                continue
+            suspect = (job_id, index) in self._crashes
+            if suspect and self._running:
+                deferred.append(entry)   # Keeps its place in the queue
+                continue
+            func, args = job.tasks[index]
+            if job.started is None:
+                job.started = time.time()
+            job.running += 1
+            self._running += 1
+            self._suspects += suspect
+            pool = self.pool
+            try:
+                future = pool.submit(func, *args)
+            except BrokenProcessPool as e:
+                # Never started: back in the queue for the fresh pool
+                self._restart_pool(e)
+                self._task_stopped(job, index)
+                self._push(job, index)
+                continue
+            future.add_done_callback(
+                lambda f, job=job, index=index, pool=pool: self._task_done(job, index, pool, f))
+        for entry in deferred:
+            heapq.heappush(self._queue, entry)
+
+    def _push(self, job, index):
+        heapq.heappush(self._queue, (-job.priority, next(self._seq), job.id, index))
+
+    def _task_done(self, job, index, pool, future):
+        with self.lock:
+            self._task_stopped(job, index)
+            key = (job.id, index)
+            try:
+                result = future.result()
+            except BrokenProcessPool as e:
+                if pool is self.pool and not self._stopping:
+                    self._restart_pool(e)
+                # Every task in the pool gets this error, not just the one
+                # whose worker died: retry each (alone) before failing it
+                crashes = self._crashes.pop(key, 0) + 1
+                if job.cancelled or self._stopping:
+                    self._task_finished(job)
+                    return
+                if crashes < MAX_CRASHES:
+                    self._crashes[key] = crashes
+                    self._push(job, index)
+                    self._wakeup.notify()
+                    return
+                self._task_finished(job, error=f"worker died {MAX_CRASHES} times ({e})")
+            except Exception as e:
+                self._crashes.pop(key, None)
+                self._task_finished(job, error=e)
+            else:
+                self._crashes.pop(key, None)
+                self._task_finished(job, result=result)
+
+    def _task_stopped(self, job, index):
+        """A task of 'job' is no longer running (lock held)."""
+        self._running -= 1
+        job.running -= 1
+        if (job.id, index) in self._crashes:
+            self._suspects -= 1
+
+    def _task_finished(self, job, result=None, error=None):
+        """
+        Book one finished or failed task of 'job' (lock held, task already
+        stopped); neither result nor error for a task of a cancelled job.
+        """
+        if error is not None:
+            job.failed += 1
+            job.errors.append(str(error))
+        elif result is not None:
+            job.done += 1
+            job.images += result["images"]
+            self._completed.append((time.time(), result["images"]))
+            if len(job.tasks) == 1 or result.get("collage"):
+                job.results.append(result)
+        if job.done + job.failed == len(job.tasks) or (job.cancelled and job.running == 0):
+            job.finished = time.time()
+        self._wakeup.notify()
+
+    # ---- reporting ----
+    def status(self, job_id=None):
+        with self.lock:
+            if job_id is not None:
+                return self.jobs[job_id].status()
+            return [job.status() for job in self.jobs.values()]
+
+    def stats(self):
+        with self.lock:
+            now = time.time()
+            while self._completed and now - self._completed[0][0] > THROUGHPUT_WINDOW:
+                self._completed.popleft()
+            images = sum(n for _, n in self._completed)
+            window = min(THROUGHPUT_WINDOW, now - self._started) or 1.0
+            states = collections.Counter(job.state for job in self.jobs.values())
+            return {
+                "workers": self.workers,
+                "running_tasks": self._running,
+                # Cancelled jobs' tasks stay in the heap until popped
+                "queued_tasks": sum(1 for _, _, job_id, _ in self._queue
+                                    if not self.jobs[job_id].cancelled),
+                "jobs": dict(states),
+                "images_per_second": images / window,
+                "tasks_last_minute": len(self._completed),
+                "uptime": now - self._started,
+            }
+
+    def shutdown(self):
+        with self.lock:
+            self._stopping = True
+            self._queue.clear()
+            self._wakeup.notify()
+        self.pool.shutdown(wait=True, cancel_futures=True)
+
+
+# ========== HTTP front end ==========
+
+class JobRequestHandler(BaseHTTPRequestHandler):
+    server_version = "QuickImageEdits/1.0"
+
+    @property
+    def scheduler(self):
+        return self.server.scheduler
+
+    def address_string(self):
+        # Unix socket peers have no (host, port) address
+        return self.client_address[0] if self.client_address else "unix"
+
+    def _send(self, code, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _job_id(self):
+        parts = self.path.strip("/").split("/")
+        return parts[1] if len(parts) == 2 and parts[0] == "jobs" else None
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._send(200, self.scheduler.stats())
+        elif self.path.rstrip("/") == "/jobs":
+            self._send(200, self.scheduler.status())
+        elif self._job_id():
+            try:
+                self._send(200, self.scheduler.status(self._job_id()))
+            except KeyError:
+                self._send(404, {"error": "no such job"})
+        else:
+            self._send(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path.rstrip("/") != "/jobs":
+            self._send(404, {"error": "not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            job_id = self.scheduler.submit(request.get("kind", "pipeline"), request.get("spec", {}),
+                                           request.get("priority", 0))
+        except (ValueError, TypeError, KeyError, OSError) as e:
+            self._send(400, {"error": str(e)})
+            return
+        self._send(201, {"id": job_id})
+
+    def do_DELETE(self):
+        try:
+            self._send(200, self.scheduler.cancel(self._job_id()))
+        except KeyError:
+            self._send(404, {"error": "no such job"})
+
+
+class UnixHTTPServer(ThreadingHTTPServer):
+    address_family = socket.AF_UNIX
+
+    def server_bind(self):
+        # Skip HTTPServer.server_bind(): it expects a (host, port) address
+        if os.path.exists(self.server_address):
+            os.unlink(self.server_address)
+        self.socket.bind(self.server_address)
+        self.server_name = "localhost"
+        self.server_port = 0
+
+
+def make_server(scheduler, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_socket=None):
+    """HTTP server bound to localhost:port, or to 'unix_socket' if given."""
+    if unix_socket:
+        server = UnixHTTPServer(unix_socket, JobRequestHandler)
+    else:
+        server = ThreadingHTTPServer((host, port), JobRequestHandler)
+    server.daemon_threads = True
+    server.scheduler = scheduler
+    return server
+
+
+# ========== Client ==========
+
+class _UnixHTTPConnection(HTTPConnection):
+    def __init__(self, path, timeout=30):
+        super().__init__("localhost", timeout=timeout)
+        self.unix_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.unix_path)
+
+
+class JobClient:
+    """Talks to a running job server on localhost:port or a Unix socket."""
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, unix_socket=None):
+        self.host = host
+        self.port = port
+        self.unix_socket = unix_socket
+
+    def _request(self, method, path, payload=None):
+        if self.unix_socket:
+            conn = _UnixHTTPConnection(self.unix_socket)
+        else:
+            conn = HTTPConnection(self.host, self.port, timeout=30)
+        try:
+            body = json.dumps(payload).encode() if payload is not None else None
+            conn.request(method, path, body=body, headers={"Content-Type": "application/json"})
+            response = conn.getresponse()
+            data = json.loads(response.read() or b"null")
+        finally:
+            conn.close()
+        if response.status >= 400:
+            raise ValueError(data.get("error", f"HTTP {response.status}"))
+        return data
+
+    def submit(self, kind, spec, priority=0):
+        return self._request("POST", "/jobs", {"kind": kind, "spec": spec, "priority": priority})["id"]
+
+    def status(self, job_id=None):
+        return self._request("GET", "/jobs" if job_id is None else f"/jobs/{job_id}")
+
+    def cancel(self, job_id):
+        return self._request("DELETE", f"/jobs/{job_id}")
+
+    def stats(self):
+        return self._request("GET", "/stats")
+
+    def wait(self, job_id, poll=0.5, on_progress=None):
+        """Block until the job has finished; returns its final status."""
+        while True:
+            status = self.status(job_id)
+            if on_progress is not None:
+                on_progress(status)
+            if status["finished"] is not None:
+                return status
+            time.sleep(poll)
@@ -0,0 +1,191 @@
+"""
+Collage layouts shared by the collage tools and the pipeline runner.
+
+simple_collage() lays out already decoded images side by side, top to
+bottom or in a grid; simple_layout() and justified_layout() (Flickr-style
+justified rows) compute tile placements from image sizes alone, so
+callers can decode each image straight to its tile size.
+"""
+import math
+
+from PIL import Image
+
+from quick_image_edits.resample import fast_resize
+
+
+def justified_rows(aspects, target_width, row_height, spacing=0):
+    """
+    Break a sequence of aspect ratios (w / h) into rows that exactly fill
+    'target_width', choosing the breaks so that the row heights stay as
+    close as possible to 'row_height' (dynamic programming, like text
+    justification). A row stops growing once its height would drop below
+    half of 'row_height', so the work is linear in the number of images.
+
+    Returns a list of (start, end, height) tuples; images start..end-1 form
+    one row with the given (float) height. The last row is never stretched
+    above 'row_height'.
+    """
+    n = len(aspects)
+    # prefix[i] = sum of aspects[:i]
+    prefix = [0.0] * (n + 1)
+    for i, a in enumerate(aspects):
+        prefix[i + 1] = prefix[i] + a
+
+    inf = float("inf")
+    best = [inf] * (n + 1)   # best[j] = cost of laying out images[:j]
+    best[0] = 0.0
+    breaks = [0] * (n + 1)   # breaks[j] = start index of the row ending at j
+
+    for j in range(1, n + 1):
+        for i in range(j - 1, -1, -1):
+            count = j - i
+            height = (target_width - spacing * (count - 1)) / (prefix[j] - prefix[i])
+            if height <= 0:
+                break
+            if j == n and height > row_height:
+                cost = 0.0   # last row keeps row_height and is left ragged
+            else:
+                cost = ((height - row_height) / row_height) ** 2
+            if best[i] + cost < best[j]:
+                best[j] = best[i] + cost
+                breaks[j] = i
+            if height < row_height * 0.5:
+                break        # adding more images only makes the row flatter
+
+    rows = []
+    j = n
+    while j > 0:
+        i = breaks[j]
+        height = (target_width - spacing * (j - i - 1)) / (prefix[j] - prefix[i])
+        if j == n:
+            height = min(height, row_height)
+        rows.append((i, j, height))
+        j = i
+    rows.reverse()
+    return rows
+
+
+def justified_layout(sizes, target_width, row_height, spacing=0):
+    """
+    Compute tile placements for images of the given (w, h) sizes.
+    Returns ([(x, y, w, h), ...], (collage_width, collage_height)).
+    """
+    aspects = [w / float(h) for w, h in sizes]
+    placements = []
+    y_offset = 0
+    for start, end, height in justified_rows(aspects, target_width, row_height, spacing):
+        tile_h = max(1, int(round(height)))
+        x = 0.0
+        for idx in range(start, end):
+            x_start = int(round(x))
+            x += aspects[idx] * height
+            tile_w = max(1, int(round(x)) - x_start)
+            placements.append((x_start, y_offset, tile_w, tile_h))
+            x += spacing
+        y_offset += tile_h + spacing
+    total_height = max(y_offset - spacing, 1)
+    return placements, (target_width, total_height)
+
+
+def simple_layout(sizes, layout, spacing=0, columns=1):
+    """
+    Tile placements for side by side ("horizontal"), top to bottom
+    ("vertical") or "grid" layout of full-size images of the given (w, h)
+    sizes. Returns ([(x, y, w, h), ...], (collage_width, collage_height)).
+    """
+    if layout == "horizontal":
+        # SIDE-BY-SIDE
+        total_width = sum(w for w, _ in sizes) + spacing * (len(sizes) - 1)
+        max_height = max(h for _, h in sizes)
+
+        placements = []
+        x_offset = 0
+        for w, h in sizes:
+            placements.append((x_offset, 0, w, h))
+            x_offset += w + spacing
+        return placements, (total_width, max_height)
+
+    if layout == "vertical":
+        # TOP-TO-BOTTOM
+        total_height = sum(h for _, h in sizes) + spacing * (len(sizes) - 1)
+        max_width = max(w for w, _ in sizes)
+
+        placements = []
+        y_offset = 0
+        for w, h in sizes:
+            placements.append((0, y_offset, w, h))
+            y_offset += h + spacing
+        return placements, (max_width, total_height)
+
+    # GRID LAYOUT
+    # Calculate how many rows we need
+    total_images = len(sizes)
+    rows = math.ceil(total_images / columns)
+
+    # We need to find:
+    #  - max width of each column
+    #  - max height of each row
+    # so we can position images in a table-like layout.
+    col_widths = [0] * columns
+    row_heights = [0] * rows
+
+    # Assign each image to a row, col in row-major order
+    for idx, (w, h) in enumerate(sizes):
+        r = idx // columns
+        c = idx % columns
+        # Update max col width / row height
+        col_widths[c] = max(col_widths[c], w)
+        row_heights[r] = max(row_heights[r], h)
+
+    # Compute total collage size
+    total_width = sum(col_widths) + spacing * (columns - 1)
+    total_height = sum(row_heights) + spacing * (rows - 1)
+
+    # Position images row by row, at the top-left of their cell
+    placements = []
+    y_offset = 0
+    for r in range(rows):
+        x_offset = 0
+        for c in range(columns):
+            idx = r * columns + c
+            if idx < total_images:
+                w, h = sizes[idx]
+                placements.append((x_offset, y_offset, w, h))
+            x_offset += col_widths[c] + spacing
+        y_offset += row_heights[r] + spacing
+    return placements, (total_width, total_height)
+
+
+def simple_collage(images, layout, spacing=0, columns=1):
+    """
+    Side by side ("horizontal"), top to bottom ("vertical") or "grid"
+    layout of full-size PIL images on a white background.
+    """
+    placements, collage_size = simple_layout([img.size for img in images], layout, spacing, columns)
+    collage = Image.new("RGB", collage_size, color=(255, 255, 255))
+    for img, (x, y, _, _) in zip(images, placements):
+        collage.paste(img, (x, y))
+    return collage
+
+
+def justified_collage(images, target_width, row_height, spacing=0):
+    """Justified rows of already decoded images, each resized to its tile."""
+    placements, collage_size = justified_layout([im.size for im in images],
+                                                target_width, row_height, spacing)
+    collage = Image.new("RGB", collage_size, color=(255, 255, 255))
+    for im, (x, y, w, h) in zip(images, placements):
+        collage.paste(fast_resize(im, (w, h)), (x, y))
+    return collage
+
+
+def contact_collage(thumbs, columns, cell_size, spacing=0):
+    """Uniform grid of thumbnails, each centered in a cell_size x cell_size cell."""
+    rows = math.ceil(len(thumbs) / columns)
+    sheet = Image.new("RGB", (columns * cell_size + spacing * (columns - 1),
+                              rows * cell_size + spacing * (rows - 1)), color=(255, 255, 255))
+    step = cell_size + spacing
+    for idx, thumb in enumerate(thumbs):
+        r, c = divmod(idx, columns)
+        sheet.paste(thumb, (c * step + (cell_size - thumb.width) // 2,
+                            r * step + (cell_size - thumb.height) // 2))
+    return sheet
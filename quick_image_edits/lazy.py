@@ -0,0 +1,27 @@
+"""
+Background preloading of the heavy libraries (OpenCV, NumPy, Pillow).
+
+The GUIs import these where they are used, so the window appears before
+they are loaded. preload() then imports them on a worker thread while the
+user is still looking at the empty window, so the first "Open" does not
+pay for them either.
+"""
+import importlib
+import threading
+
+
+def preload(*names):
+    """Import the modules 'names' on a background thread; returns the thread."""
+    def run():
+        for name in names:
+            try:
+                importlib.import_module(name)
+            except ImportError:
+                # Reported by the feature that needs it, when it is used
+                pass
+
+    # Not a daemon: exiting right after startup waits for the import to
+    # finish instead of tearing down a half-initialised extension module
+    thread = threading.Thread(target=run, name="preload")
+    thread.start()
+    return thread
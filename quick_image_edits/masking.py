@@ -0,0 +1,147 @@
+"""
+The ColorMaskGUI HSV masking as plain functions, so it can run without a
+window (see quick_image_edits.streaming).
+
+Images are OpenCV-style uint8 arrays; pass code=cv2.COLOR_RGB2HSV for
+RGB arrays (e.g. np.asarray() of a PIL image) instead of BGR.
+
+A selection is a list of HSV ranges, each (lower, upper) or
+(lower, upper, include). A hue range with lower > upper wraps around
+(e.g. 170-10 for reds). range_mask() turns the list into three 256-entry
+bitmask lookup tables, where bit i of LUT_H[h] says whether hue h is
+inside range i, and so on. One pass of LUT_H[h] & LUT_S[s] & LUT_V[v]
+then tests every range at once, so adding ranges (up to MAX_RANGES)
+costs next to nothing.
+
+Large images are converted, masked and composited in strips on a thread
+pool, each writing into one preallocated result (quick_image_edits.strips).
+"""
+import cv2
+import numpy as np
+
+from quick_image_edits import strips
+from quick_image_edits.instrument import stage
+
+HSV_MIN = (0, 0, 0)
+HSV_MAX = (179, 255, 255)   # OpenCV hue is 0-179
+MAX_RANGES = 32             # Ranges one range_mask() pass evaluates (bits of a uint32)
+
+
+def hsv_mask(image, lower=HSV_MIN, upper=HSV_MAX, removed=None, code=cv2.COLOR_BGR2HSV):
+    """
+    uint8 mask (255 = keep) of the pixels whose HSV value lies inside
+    [lower, upper] (hue wraps if lower > upper). 'removed' is an optional
+    boolean array of pixels the user erased; they are always dropped from
+    the mask.
+    """
+    return range_mask(to_hsv(image, code), [(lower, upper)], removed)
+
+
+def to_hsv(image, code=cv2.COLOR_BGR2HSV):
+    """cv2.cvtColor(image, code) for 3-channel images, in strips when large."""
+    hsv = np.empty(image.shape, dtype=np.uint8)
+    with stage("cvtColor"):
+        strips.map_array(lambda src, dst: cv2.cvtColor(src, code, dst=dst), image, hsv)
+    return hsv
+
+
+def parse_range(spec):
+    """(lower, upper, include) from a tuple or a job-file dict {"lower", "upper", "exclude"}."""
+    if isinstance(spec, dict):
+        return (tuple(spec.get("lower", HSV_MIN)), tuple(spec.get("upper", HSV_MAX)),
+                not spec.get("exclude", False))
+    lower, upper, *include = spec
+    return tuple(lower), tuple(upper), bool(include[0]) if include else True
+
+
+def wraps(lower, upper):
+    """True for a hue range that wraps past 179 back to 0."""
+    return lower[0] > upper[0]
+
+
+def range_luts(ranges):
+    """
+    Bitmask lookup tables for up to MAX_RANGES ranges. Returns
+    ((LUT_H, LUT_S, LUT_V), include bits, exclude bits): bit i of LUT_c[x]
+    is set when value x is inside range i on channel c.
+    """
+    ranges = [parse_range(spec) for spec in ranges]
+    if len(ranges) > MAX_RANGES:
+        raise ValueError(f"At most {MAX_RANGES} HSV ranges, got {len(ranges)}")
+    dtype = np.uint8 if len(ranges) <= 8 else np.uint16 if len(ranges) <= 16 else np.uint32
+    luts = [np.zeros(256, dtype=dtype) for _ in range(3)]
+    include = exclude = 0
+    values = np.arange(256)
+    for i, (lower, upper, keep) in enumerate(ranges):
+        bit = dtype(1 << i)
+        for channel in range(3):
+            lo, hi = lower[channel], upper[channel]
+            if channel == 0 and lo > hi:
+                inside = (values >= lo) | (values <= hi)
+            else:
+                inside = (values >= lo) & (values <= hi)
+            luts[channel][inside] |= bit
+        if keep:
+            include |= 1 << i
+        else:
+            exclude |= 1 << i
+    return tuple(luts), dtype(include), dtype(exclude)
+
+
+def range_mask(hsv, ranges, removed=None):
+    """
+    uint8 mask (255 = keep) of an HSV image: pixels inside at least one
+    include range and no exclude range (with only exclude ranges, every
+    pixel that is not excluded). 'removed' as for hsv_mask().
+    """
+    ranges = [parse_range(spec) for spec in ranges]
+    if len(ranges) == 1 and ranges[0][2] and not wraps(*ranges[0][:2]):
+        # A single plain box: inRange is quicker than the lookups
+        lower, upper, _ = ranges[0]
+        lower, upper = np.array(lower, dtype=np.uint8), np.array(upper, dtype=np.uint8)
+        mask = np.empty(hsv.shape[:2], dtype=np.uint8)
+        with stage("inRange"):
+            strips.map_array(lambda src, dst: cv2.inRange(src, lower, upper, dst=dst), hsv, mask)
+    else:
+        luts, include, exclude = range_luts(ranges)
+        # One 3-channel table, so cv2.LUT maps H, S and V in one call.
+        # OpenCV has no uint32 tables; int32 holds the same bits.
+        table = np.stack(luts, axis=-1)[np.newaxis]
+        if table.dtype == np.uint32:
+            table = table.view(np.int32)
+        mask = np.empty(hsv.shape[:2], dtype=np.uint8)
+
+        def strip(src, dst):
+            # Temporaries are per strip, so memory stays bounded
+            bits = cv2.LUT(src, table).view(luts[0].dtype)
+            combined = bits[..., 0] & bits[..., 1]
+            combined &= bits[..., 2]
+            if include:
+                keep = (combined & include) != 0
+            else:
+                keep = np.ones(combined.shape, dtype=bool)
+            if exclude:
+                keep &= (combined & exclude) == 0
+            np.multiply(keep, 255, out=dst, casting="unsafe")
+
+        with stage("rangeLUT"):
+            strips.map_array(strip, hsv, mask)
+    if removed is not None:
+        with stage("erase"):
+            mask[removed] = 0
+    return mask
+
+
+def white_background(image, mask):
+    """Copy of 'image' with every pixel outside 'mask' turned white."""
+    out = np.empty_like(image)
+
+    def strip(top, bottom):
+        part = image[top:bottom]
+        masked = cv2.bitwise_and(part, part, mask=mask[top:bottom])
+        # Like the GUI always did: any channel that ends up 0 is painted white
+        np.copyto(out[top:bottom], np.where(masked == 0, np.uint8(255), masked))
+
+    with stage("composite"):
+        strips.run(strip, *image.shape[:2])
+    return out
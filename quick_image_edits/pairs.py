@@ -0,0 +1,215 @@
+"""
+Two-image collages: the helpers behind image_collager_two_imgs.py, shared
+by its GUI (TwoImageCollageApp) and its headless --folders / --pairs mode.
+"""
+import os
+import csv
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from PIL import Image
+
+from quick_image_edits import encoders, instrument
+from quick_image_edits.resample import image_size, open_scaled, scale_image
+from quick_image_edits.sources import iter_images
+
+
+# ========== Collage Helpers ==========
+
+def make_collage(img1, img2, layout="horizontal", spacing=0):
+    """
+    Combine two RGB images into one collage.
+    layout == "horizontal" => side by side (heights matched to the smaller one)
+    layout == "vertical"   => top to bottom (widths matched to the smaller one)
+    """
+    if layout == "horizontal":
+        # SIDE BY SIDE: match heights
+        min_height = min(img1.height, img2.height)
+
+        # Scale both images to the smaller height
+        scaled_img1 = scale_image(img1, target_height=min_height)
+        scaled_img2 = scale_image(img2, target_height=min_height)
+
+        total_width = scaled_img1.width + scaled_img2.width + spacing
+        collage = Image.new("RGB", (total_width, min_height), color=(255, 255, 255))
+
+        x_offset = 0
+        collage.paste(scaled_img1, (x_offset, 0))
+        x_offset += scaled_img1.width + spacing
+        collage.paste(scaled_img2, (x_offset, 0))
+
+    else:
+        # VERTICAL: match widths
+        min_width = min(img1.width, img2.width)
+
+        # Scale both images to the smaller width
+        scaled_img1 = scale_image(img1, target_width=min_width)
+        scaled_img2 = scale_image(img2, target_width=min_width)
+
+        total_height = scaled_img1.height + scaled_img2.height + spacing
+        collage = Image.new("RGB", (min_width, total_height), color=(255, 255, 255))
+
+        y_offset = 0
+        collage.paste(scaled_img1, (0, y_offset))
+        y_offset += scaled_img1.height + spacing
+        collage.paste(scaled_img2, (0, y_offset))
+
+    return collage
+
+
+def make_collage_from_paths(first, second, layout="horizontal", spacing=0):
+    """
+    Same as make_collage, but reads both headers first so each image is
+    decoded directly at (or near) its final size.
+    """
+    w1, h1 = image_size(first)
+    w2, h2 = image_size(second)
+    with instrument.stage("decode"):
+        if layout == "horizontal":
+            min_height = min(h1, h2)
+            img1 = open_scaled(first, target_height=min_height)
+            img2 = open_scaled(second, target_height=min_height)
+        else:
+            min_width = min(w1, w2)
+            img1 = open_scaled(first, target_width=min_width)
+            img2 = open_scaled(second, target_width=min_width)
+    # Both are already at the target size, so make_collage only pastes
+    with instrument.stage("collage"):
+        return make_collage(img1, img2, layout, spacing)
+
+
+# ========== Batch Mode ==========
+
+# Output folders of earlier runs are never picked up as input
+SKIP_DIRS = ("collages",)
+
+
+def pairs_from_folders(folder1, folder2, match="name", recursive=False):
+    """
+    Build (first, second, output_stem) tuples from two folders (or zip /
+    tar archives), listed in natural order.
+    match == "name"  => pair files with the same relative name (extension ignored)
+    match == "index" => pair the i-th file of each folder
+    """
+    if match == "index":
+        entries1 = list(iter_images(folder1, recursive=recursive, skip_dirs=SKIP_DIRS))
+        entries2 = list(iter_images(folder2, recursive=recursive, skip_dirs=SKIP_DIRS))
+        if len(entries1) != len(entries2):
+            print(f"Warning: {len(entries1)} vs {len(entries2)} images, "
+                  f"extra files will be ignored.")
+        return unique_stems([
+            (e1, e2, os.path.splitext(e1.name)[0])
+            for e1, e2 in zip(entries1, entries2)
+        ])
+
+    # Match by relative file name without extension
+    by_stem = {}
+    for e2 in iter_images(folder2, recursive=recursive, skip_dirs=SKIP_DIRS):
+        stem = os.path.splitext(e2.name)[0]
+        if stem in by_stem:
+            # e.g. a.png and a.jpg: keep the first in natural order
+            print(f"Ignoring '{e2.name}': '{by_stem[stem].name}' in {folder2} has the same name")
+            continue
+        by_stem[stem] = e2
+    pairs = []
+    for e1 in iter_images(folder1, recursive=recursive, skip_dirs=SKIP_DIRS):
+        stem = os.path.splitext(e1.name)[0]
+        e2 = by_stem.get(stem)
+        if e2 is None:
+            print(f"Skipping '{e1.name}': no matching image in {folder2}")
+            continue
+        pairs.append((e1, e2, stem))
+    return unique_stems(pairs)
+
+
+def unique_stems(pairs):
+    """
+    Give pairs whose output stems clash (case-insensitively, as on Windows /
+    macOS file systems) a numbered stem ("a", "a_2", ...), so no collage
+    overwrites another.
+    """
+    used = set()
+    result = []
+    for first, second, stem in pairs:
+        unique, n = stem, 1
+        while unique.lower() in used:
+            n += 1
+            unique = f"{stem}_{n}"
+        if unique != stem:
+            print(f"Output name '{stem}' is used more than once; saving '{first}' as '{unique}'")
+        used.add(unique.lower())
+        result.append((first, second, unique))
+    return result
+
+
+def pairs_from_csv(csv_path):
+    """
+    Read (first_path, second_path, output_stem) tuples from a CSV file.
+    Each row is: first_image,second_image[,output_name]
+    Relative paths are resolved against the CSV's folder. An optional
+    header row starting with "first,second" is skipped.
+    """
+    base_dir = os.path.dirname(os.path.abspath(csv_path))
+    pairs = []
+    with open(csv_path, newline="") as f:
+        for i, row in enumerate(csv.reader(f)):
+            row = [cell.strip() for cell in row]
+            if len(row) < 2 or not row[0] or row[0].startswith("#"):
+                continue
+            if i == 0 and [c.lower() for c in row[:2]] == ["first", "second"]:
+                continue
+            first = os.path.join(base_dir, row[0])
+            second = os.path.join(base_dir, row[1])
+            if len(row) > 2 and row[2]:
+                stem = os.path.splitext(row[2])[0]
+            else:
+                stem = os.path.splitext(os.path.basename(row[0]))[0]
+            pairs.append((first, second, stem))
+    return unique_stems(pairs)
+
+
+def collage_pair_job(first, second, output_path, layout, spacing, save_format,
+                     profile=encoders.DEFAULT_PROFILE):
+    """Open, combine and save one pair. Runs inside a worker process."""
+    collage = make_collage_from_paths(first, second, layout, spacing)
+    os.makedirs(os.path.dirname(output_path), exist_ok=True)  # stems may contain subfolders
+    with instrument.stage("encode"):
+        encoders.save_image(collage, output_path, save_format, profile)
+    return output_path
+
+
+def batch_collage(pairs, output_dir, layout="horizontal", spacing=0,
+                  save_format="PNG", workers=None, profile=encoders.DEFAULT_PROFILE):
+    """
+    Build one collage per (first, second, output_stem) pair on a process pool.
+    Returns the number of collages written.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    extension = encoders.extension_for(save_format)
+
+    done = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {}
+        for first, second, stem in pairs:
+            output_path = os.path.join(output_dir, f"{stem}_collage{extension}")
+            job_args = (first, second, output_path, layout, spacing, save_format, profile)
+            if instrument.enabled():
+                # Bring the worker's stage timings back into this process's trace
+                future = pool.submit(instrument.call_traced, collage_pair_job, *job_args)
+            else:
+                future = pool.submit(collage_pair_job, *job_args)
+            futures[future] = (first, second)
+
+        for future in as_completed(futures):
+            first, second = futures[future]
+            try:
+                output_path = future.result()
+                if instrument.enabled():
+                    output_path, events = output_path
+                    instrument.merge(events)
+                print(f"Saved: {output_path}")
+                done += 1
+            except Exception as e:
+                print(f"Failed to process '{first}' + '{second}': {e}")
+
+    print(f"Batch done: {done}/{len(pairs)} collages written to {output_dir}")
+    return done
@@ -0,0 +1,171 @@
+"""
+Pipelined batch executor: decode -> transform -> encode.
+
+Each stage runs on its own thread(s) and the stages are connected by
+bounded queues, so while one file is being compressed the next one is
+already being decoded. Pillow and zlib release the GIL for decoding,
+resampling and encoding, so the stages overlap across cores.
+
+Per-stage stats tell where the bottleneck is:
+  busy    - time spent inside the stage function
+  starved - time waiting for input (the upstream stage is slower)
+  blocked - time waiting to hand off output (the downstream stage is slower)
+"""
+import time
+import queue
+import threading
+
+from quick_image_edits import instrument
+
+_DONE = object()  # End-of-stream marker, one per worker of the receiving stage
+
+
+class StageStats:
+    """Timing counters for one pipeline stage (summed over its workers)."""
+
+    def __init__(self, name, workers):
+        self.name = name
+        self.workers = workers
+        self.items = 0
+        self.failed = 0
+        self.busy = 0.0
+        self.starved = 0.0
+        self.blocked = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, busy=0.0, starved=0.0, blocked=0.0, items=0, failed=0):
+        with self._lock:
+            self.busy += busy
+            self.starved += starved
+            self.blocked += blocked
+            self.items += items
+            self.failed += failed
+
+    def utilisation(self, wall_time):
+        """Fraction of the available worker time spent doing actual work."""
+        if wall_time <= 0:
+            return 0.0
+        return self.busy / (wall_time * self.workers)
+
+    def summary(self, wall_time):
+        per_item = self.busy / self.items * 1000 if self.items else 0.0
+        return (f"{self.name:>10}: {self.items} items x{self.workers}, "
+                f"busy {self.utilisation(wall_time):5.1%}, {per_item:7.1f} ms/item, "
+                f"starved {self.starved:6.2f}s, blocked {self.blocked:6.2f}s")
+
+
+class PipelineResult:
+    """Stats returned by Pipeline.run()."""
+
+    def __init__(self, stages, wall_time):
+        self.stages = stages
+        self.wall_time = wall_time
+
+    @property
+    def bottleneck(self):
+        return max(self.stages, key=lambda s: s.utilisation(self.wall_time))
+
+    def report(self):
+        lines = [f"Pipeline finished in {self.wall_time:.2f}s"]
+        lines += [stage.summary(self.wall_time) for stage in self.stages]
+        lines.append(f"Bottleneck: {self.bottleneck.name}")
+        return "\n".join(lines)
+
+
+class Pipeline:
+    """
+    Run items through a list of stages, each given as (name, func, workers).
+    func(payload) returns the payload for the next stage; returning None
+    drops the item. An exception drops the item and is reported through
+    on_error(item, stage_name, exception), which prints by default.
+    """
+
+    def __init__(self, stages, queue_size=4, on_error=None):
+        self.stages = stages
+        self.queue_size = queue_size
+        self.on_error = on_error or self._print_error
+
+    @staticmethod
+    def _print_error(item, stage_name, error):
+        print(f"Failed to process {item} ({stage_name}): {error}")
+
+    def run(self, items, task=None):
+        """
+        Feed 'items' (any iterable) into the first stage and wait until the
+        last stage has finished every item. 'task' is an optional BatchTask:
+        it is advanced once per item leaving the pipeline (finished, dropped
+        or failed), and once it is cancelled no new items are fed (items
+        already in flight still finish).
+        """
+        start = time.perf_counter()
+        stats = [StageStats(name, workers) for name, _, workers in self.stages]
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        advance_lock = threading.Lock()
+
+        def item_finished():
+            if task is not None:
+                with advance_lock:
+                    task.advance()
+
+        threads = []
+        for idx, (name, func, workers) in enumerate(self.stages):
+            in_q = queues[idx]
+            out_q = queues[idx + 1] if idx + 1 < len(queues) else None
+            next_workers = self.stages[idx + 1][2] if out_q is not None else 0
+            remaining = [workers]  # Workers of this stage still running
+            lock = threading.Lock()
+
+            def worker(func=func, name=name, in_q=in_q, out_q=out_q, stage=stats[idx],
+                       next_workers=next_workers, remaining=remaining, lock=lock):
+                while True:
+                    t0 = time.perf_counter()
+                    entry = in_q.get()
+                    t1 = time.perf_counter()
+                    stage.add(starved=t1 - t0)
+                    if entry is _DONE:
+                        break
+
+                    item, payload = entry
+                    try:
+                        with instrument.stage(name):
+                            result = func(payload)
+                    except Exception as e:
+                        stage.add(busy=time.perf_counter() - t1, failed=1)
+                        self.on_error(item, name, e)
+                        item_finished()
+                        continue
+                    t2 = time.perf_counter()
+                    stage.add(busy=t2 - t1, items=1)
+
+                    if result is None or out_q is None:
+                        item_finished()
+                    else:
+                        out_q.put((item, result))
+                        stage.add(blocked=time.perf_counter() - t2)
+
+                # The last worker of this stage closes the next one
+                with lock:
+                    remaining[0] -= 1
+                    last = remaining[0] == 0
+                if last and out_q is not None:
+                    for _ in range(next_workers):
+                        out_q.put(_DONE)
+
+            for _ in range(workers):
+                thread = threading.Thread(target=worker, daemon=True)
+                thread.start()
+                threads.append(thread)
+
+        try:
+            for item in items:
+                if task is not None and task.cancelled:
+                    break
+                # The item itself is the first stage's payload
+                queues[0].put((item, item))
+        finally:
+            for _ in range(self.stages[0][2]):
+                queues[0].put(_DONE)
+            for thread in threads:
+                thread.join()
+
+        return PipelineResult(stats, time.perf_counter() - start)
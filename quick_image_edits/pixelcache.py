@@ -0,0 +1,269 @@
+"""
+Optional store of decoded pixels, so huge sources are decoded only once.
+
+The first open of a large image (at least DEFAULT_MIN_PIXELS) decodes it
+as usual and writes the raw array to a .npy file (NumPy's format: a small
+header with shape / dtype, then the pixels) in the store folder. A JSON
+index maps each (source path, mode) to its .npy file and the source's
+size / mtime. Later opens of the unchanged file are a np.load(mmap_mode="r"):
+no decoding and no private copy, and every process that maps the same file
+shares the same page-cache pages. A changed source is decoded again.
+
+Turn it on with QUICK_IMAGE_EDITS_PIXEL_CACHE=1 (store in
+~/.cache/quick_image_edits/pixels) or QUICK_IMAGE_EDITS_PIXEL_CACHE=<folder>.
+The store is kept under max_bytes by dropping the least recently used
+entries. A hit only touches its .npy file's mtime (which is what "recently
+used" means), so reads never rewrite the index; writes to the index are
+serialized across processes by a lock file.
+
+Modes: "RGB" is Pillow's open().convert("RGB") (PhotoEditor, pipeline
+jobs), "BGR" is cv2.imread() (ColorMaskGUI). Arrays from the store are
+read-only.
+"""
+import os
+import json
+import time
+import hashlib
+import contextlib
+
+try:
+    import fcntl
+except ImportError:   # Windows (see PixelStore._locked)
+    fcntl = None
+
+ENV_VAR = "QUICK_IMAGE_EDITS_PIXEL_CACHE"
+INDEX_FILE = "index.json"
+LOCK_FILE = "index.lock"
+DEFAULT_MAX_BYTES = 16 * 1024 ** 3   # 16 GiB of decoded pixels
+DEFAULT_MIN_PIXELS = 16_000_000      # Smaller images decode quickly enough
+ORPHAN_AGE = 60.0                    # Seconds before an unindexed .npy may be removed
+
+
+def default_folder():
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "quick_image_edits", "pixels")
+
+
+def _signature(path):
+    """(size, mtime_ns) of the source, or None if it is gone."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def decode(path, mode="RGB"):
+    """Decode 'path' in full as a NumPy array ("RGB" via Pillow, "BGR" via OpenCV)."""
+    if mode == "BGR":
+        import cv2
+
+        pixels = cv2.imread(path)
+        if pixels is None:
+            raise ValueError(f"Could not read image: {path}")
+        return pixels
+    import numpy as np
+    from PIL import Image
+
+    with Image.open(path) as im:
+        return np.asarray(im.convert("RGB"))
+
+
+class PixelStore:
+    """Decoded images as .npy files plus a JSON index (see the module docstring)."""
+
+    def __init__(self, folder=None, max_bytes=DEFAULT_MAX_BYTES, min_pixels=DEFAULT_MIN_PIXELS):
+        self.folder = folder or default_folder()
+        self.max_bytes = max_bytes
+        self.min_pixels = min_pixels
+        self.index_path = os.path.join(self.folder, INDEX_FILE)
+        self.lock_path = os.path.join(self.folder, LOCK_FILE)
+        os.makedirs(self.folder, exist_ok=True)
+
+    @staticmethod
+    def _key(path, mode):
+        return hashlib.sha1(f"{os.path.abspath(path)}\0{mode}".encode()).hexdigest()
+
+    def _read_index(self):
+        try:
+            with open(self.index_path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable pixel cache index '{self.index_path}': {e}")
+            return {}
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """Hold the store's lock file (other processes may update the index too)."""
+        with open(self.lock_path, "a+b") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            else:
+                import msvcrt   # Windows: retries for ~10 s, then raises OSError
+
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def _write_index(self, entries):
+        """Write the index atomically (temp file + rename); other processes may share it."""
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, self.index_path)
+
+    def get(self, path, mode="RGB"):
+        """Read-only memory map of the stored pixels, or None if missing or stale."""
+        import numpy as np
+
+        key = self._key(path, mode)
+        entry = self._read_index().get(key)
+        signature = _signature(path)
+        if entry is None or signature is None or tuple(entry["signature"]) != signature:
+            return None
+        npy_path = os.path.join(self.folder, entry["file"])
+        try:
+            pixels = np.load(npy_path, mmap_mode="r")
+            # Mark it recently used without writing the index
+            os.utime(npy_path)
+        except (OSError, ValueError):
+            return None
+        return pixels
+
+    def put(self, path, mode, pixels, signature=None):
+        """Store decoded pixels of 'path' and return them memory-mapped from the store."""
+        import numpy as np
+
+        signature = signature or _signature(path)
+        key = self._key(path, mode)
+        file_name = key + ".npy"
+        npy_path = os.path.join(self.folder, file_name)
+        tmp_path = f"{npy_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, np.ascontiguousarray(pixels))
+        os.replace(tmp_path, npy_path)
+
+        with self._locked():
+            entries = self._read_index()
+            entries[key] = {
+                "source": os.path.abspath(path),
+                "mode": mode,
+                "signature": list(signature),
+                "file": file_name,
+                "bytes": os.path.getsize(npy_path),
+            }
+            self._evict(entries, keep=key)
+            self._write_index(entries)
+        return np.load(npy_path, mmap_mode="r")
+
+    def load(self, path, mode="RGB"):
+        """
+        Pixels of 'path': memory-mapped from the store when present, else
+        decoded (and stored, if the image has at least min_pixels).
+        """
+        pixels = self.get(path, mode)
+        if pixels is not None:
+            return pixels
+        # Taken before decoding, so a file replaced meanwhile is not marked fresh
+        signature = _signature(path)
+        pixels = decode(path, mode)
+        if signature is None or pixels.shape[0] * pixels.shape[1] < self.min_pixels:
+            return pixels
+        try:
+            return self.put(path, mode, pixels, signature)
+        except OSError as e:
+            print(f"Could not store decoded pixels of '{path}': {e}")
+            return pixels
+
+    def _evict(self, entries, keep):
+        """Drop least recently used entries until the store fits in max_bytes (lock held)."""
+        # .npy files the index lost track of (e.g. a process died before indexing)
+        known = {entry["file"] for entry in entries.values()}
+        for name in os.listdir(self.folder):
+            file_path = os.path.join(self.folder, name)
+            if name.endswith(".npy") and name not in known:
+                try:
+                    if time.time() - os.path.getmtime(file_path) > ORPHAN_AGE:
+                        os.remove(file_path)
+                except OSError:
+                    pass
+
+        def last_used(item):
+            try:
+                return os.path.getmtime(os.path.join(self.folder, item[1]["file"]))
+            except OSError:
+                return 0.0
+
+        total = sum(entry["bytes"] for entry in entries.values())
+        for key, entry in sorted(entries.items(), key=last_used):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            try:
+                os.remove(os.path.join(self.folder, entry["file"]))
+            except FileNotFoundError:
+                pass
+            except OSError:
+                continue  # Still mapped by another process (Windows)
+            total -= entry["bytes"]
+            del entries[key]
+
+    def clear(self):
+        """Remove every stored image and the index."""
+        for name in os.listdir(self.folder):
+            if name.endswith(".npy") or name in (INDEX_FILE, LOCK_FILE):
+                try:
+                    os.remove(os.path.join(self.folder, name))
+                except OSError:
+                    pass
+
+
+# ========== Default store ==========
+
+_default_store = None
+
+
+def default_store():
+    """The store configured by QUICK_IMAGE_EDITS_PIXEL_CACHE, or None when it is off."""
+    global _default_store
+    value = os.environ.get(ENV_VAR, "").strip()
+    if not value or value.lower() in ("0", "false", "no"):
+        return None
+    if _default_store is None:
+        _default_store = PixelStore(None if value.lower() in ("1", "true", "yes") else value)
+    return _default_store
+
+
+def open_rgb(path):
+    """Image.open(path).convert("RGB"), served from the default store when it is on."""
+    from PIL import Image
+
+    store = default_store()
+    if store is None:
+        with Image.open(path) as im:
+            return im.convert("RGB")
+    # Pillow keeps RGB as 4 bytes per pixel, so this is one copy (not a decode)
+    return Image.fromarray(store.load(path, "RGB"))
+
+
+def imread(path):
+    """cv2.imread(path) (BGR, None if unreadable), served from the default store when it is on."""
+    store = default_store()
+    if store is None:
+        import cv2
+
+        return cv2.imread(path)
+    try:
+        return store.load(path, "BGR")
+    except ValueError:
+        return None
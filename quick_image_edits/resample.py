@@ -0,0 +1,97 @@
+"""
+Resampling helpers shared by the collage and crop tools.
+
+Large downscales are done in steps: JPEG draft decoding (DCT scaling)
+when opening from disk, an integer-factor Image.reduce() box step, and
+a final LANCZOS step that only ever covers the last ~REDUCING_GAP of the
+downscale.
+"""
+from PIL import Image
+
+from quick_image_edits.sources import open_image
+
+# The final LANCZOS step always downscales by at least this factor; everything
+# above it is done by cheap integer box reduction (or JPEG draft decoding).
+REDUCING_GAP = 2.0
+
+
+def fast_resize(image, size):
+    """
+    Resize 'image' to 'size' in two steps: an integer-factor Image.reduce()
+    box step that removes most of the pixels, then a LANCZOS step for the
+    remaining (at most REDUCING_GAP-ish) downscale.
+    """
+    orig_w, orig_h = image.size
+    target_w, target_h = size
+    if (orig_w, orig_h) == (target_w, target_h):
+        return image
+
+    factor_x = int(orig_w / (target_w * REDUCING_GAP))
+    factor_y = int(orig_h / (target_h * REDUCING_GAP))
+    if factor_x > 1 or factor_y > 1:
+        image = image.reduce((max(factor_x, 1), max(factor_y, 1)))
+
+    return image.resize((target_w, target_h), Image.Resampling.LANCZOS)
+
+
+def target_size(size, target_width=None, target_height=None):
+    """Size (w, h) that scale_image would produce for an image of 'size'."""
+    orig_w, orig_h = size
+
+    if target_width and target_height:
+        # If both are given, scale exactly
+        return target_width, target_height
+    elif target_width:
+        # Scale by width, preserve aspect ratio
+        ratio = target_width / float(orig_w)
+        return target_width, int(orig_h * ratio)
+    elif target_height:
+        # Scale by height, preserve aspect ratio
+        ratio = target_height / float(orig_h)
+        return int(orig_w * ratio), target_height
+    else:
+        return orig_w, orig_h  # No scaling
+
+
+def scale_image(image, target_width=None, target_height=None):
+    """Scale 'image' proportionally to match target_width or target_height."""
+    return fast_resize(image, target_size(image.size, target_width, target_height))
+
+
+def open_scaled(path, target_width=None, target_height=None):
+    """
+    Open 'path' (file path or ImageEntry) as RGB already scaled like
+    scale_image would. JPEGs are decoded in draft mode (DCT scaling)
+    straight to a size close to the target, so the full-resolution pixels
+    are never materialized.
+    """
+    with open_image(path) as im:
+        size = target_size(im.size, target_width, target_height)
+        if size != im.size:
+            # draft() keeps the decoded size >= the requested size
+            im.draft("RGB", (int(size[0] * REDUCING_GAP), int(size[1] * REDUCING_GAP)))
+        return fast_resize(im.convert("RGB"), size)
+
+
+def image_size(path):
+    """Read (width, height) from the image header without decoding pixels."""
+    with open_image(path) as im:
+        return im.size
+
+
+def downscale_levels(image, long_sides):
+    """
+    Yield (long_side, image) for each requested long side, largest first.
+    Each level is resized from the previous one (not from the original),
+    so a 1024 px and a 256 px version cost little more than the 1024 alone.
+    Images already smaller than a level are passed through unchanged.
+    """
+    level = image
+    if level.mode in ("1", "P"):
+        level = level.convert("RGBA" if "transparency" in level.info else "RGB")
+    for side in sorted(set(long_sides), reverse=True):
+        w, h = level.size
+        if max(w, h) > side:
+            scale = side / float(max(w, h))
+            level = fast_resize(level, (max(1, round(w * scale)), max(1, round(h * scale))))
+        yield side, level
@@ -0,0 +1,174 @@
+"""
+Lazy image discovery shared by the batch tools.
+
+iter_images() walks a folder with os.scandir (optionally recursively) or
+the members of a zip / tar archive, and yields ImageEntry objects one at
+a time. By default each directory is sorted in natural order ("img2"
+before "img10") for deterministic output, which means a directory is
+listed in full before its first entry is yielded. Only sort=False (raw
+scandir order, no per-directory buffering) lets work start before a huge
+directory has been fully listed.
+
+Archive handles are cached per process and shared between threads; tar
+member reads move the shared file position, so every use of a handle
+holds its lock.
+
+Listing needs only the standard library; Pillow is imported the first
+time an entry is opened.
+"""
+import io
+import os
+import re
+import fnmatch
+import zipfile
+import tarfile
+import functools
+import threading
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".tiff", ".tif", ".bmp", ".gif", ".webp")
+ARCHIVE_EXTENSIONS = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz")
+
+
+def natural_key(text):
+    """Sort key that orders embedded numbers numerically: img2 < img10."""
+    return [int(part) if part.isdigit() else part.lower() for part in re.split(r"(\d+)", text)]
+
+
+def is_archive(path):
+    return os.path.isfile(path) and path.lower().endswith(ARCHIVE_EXTENSIONS)
+
+
+@functools.lru_cache(maxsize=8)
+def _open_archive(path):
+    """
+    (archive, lock): archives stay open per process so member reads don't
+    re-parse the index. Hold the lock while using the archive.
+    """
+    if path.lower().endswith(".zip"):
+        return zipfile.ZipFile(path), threading.Lock()
+    return tarfile.open(path), threading.Lock()
+
+
+class ImageEntry:
+    """
+    One image from a folder or an archive.
+      name   - path relative to the source root ("sub/img1.png"), for output naming
+      path   - file path on disk (the archive itself for archive members)
+      member - archive member name, or None for plain files
+      frame  - frame index of a multi-frame file, or None (see frames.expand_frames)
+    Entries are plain data, so they can be sent to worker processes.
+    """
+
+    __slots__ = ("name", "path", "member", "frame")
+
+    def __init__(self, name, path, member=None, frame=None):
+        self.name = name
+        self.path = path
+        self.member = member
+        self.frame = frame
+
+    def __repr__(self):
+        return f"ImageEntry({str(self)!r})"
+
+    def __str__(self):
+        text = self.path if self.member is None else f"{self.path}/{self.member}"
+        return text if self.frame is None else f"{text} [frame {self.frame}]"
+
+    def read_bytes(self):
+        if self.member is None:
+            with open(self.path, "rb") as f:
+                return f.read()
+        archive, lock = _open_archive(self.path)
+        with lock:
+            if isinstance(archive, zipfile.ZipFile):
+                return archive.read(self.member)
+            return archive.extractfile(self.member).read()
+
+    def open(self):
+        """Open as a (lazy) PIL image, positioned on 'frame' if set."""
+        from PIL import Image
+
+        if self.member is None:
+            im = Image.open(self.path)
+        else:
+            im = Image.open(io.BytesIO(self.read_bytes()))
+        if self.frame:
+            im.seek(self.frame)
+        return im
+
+
+def open_image(source):
+    """Image.open() for either a file path or an ImageEntry."""
+    if isinstance(source, ImageEntry):
+        return source.open()
+    from PIL import Image
+
+    return Image.open(source)
+
+
+def _matches(name, pattern, extensions):
+    if not name.lower().endswith(extensions):
+        return False
+    return pattern is None or fnmatch.fnmatch(name, pattern)
+
+
+def _iter_folder(root, rel_dir, recursive, pattern, sort, extensions, skip_dirs):
+    folder = os.path.join(root, rel_dir) if rel_dir else root
+    try:
+        scanner = os.scandir(folder)
+    except OSError as e:
+        print(f"Skipping folder '{folder}': {e}")
+        return
+
+    with scanner:
+        entries = sorted(scanner, key=lambda e: natural_key(e.name)) if sort else scanner
+        subdirs = []
+        for entry in entries:
+            rel_name = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+            try:
+                if entry.is_dir():
+                    if recursive and entry.name not in skip_dirs:
+                        subdirs.append(rel_name)
+                    continue
+            except OSError:
+                continue
+            if _matches(rel_name, pattern, extensions):
+                yield ImageEntry(rel_name, entry.path)
+
+    # Files of a folder come before its subfolders
+    for rel_name in subdirs:
+        yield from _iter_folder(root, rel_name, recursive, pattern, sort, extensions, skip_dirs)
+
+
+def _iter_archive(path, recursive, pattern, sort, extensions):
+    archive, lock = _open_archive(path)
+    with lock:
+        if isinstance(archive, zipfile.ZipFile):
+            names = [info.filename for info in archive.infolist() if not info.is_dir()]
+        else:
+            names = [member.name for member in archive.getmembers() if member.isfile()]
+    # (relative name, member name): tar members are often stored as "./img.png"
+    names = [(re.sub(r"^(\./)+", "", name), name) for name in names]
+    if not recursive:
+        names = [(name, member) for name, member in names if "/" not in name]
+    if sort:
+        names.sort(key=lambda pair: natural_key(pair[0]))
+    for name, member in names:
+        if _matches(name, pattern, extensions):
+            yield ImageEntry(name, path, member=member)
+
+
+def iter_images(source, recursive=False, pattern=None, sort=True,
+                extensions=IMAGE_EXTENSIONS, skip_dirs=()):
+    """
+    Yield ImageEntry objects for every image in 'source' (a folder, or a
+    zip / tar archive read in place without extracting).
+      recursive - descend into subfolders (archive members in subfolders)
+      pattern   - optional glob matched against the relative name ("*_after.*")
+      sort      - natural sort within each folder; lists each folder in full
+                  before yielding from it (False = raw scandir order, streamed)
+      skip_dirs - subfolder names never descended into (e.g. output folders)
+    """
+    if is_archive(source):
+        return _iter_archive(source, recursive, pattern, sort, extensions)
+    return _iter_folder(source, "", recursive, pattern, sort, extensions, set(skip_dirs))
@@ -0,0 +1,51 @@
+"""
+Live per-stage timing overlay for the GUIs (only shown when
+instrumentation is on, see quick_image_edits.instrument).
+"""
+import tkinter as tk
+
+from quick_image_edits import instrument
+
+# Stages that enclose the others; their sum is the "total" shown
+_TOP_LEVEL = ("update_preview", "update_image")
+
+
+class StageOverlay(tk.Label):
+    """
+    One-line readout of the stages recorded since the last refresh(), e.g.
+    "decode 85.1ms | cvtColor 9.8ms | inRange 3.1ms | total 98.0ms | peak 36.2 MB".
+    Call refresh() at the end of each preview update.
+    """
+
+    def __init__(self, master, **kwargs):
+        kwargs.setdefault("anchor", "w")
+        kwargs.setdefault("justify", tk.LEFT)
+        kwargs.setdefault("font", ("TkFixedFont", 8))
+        kwargs.setdefault("fg", "#004080")
+        super().__init__(master, **kwargs)
+
+    def refresh(self):
+        recent = instrument.take_recent()
+        if not recent:
+            return
+        # Same-named stages (e.g. one per slider step) are summed
+        totals = {}
+        for name, seconds, _ in recent:
+            totals[name] = totals.get(name, 0.0) + seconds
+        parts = [f"{name} {seconds * 1000:.1f}ms" for name, seconds in totals.items()]
+        peaks = [peak for _, _, peak in recent if peak is not None]
+        top_level = sum(seconds for name, seconds, _ in recent if name in _TOP_LEVEL)
+        if top_level:
+            parts.append(f"total {top_level * 1000:.1f}ms")
+        if peaks:
+            parts.append(f"peak {max(peaks) / 1e6:.1f} MB")
+        self.config(text=" | ".join(parts))
+
+
+def attach(master, **pack_options):
+    """Pack a StageOverlay into 'master' if instrumentation is on, else return None."""
+    if not instrument.enabled():
+        return None
+    overlay = StageOverlay(master)
+    overlay.pack(**(pack_options or {"side": tk.BOTTOM, "fill": tk.X}))
+    return overlay
@@ -0,0 +1,401 @@
+"""
+Cross-tool streaming pipeline: crop -> adjust -> mask -> save / collage.
+
+Each file is decoded once; every step is a generator that takes and
+yields (entry, image) pairs, so intermediates stay in memory and only the
+final outputs are written. The chain is described by a JSON job file:
+
+    {
+      "input": "raw/",                 folder or zip / tar archive
+      "recursive": false,
+      "frames": false,                 one item per frame of animated files
+      "steps": [
+        {"crop": [left, upper, right, lower]},
+        {"auto_trim": {"tolerance": 12, "padding": 0}},
+        {"adjust": {"brightness": 1.1, "contrast": 1.2}},
+        {"mask": {"lower": [0, 0, 0], "upper": [179, 255, 200]}},
+        {"save": {"folder": "processed", "format": "PNG", "profile": "balanced"}},
+        {"collage": {"layout": "justified", "path": "figure.png", "target_width": 3000}}
+      ]
+    }
+
+"mask" may list several HSV ranges instead, applied in one pass:
+{"ranges": [{"lower": [170, 50, 50], "upper": [10, 255, 255]},
+{"lower": [0, 0, 0], "upper": [179, 255, 40], "exclude": true}]}
+(a hue range with lower > upper wraps around).
+
+Steps run in the order given and may repeat. "collage" collects the
+stream into one image, so it can only be the last step. Relative paths
+are resolved against the job file's folder.
+
+Each step imports its own heavy dependencies (NumPy, Pillow, OpenCV), so
+loading and validating a job stays cheap and a job only pays for the
+steps it uses.
+"""
+import os
+import json
+
+from quick_image_edits import encoders, instrument
+from quick_image_edits.frames import expand_frames
+from quick_image_edits.sources import iter_images
+
+COLLAGE_LAYOUTS = ("horizontal", "vertical", "grid", "justified", "contact")
+
+COLLAGE_DEFAULTS = {
+    "layout": "grid",
+    "spacing": 0,
+    "columns": 3,
+    "target_width": 3000,
+    "row_height": 400,
+    "cell_size": 256,
+    "path": "collage_output.png",
+    "format": None,          # from the path extension
+    "profile": encoders.DEFAULT_PROFILE,
+}
+
+
+# ========== Steps ==========
+
+def decode(entries):
+    """
+    Open every entry once as an RGB image; unreadable files are skipped.
+    Plain files go through the decoded-pixel store when it is enabled
+    (see quick_image_edits.pixelcache).
+    """
+    from quick_image_edits import pixelcache
+
+    store = pixelcache.default_store()
+    for entry in entries:
+        try:
+            if store is not None and entry.member is None and entry.frame is None:
+                from PIL import Image
+
+                with instrument.stage("decode"):
+                    image = Image.fromarray(store.load(entry.path, "RGB"))
+            else:
+                with instrument.stage("decode"), entry.open() as im:
+                    image = im.convert("RGB")
+        except Exception as e:
+            print(f"Skipping file '{entry}' due to error: {e}")
+            continue
+        yield entry, image
+
+
+def crop_step(stream, box):
+    """Fixed crop box (left, upper, right, lower), e.g. the one drawn in CropTool."""
+    box = tuple(int(v) for v in box)
+    for entry, image in stream:
+        with instrument.stage("crop"):
+            image = image.crop(box)
+        yield entry, image
+
+
+def auto_trim_step(stream, tolerance=None, padding=0):
+    """Trim uniform borders per image (see quick_image_edits.autotrim)."""
+    from quick_image_edits.autotrim import DEFAULT_TOLERANCE, detect_border_box
+
+    if tolerance is None:
+        tolerance = DEFAULT_TOLERANCE
+    for entry, image in stream:
+        with instrument.stage("auto_trim"):
+            box = detect_border_box(image, tolerance, padding)
+            if box:
+                image = image.crop(box)
+        yield entry, image
+
+
+def adjust_step(stream, **params):
+    """PhotoEditor slider values, e.g. brightness=1.1, warmth=0.2."""
+    from quick_image_edits import adjust
+
+    for entry, image in stream:
+        with instrument.stage("adjust"):
+            image = adjust.apply_adjustments(image, params)
+        yield entry, image
+
+
+def mask_step(stream, lower=None, upper=None, ranges=None):
+    """
+    ColorMaskGUI HSV thresholds; pixels outside the range turn white.
+    'ranges' selects several at once instead: a list of
+    {"lower", "upper", "exclude"} objects (see quick_image_edits.masking).
+    """
+    import cv2
+    import numpy as np
+    from PIL import Image
+    from quick_image_edits import masking
+
+    if ranges is None:
+        lower = masking.HSV_MIN if lower is None else lower
+        upper = masking.HSV_MAX if upper is None else upper
+        ranges = [(lower, upper)]
+    for entry, image in stream:
+        with instrument.stage("mask"):
+            arr = np.asarray(image)
+            hsv = masking.to_hsv(arr, cv2.COLOR_RGB2HSV)
+            mask = masking.range_mask(hsv, ranges)
+            image = Image.fromarray(masking.white_background(arr, mask))
+        yield entry, image
+
+
+def scale_step(stream, width=None, height=None, percentage=None):
+    """
+    Resize to 'percentage' of the current size, or with the two-image
+    collager's scale_image() rules for width / height.
+    """
+    from quick_image_edits.resample import fast_resize, scale_image
+
+    for entry, image in stream:
+        with instrument.stage("scale"):
+            if percentage:
+                size = (max(1, round(image.width * percentage / 100.0)),
+                        max(1, round(image.height * percentage / 100.0)))
+                image = fast_resize(image, size)
+            else:
+                image = scale_image(image, target_width=width, target_height=height)
+        yield entry, image
+
+
+def save_step(stream, folder, format="PNG", profile=encoders.DEFAULT_PROFILE):
+    """Write every image under 'folder' (same relative name) and pass it on."""
+    extension = encoders.extension_for(format)
+    for entry, image in stream:
+        name = entry.name if entry.frame is None else f"{os.path.splitext(entry.name)[0]}_{entry.frame}"
+        output_path = os.path.join(folder, os.path.splitext(name)[0] + extension)
+        os.makedirs(os.path.dirname(output_path), exist_ok=True)
+        with instrument.stage("encode"):
+            encoders.save_image(image, output_path, format, profile)
+        print(f"Saved: {output_path}")
+        yield entry, image
+
+
+STEPS = {
+    "crop": crop_step,
+    "auto_trim": auto_trim_step,
+    "adjust": adjust_step,
+    "mask": mask_step,
+    "scale": scale_step,
+    "save": save_step,
+}
+
+
+# ========== Collage sink ==========
+
+def collage(stream, **settings):
+    """
+    Build one collage from the stream (CollageApp layouts) and save it.
+    Contact sheet thumbnails are made as images arrive, so only the
+    thumbnails are kept. The other layouts need every size before anything
+    is placed, so images are spooled to raw .npy files in a temporary
+    folder (justified ones first shrunk to at most the collage width, the
+    widest a tile can be) and read back one at a time while pasting.
+    Returns the output path, or None if the stream was empty.
+    """
+    import tempfile
+    from PIL import Image
+    from quick_image_edits import layouts
+
+    settings = dict(COLLAGE_DEFAULTS, **settings)
+    layout = settings["layout"]
+    cell_size = settings["cell_size"]
+
+    if layout == "contact":
+        thumbs = []
+        for _, image in stream:
+            image.thumbnail((cell_size, cell_size), Image.Resampling.LANCZOS, reducing_gap=2.0)
+            thumbs.append(image)
+        if not thumbs:
+            return None
+        with instrument.stage("collage"):
+            result = layouts.contact_collage(thumbs, settings["columns"], cell_size,
+                                             settings["spacing"])
+    else:
+        with tempfile.TemporaryDirectory(prefix="quick_image_edits_collage_") as spool:
+            sizes = _spool(stream, spool, layout, settings["target_width"])
+            if not sizes:
+                return None
+            with instrument.stage("collage"):
+                result = _spooled_collage(spool, sizes, settings)
+
+    output_path = settings["path"]
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    with instrument.stage("encode"):
+        encoders.save_image(result, output_path, settings["format"], settings["profile"])
+    print(f"Collage saved: {output_path}")
+    return output_path
+
+
+def _spool(stream, folder, layout, target_width):
+    """Write the stream's images to folder/<index>.npy; returns their (w, h) sizes."""
+    import numpy as np
+    from quick_image_edits.resample import fast_resize
+
+    sizes = []
+    for index, (_, image) in enumerate(stream):
+        # The layout uses the real size, so aspect ratios are not rounded
+        sizes.append(image.size)
+        if layout == "justified" and image.width > target_width:
+            image = fast_resize(image, (target_width,
+                                        max(1, round(image.height * target_width / image.width))))
+        with instrument.stage("spool"):
+            np.save(os.path.join(folder, f"{index}.npy"), np.asarray(image.convert("RGB")))
+    return sizes
+
+
+def _spooled_collage(folder, sizes, settings):
+    """Lay out spooled images and paste them in, loading one at a time."""
+    import numpy as np
+    from PIL import Image
+    from quick_image_edits import layouts
+    from quick_image_edits.resample import fast_resize
+
+    layout = settings["layout"]
+    if layout == "justified":
+        placements, collage_size = layouts.justified_layout(
+            sizes, settings["target_width"], settings["row_height"], settings["spacing"])
+    else:
+        placements, collage_size = layouts.simple_layout(
+            sizes, layout, settings["spacing"], settings["columns"])
+    result = Image.new("RGB", collage_size, color=(255, 255, 255))
+    for index, (x, y, w, h) in enumerate(placements):
+        tile = Image.fromarray(np.load(os.path.join(folder, f"{index}.npy")))
+        if tile.size != (w, h):
+            tile = fast_resize(tile, (w, h))
+        result.paste(tile, (x, y))
+    return result
+
+
+# ========== Job files ==========
+
+def _step_items(job):
+    for step in job.get("steps", []):
+        if not isinstance(step, dict) or len(step) != 1:
+            raise ValueError(f"Each step must be a single-key object, got {step!r}")
+        yield next(iter(step.items()))
+
+
+def load_job(path):
+    """Read and validate a job file; relative paths are made absolute."""
+    with open(path) as f:
+        job = json.load(f)
+    return prepare_job(job, os.path.dirname(os.path.abspath(path)))
+
+
+def _check_format(name, args, default="PNG"):
+    fmt = args.get("format", default)
+    if fmt is not None and fmt not in encoders.FORMATS:
+        raise ValueError(f"'{name}' format must be one of {', '.join(encoders.FORMATS)}, got {fmt!r}")
+    profile = args.get("profile", encoders.DEFAULT_PROFILE)
+    if profile not in encoders.PROFILE_NAMES:
+        raise ValueError(f"'{name}' profile must be one of {', '.join(encoders.PROFILE_NAMES)}, "
+                         f"got {profile!r}")
+
+
+def prepare_job(job, base):
+    """Validate a job dict in place; relative paths are resolved against 'base'."""
+    if not isinstance(job, dict):
+        raise ValueError("A job must be a JSON object")
+
+    def resolve(p):
+        return p if os.path.isabs(p) else os.path.join(base, p)
+
+    # 'input' may be left out for presets that are only used by the watcher
+    if "input" in job:
+        job["input"] = resolve(job["input"])
+
+    steps = list(_step_items(job))
+    for index, (name, args) in enumerate(steps):
+        if name == "collage":
+            if index != len(steps) - 1:
+                raise ValueError("'collage' must be the last step")
+            args = dict(args)
+            if args.get("layout", COLLAGE_DEFAULTS["layout"]) not in COLLAGE_LAYOUTS:
+                raise ValueError(f"Unknown collage layout: {args['layout']!r}")
+            _check_format(name, args, default=None)
+            args["path"] = resolve(args.get("path", COLLAGE_DEFAULTS["path"]))
+        elif name not in STEPS:
+            raise ValueError(f"Unknown step: {name!r}")
+        elif name == "crop":
+            # Checked here so a bad box fails before anything is decoded
+            if (not isinstance(args, (list, tuple)) or len(args) != 4
+                    or not all(isinstance(v, (int, float)) for v in args)):
+                raise ValueError(f"'crop' needs [left, upper, right, lower], got {args!r}")
+            if args[2] <= args[0] or args[3] <= args[1]:
+                raise ValueError(f"'crop' box is empty: {args!r}")
+        elif name == "save":
+            if "folder" not in args:
+                raise ValueError("'save' needs a 'folder'")
+            _check_format(name, args)
+            args = dict(args)
+            args["folder"] = resolve(args["folder"])
+        elif name == "adjust":
+            # Checked here so a typo fails before anything is decoded
+            from quick_image_edits import adjust
+            unknown = set(args) - set(adjust.DEFAULTS)
+            if unknown:
+                raise ValueError(f"Unknown adjustment(s): {', '.join(sorted(unknown))}")
+        steps[index] = {name: args}
+    job["steps"] = steps
+    return job
+
+
+def save_dirs(job):
+    """Folder names written by the job's "save" steps (never read back as input)."""
+    return [os.path.basename(os.path.normpath(args["folder"]))
+            for name, args in _step_items(job) if name == "save"]
+
+
+def build_stream(job, task=None, entries=None):
+    """
+    Chain the job's steps over its input (or over 'entries', if given).
+    Returns (stream, collage settings or None); nothing is decoded until
+    the stream is consumed.
+    """
+    if entries is None:
+        if "input" not in job:
+            raise ValueError("Job file needs an 'input' folder or archive")
+        entries = iter_images(job["input"], recursive=job.get("recursive", False),
+                              skip_dirs=save_dirs(job))
+        if job.get("frames"):
+            entries = expand_frames(entries)
+    stream = decode(entries)
+
+    collage_settings = None
+    for name, args in _step_items(job):
+        if name == "collage":
+            collage_settings = args
+        elif isinstance(args, dict):
+            stream = STEPS[name](stream, **args)
+        else:
+            stream = STEPS[name](stream, args)
+
+    if task is not None:
+        stream = _with_progress(stream, task)
+    return stream, collage_settings
+
+
+def _with_progress(stream, task):
+    for item in stream:
+        task.check_cancelled()
+        yield item
+        task.advance()
+
+
+def run_job(job, task=None, entries=None):
+    """Run a loaded job. Returns (files processed, collage path or None)."""
+    stream, collage_settings = build_stream(job, task, entries)
+    count = 0
+
+    def counted():
+        nonlocal count
+        for item in stream:
+            count += 1
+            yield item
+
+    output_path = None
+    if collage_settings is not None:
+        output_path = collage(counted(), **collage_settings)
+    else:
+        for _ in counted():
+            pass
+    return count, output_path
@@ -0,0 +1,126 @@
+"""
+Parallel processing of one large image in horizontal strips.
+
+The batch tools already spread images over processes, but a single huge
+image in PhotoEditor or ColorMaskGUI would run on one core. The
+per-pixel stages (lookup tables, HSV conversion, range masks,
+compositing) only depend on their own row, so they can run on horizontal
+strips on a thread pool: NumPy, OpenCV and Pillow release the GIL while
+they work. Every strip writes its part of one preallocated result, so the
+extra memory is about STRIP_PIXELS x the number of threads, whatever the
+image size.
+
+Images below MIN_PIXELS, and runs with a single thread, take the plain
+one-call path. Set QUICK_IMAGE_EDITS_THREADS to change the thread count
+(default: one per core; one inside the worker processes of a process
+pool, which already use the cores).
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+ENV_VAR = "QUICK_IMAGE_EDITS_THREADS"
+STRIP_PIXELS = 2_000_000   # Pixels per strip
+MIN_PIXELS = 8_000_000     # Smaller images are processed in one call
+
+_pool = None
+_pool_lock = threading.Lock()
+_local = threading.local()
+
+
+def thread_count():
+    """Threads per image (QUICK_IMAGE_EDITS_THREADS, else one per core)."""
+    value = os.environ.get(ENV_VAR, "").strip()
+    if value:
+        try:
+            return max(1, int(value))
+        except ValueError:
+            print(f"Ignoring {ENV_VAR}={value!r}: not a number")
+    import multiprocessing
+
+    if multiprocessing.parent_process() is not None:
+        return 1
+    return os.cpu_count() or 1
+
+
+def _executor():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadPoolExecutor(max_workers=thread_count(),
+                                       thread_name_prefix="strips")
+        return _pool
+
+
+def parallel(height, width):
+    """True if an image this big is worth splitting (and we may use threads)."""
+    return (height * width >= MIN_PIXELS and thread_count() > 1
+            and not getattr(_local, "in_strip", False))
+
+
+def row_ranges(height, width, strip_pixels=STRIP_PIXELS):
+    """(top, bottom) rows of each strip."""
+    rows = max(1, strip_pixels // max(1, width))
+    return [(top, min(height, top + rows)) for top in range(0, height, rows)]
+
+
+def run(func, height, width):
+    """
+    Call func(top, bottom) for every strip of a height x width image, on
+    the thread pool when the image is large enough; returns when all are
+    done (re-raising the first error).
+    """
+    ranges = row_ranges(height, width)
+    if len(ranges) == 1 or not parallel(height, width):
+        for top, bottom in ranges:
+            func(top, bottom)
+        return
+
+    def work(bounds):
+        # A stage called from inside a strip runs inline, instead of
+        # waiting on the pool it is running on
+        _local.in_strip = True
+        try:
+            func(*bounds)
+        finally:
+            _local.in_strip = False
+
+    for _ in _executor().map(work, ranges):
+        pass
+
+
+def map_image(image, func, halo=0):
+    """
+    func(image) for a PIL image, computed strip by strip into one new image
+    when it is large. 'func' must work per pixel, or need at most 'halo'
+    rows of context above and below (e.g. 1 for a 3x3 filter).
+    """
+    width, height = image.size
+    if not parallel(height, width):
+        return func(image)
+    from PIL import Image
+
+    image.load()   # Decode before the threads crop it
+    result = Image.new(image.mode, image.size)
+
+    def strip(top, bottom):
+        upper, lower = max(0, top - halo), min(height, bottom + halo)
+        part = func(image.crop((0, upper, width, lower)))
+        if halo:
+            part = part.crop((0, top - upper, width, bottom - upper))
+        result.paste(part, (0, top))
+
+    run(strip, height, width)
+    return result
+
+
+def map_array(func, source, out):
+    """
+    func(source rows, out rows) for every strip of a NumPy image; 'func'
+    writes its rows of the preallocated 'out' and may return nothing.
+    """
+    def strip(top, bottom):
+        func(source[top:bottom], out[top:bottom])
+
+    run(strip, *source.shape[:2])
+    return out
@@ -0,0 +1,159 @@
+"""
+TwoImageCollageApp: pick two images and save them side by side or top to
+bottom. Started by image_collager_two_imgs.py when no batch options are given.
+"""
+import os
+import tkinter as tk
+from tkinter import filedialog, messagebox
+
+from quick_image_edits import encoders, instrument
+
+
+class TwoImageCollageApp(tk.Tk):
+    def __init__(self):
+        super().__init__()
+        self.title("Two-Image Collage Maker")
+        self.geometry("300x400")
+
+        # ========== Variables ==========
+
+        # Paths to the two selected images
+        self.img1_path = None
+        self.img2_path = None
+
+        # Layout: "horizontal" (side by side) or "vertical" (top to bottom)
+        self.layout_var = tk.StringVar(value="horizontal")
+
+        # Spacing (in pixels) between the two images
+        self.spacing_var = tk.IntVar(value=0)  # default is 0
+
+        # Output format: "PNG", "JPEG", "WEBP" or "WEBP_LOSSLESS"
+        self.format_var = tk.StringVar(value="PNG")  # default is PNG
+
+        # Encoder profile: "fast", "balanced" or "smallest"
+        self.profile_var = tk.StringVar(value=encoders.DEFAULT_PROFILE)
+
+        # ========== Widgets ==========
+
+        # 1. Buttons to select images
+        self.select_img1_btn = tk.Button(self, text="Select First Image", command=self.select_first_image)
+        self.select_img1_btn.pack(pady=(10, 5))
+
+        self.select_img2_btn = tk.Button(self, text="Select Second Image", command=self.select_second_image)
+        self.select_img2_btn.pack(pady=5)
+
+        # 2. Radio buttons for layout
+        layout_frame = tk.LabelFrame(self, text="Layout")
+        layout_frame.pack(pady=5, fill="x", padx=20)
+
+        self.horizontal_rb = tk.Radiobutton(
+            layout_frame, text="Side by Side",
+            variable=self.layout_var, value="horizontal"
+        )
+        self.vertical_rb = tk.Radiobutton(
+            layout_frame, text="Top to Bottom",
+            variable=self.layout_var, value="vertical"
+        )
+        self.horizontal_rb.pack(anchor="w")
+        self.vertical_rb.pack(anchor="w")
+
+        # 3. Entry (Spinbox) for spacing
+        spacing_frame = tk.LabelFrame(self, text="Spacing (px)")
+        spacing_frame.pack(pady=5, fill="x", padx=20)
+        
+        self.spacing_entry = tk.Spinbox(
+            spacing_frame, from_=0, to=9999,
+            textvariable=self.spacing_var, width=5
+        )
+        self.spacing_entry.pack(pady=5)
+
+        # 4. Radio buttons for save format
+        format_frame = tk.LabelFrame(self, text="Save Format")
+        format_frame.pack(pady=5, fill="x", padx=20)
+
+        self.png_rb = tk.Radiobutton(
+            format_frame, text="PNG",
+            variable=self.format_var, value="PNG"
+        )
+        self.jpg_rb = tk.Radiobutton(
+            format_frame, text="JPG",
+            variable=self.format_var, value="JPEG"
+        )
+        self.webp_rb = tk.Radiobutton(
+            format_frame, text="WebP",
+            variable=self.format_var, value="WEBP"
+        )
+        self.webp_lossless_rb = tk.Radiobutton(
+            format_frame, text="WebP (lossless)",
+            variable=self.format_var, value="WEBP_LOSSLESS"
+        )
+        self.png_rb.pack(anchor="w")
+        self.jpg_rb.pack(anchor="w")
+        self.webp_rb.pack(anchor="w")
+        self.webp_lossless_rb.pack(anchor="w")
+
+        profile_frame = tk.LabelFrame(self, text="Encoder Profile")
+        profile_frame.pack(pady=5, fill="x", padx=20)
+        tk.OptionMenu(profile_frame, self.profile_var, *encoders.PROFILE_NAMES).pack(pady=2)
+
+        # 5. Button to create collage
+        self.create_collage_btn = tk.Button(self, text="Create Collage", command=self.create_collage)
+        self.create_collage_btn.pack(pady=(5, 10))
+
+    # ========== Methods ==========
+
+    def select_first_image(self):
+        """Select the first image."""
+        path = filedialog.askopenfilename(
+            title="Select First Image",
+            filetypes=[("Image Files", "*.png;*.jpg;*.jpeg;*.tiff;*.bmp;*.gif")]
+        )
+        if path:
+            self.img1_path = path
+            messagebox.showinfo("First Image Selected", f"First image:\n{path}")
+
+    def select_second_image(self):
+        """Select the second image."""
+        path = filedialog.askopenfilename(
+            title="Select Second Image",
+            filetypes=[("Image Files", "*.png;*.jpg;*.jpeg;*.tiff;*.bmp;*.gif")]
+        )
+        if path:
+            self.img2_path = path
+            messagebox.showinfo("Second Image Selected", f"Second image:\n{path}")
+
+    def create_collage(self):
+        """Create a collage of the two selected images."""
+        # Check that both images have been selected
+        if not self.img1_path or not self.img2_path:
+            messagebox.showwarning("Images Not Selected", "Please select two images first.")
+            return
+
+        layout = self.layout_var.get()
+        spacing = self.spacing_var.get()
+        save_format = self.format_var.get()  # "PNG", "JPEG", "WEBP" or "WEBP_LOSSLESS"
+
+        # Open both images (decoded directly at their collage size) and combine
+        # Pillow is only loaded once a collage is actually made
+        from quick_image_edits.pairs import make_collage_from_paths
+
+        try:
+            collage = make_collage_from_paths(self.img1_path, self.img2_path, layout, spacing)
+        except Exception as e:
+            messagebox.showerror("Error Opening Images", f"Could not open images:\n{e}")
+            return
+
+        # Save the collage in the same folder as the first image
+        output_dir = os.path.dirname(self.img1_path)
+
+        # Use correct file extension based on format
+        extension = encoders.extension_for(save_format)
+
+        output_path = os.path.join(output_dir, f"two_image_collage{extension}")
+        try:
+            with instrument.stage("encode"):
+                encoders.save_image(collage, output_path, save_format, self.profile_var.get())
+            messagebox.showinfo("Collage Created",
+                                f"Collage saved as:\n{output_path}")
+        except Exception as e:
+            messagebox.showerror("Save Error", f"Failed to save collage:\n{e}")
@@ -0,0 +1,335 @@
+"""
+Watch a folder and run a saved job preset (see quick_image_edits.streaming)
+on every new image as it appears.
+
+  - Change detection uses Linux inotify (through ctypes, no extra package)
+    and falls back to rescanning the folder every few seconds elsewhere.
+  - A file is only processed once its size and mtime have stopped changing
+    for 'settle' seconds, so half-written captures are never decoded.
+  - Work runs on a bounded process pool; at most 2 x workers files are in
+    flight, the rest wait in the pending set.
+  - Finished files are recorded in a JSON index (relative name -> size,
+    mtime) next to the images, so a restart skips what is already done and
+    only redoes files that changed since.
+"""
+import os
+import sys
+import json
+import time
+import select
+import struct
+import ctypes
+import ctypes.util
+import threading
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from quick_image_edits.sources import IMAGE_EXTENSIONS, ImageEntry, iter_images
+from quick_image_edits.streaming import run_job, save_dirs
+
+STATE_FILE = ".quick_image_edits_processed.json"
+DEFAULT_SETTLE = 1.0         # Seconds a file must stay unchanged before it is processed
+DEFAULT_POLL_INTERVAL = 2.0  # Rescan period of the polling fallback
+MAX_CRASHES = 2              # Broken pools a file may be caught in before it counts as failed
+
+
+# ========== Processed-state index ==========
+
+class ProcessedIndex:
+    """Relative name -> (size, mtime_ns) of every file already processed."""
+
+    def __init__(self, path):
+        self.path = path
+        self.entries = {}
+        self.dirty = False
+        try:
+            with open(path) as f:
+                self.entries = {name: tuple(sig) for name, sig in json.load(f).items()}
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable state file '{path}': {e}")
+
+    def is_done(self, name, signature):
+        return self.entries.get(name) == signature
+
+    def mark(self, name, signature):
+        self.entries[name] = signature
+        self.dirty = True
+
+    def save(self):
+        """Write the index atomically (temp file + rename), if anything changed."""
+        if not self.dirty:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+
+def file_signature(path):
+    """(size, mtime_ns) of a file, or None if it is gone."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+# ========== Change sources ==========
+
+class PollingWatcher:
+    """Fallback: report "rescan everything" every poll_interval seconds."""
+
+    def __init__(self, folder, recursive=False, poll_interval=DEFAULT_POLL_INTERVAL):
+        self.poll_interval = poll_interval
+        self._next_scan = 0.0
+
+    def changes(self, timeout):
+        """
+        Wait up to 'timeout' seconds. Returns a set of changed file paths,
+        or None when the caller should rescan the whole folder.
+        """
+        delay = self._next_scan - time.monotonic()
+        if delay > timeout:
+            time.sleep(timeout)
+            return set()
+        time.sleep(max(delay, 0))
+        self._next_scan = time.monotonic() + self.poll_interval
+        return None
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """Linux inotify on the folder (and its subfolders when recursive)."""
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_Q_OVERFLOW = 0x00004000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+    _EVENT = struct.Struct("iIII")  # wd, mask, cookie, name length
+
+    def __init__(self, folder, recursive=False, skip_dirs=()):
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.recursive = recursive
+        self.skip_dirs = set(skip_dirs)
+        self.dirs = {}  # watch descriptor -> folder
+        self._add(folder)
+
+    def _add(self, folder):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(folder), self.MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for '{folder}'")
+        self.dirs[wd] = folder
+        if self.recursive:
+            with os.scandir(folder) as scanner:
+                for entry in scanner:
+                    if entry.is_dir() and entry.name not in self.skip_dirs:
+                        self._add(entry.path)
+
+    def changes(self, timeout):
+        """Same contract as PollingWatcher.changes()."""
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return set()
+        changed = set()
+        data = os.read(self.fd, 64 * 1024)
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = self._EVENT.unpack_from(data, offset)
+            offset += self._EVENT.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            if mask & self.IN_Q_OVERFLOW:
+                return None  # Events were lost: rescan
+            folder = self.dirs.get(wd)
+            if folder is None or not name:
+                continue
+            path = os.path.join(folder, name)
+            if mask & self.IN_ISDIR:
+                if self.recursive and mask & (self.IN_CREATE | self.IN_MOVED_TO) \
+                        and name not in self.skip_dirs:
+                    self._add(path)
+                    return None  # Files may have landed before the watch existed
+                continue
+            changed.add(path)
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+
+def open_watcher(folder, recursive=False, poll_interval=DEFAULT_POLL_INTERVAL,
+                 skip_dirs=(), polling=False):
+    """inotify where available, otherwise (or with polling=True) folder rescans."""
+    if not polling and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(folder, recursive, skip_dirs)
+        except (OSError, AttributeError) as e:
+            print(f"inotify unavailable ({e}); polling every {poll_interval}s")
+    return PollingWatcher(folder, recursive, poll_interval)
+
+
+# ========== Worker ==========
+
+def process_file(job, entry):
+    """Worker process: run the job's steps on one file."""
+    count, _ = run_job(job, entries=[entry])
+    return count
+
+
+# ========== Watch loop ==========
+
+def watch(job, folder, workers=2, settle=DEFAULT_SETTLE, recursive=False,
+          state_path=None, poll_interval=DEFAULT_POLL_INTERVAL, polling=False,
+          stop_event=None):
+    """
+    Process existing and newly arriving images in 'folder' with 'job' until
+    stop_event is set (or KeyboardInterrupt). 'job' must not end in a
+    collage step.
+    """
+    if any("collage" in step for step in job.get("steps", [])):
+        raise ValueError("A watched job can't contain a 'collage' step")
+    folder = os.path.abspath(folder)
+    stop_event = stop_event or threading.Event()
+    state_path = state_path or os.path.join(folder, STATE_FILE)
+    index = ProcessedIndex(state_path)
+    skip = set(save_dirs(job))
+
+    def relative(path):
+        return os.path.relpath(path, folder).replace(os.sep, "/")
+
+    def wanted(path):
+        rel = relative(path)
+        if rel.startswith("../") or not rel.lower().endswith(IMAGE_EXTENSIONS):
+            return False
+        parts = rel.split("/")
+        return (recursive or len(parts) == 1) and not skip.intersection(parts[:-1])
+
+    pending = {}    # path -> (signature, time it was last seen changing)
+    failed = {}     # path -> signature that failed (retried only once it changes)
+    in_flight = {}  # future -> (path, signature)
+    crashes = {}    # path -> broken pools it was in flight in
+    max_in_flight = 2 * workers
+
+    def note(path):
+        signature = file_signature(path)
+        if signature is None or index.is_done(relative(path), signature) \
+                or failed.get(path) == signature:
+            pending.pop(path, None)
+            return
+        previous = pending.get(path)
+        if previous is None or previous[0] != signature:
+            pending[path] = (signature, time.monotonic())
+
+    def rescan():
+        for entry in iter_images(folder, recursive=recursive, skip_dirs=skip, sort=False):
+            note(entry.path)
+
+    watcher = open_watcher(folder, recursive, poll_interval, skip, polling)
+    pool = ProcessPoolExecutor(max_workers=workers)
+    pool_futures = set()   # In-flight futures of the current pool
+
+    def replace_pool(e):
+        # A worker died (e.g. OOM-killed); every future of the pool fails with it
+        nonlocal pool
+        print(f"Worker pool broke ({e}); starting a new one")
+        pool.shutdown(wait=False, cancel_futures=True)
+        pool = ProcessPoolExecutor(max_workers=workers)
+        pool_futures.clear()
+
+    print(f"Watching '{folder}' with {type(watcher).__name__} ({workers} workers)")
+    try:
+        rescan()
+        while not stop_event.is_set():
+            # Short waits while files are settling or running, long ones when idle
+            timeout = settle / 2 if pending or in_flight else 1.0
+            changed = watcher.changes(timeout)
+            if changed is None:
+                rescan()
+            else:
+                for path in changed:
+                    if wanted(path):
+                        note(path)
+
+            # Re-stat settling files; submit the ones that stayed unchanged
+            now = time.monotonic()
+            busy_paths = {path for path, _ in in_flight.values()}
+            for path in list(pending):
+                # Files caught in a broken pool are retried one at a time, so
+                # the one that kills the worker doesn't take others with it
+                if len(in_flight) >= max_in_flight or crashes.keys() & busy_paths:
+                    break
+                if path in busy_paths or (path in crashes and in_flight):
+                    continue
+                note(path)
+                if path not in pending:
+                    continue
+                signature, since = pending[path]
+                if now - since < settle:
+                    continue
+                entry = ImageEntry(relative(path), path)
+                try:
+                    future = pool.submit(process_file, job, entry)
+                except BrokenProcessPool as e:
+                    # The file stays pending and goes to the fresh pool
+                    replace_pool(e)
+                    break
+                del pending[path]
+                in_flight[future] = (path, signature)
+                pool_futures.add(future)
+                busy_paths.add(path)
+
+            if in_flight:
+                done, _ = wait(list(in_flight), timeout=0, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path, signature = in_flight.pop(future)
+                    try:
+                        if future.result() == 0:
+                            raise ValueError("could not be decoded")
+                    except BrokenProcessPool as e:
+                        if future in pool_futures:
+                            replace_pool(e)
+                        # Any file in flight may have been the one that crashed
+                        # the worker; retry each (alone) before giving up
+                        crashes[path] = crashes.get(path, 0) + 1
+                        if crashes[path] < MAX_CRASHES:
+                            pending[path] = (signature, now - settle)
+                            continue
+                        del crashes[path]
+                        print(f"Failed on '{path}': worker died {MAX_CRASHES} times")
+                        failed[path] = signature
+                        continue
+                    except Exception as e:
+                        print(f"Failed on '{path}': {e}")
+                        failed[path] = signature
+                        crashes.pop(path, None)
+                        continue
+                    finally:
+                        pool_futures.discard(future)
+                    crashes.pop(path, None)
+                    index.mark(relative(path), signature)
+                index.save()
+    except KeyboardInterrupt:
+        print("Stopping...")
+    finally:
+        watcher.close()
+        pool.shutdown(wait=True, cancel_futures=True)
+        # Record whatever finished while shutting down
+        for future, (path, signature) in in_flight.items():
+            if future.done() and not future.cancelled() and future.exception() is None \
+                    and future.result() > 0:
+                index.mark(relative(path), signature)
+        index.save()